@@ -0,0 +1,65 @@
+"""
+MongoDB store for trip mode bookings.
+A unique index on the client idempotency key turns retries into no-ops.
+"""
+
+import logging
+import secrets
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+def new_booking_id(prefix: str) -> str:
+    """Collision-free booking id: second-resolution timestamp plus 48 random bits"""
+    return f"{prefix}-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{secrets.token_hex(6).upper()}"
+
+
+class BookingStore:
+    def __init__(self, db):
+        self.bookings = db.bookings
+
+    async def ensure_indexes(self):
+        await self.bookings.create_index("booking_id", unique=True)
+        # Sparse so bookings made without a key never collide on null
+        await self.bookings.create_index("idempotency_key", unique=True, sparse=True)
+        await self.bookings.create_index([("user_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)])
+        await self.bookings.create_index([("status", ASCENDING), ("created_at", DESCENDING)])
+
+    async def find_by_idempotency_key(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        return await self.bookings.find_one({"idempotency_key": idempotency_key}, {"_id": 0})
+
+    async def create(self, booking: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Insert a booking. If another request already stored a booking with the
+        same idempotency key, that booking is returned instead.
+        """
+        try:
+            await self.bookings.insert_one(booking)
+        except DuplicateKeyError:
+            existing = None
+            if booking.get("idempotency_key"):
+                existing = await self.find_by_idempotency_key(booking["idempotency_key"])
+            if existing is None:
+                raise
+            logger.info(f"Idempotent replay for booking {existing['booking_id']}")
+            return existing
+        booking.pop("_id", None)
+        return booking
+
+    async def get(self, booking_id: str) -> Optional[Dict[str, Any]]:
+        return await self.bookings.find_one({"booking_id": booking_id}, {"_id": 0})
+
+    async def list(self, user_id: Optional[str] = None, status: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """List bookings newest first, filtered on the indexed user/status fields"""
+        query: Dict[str, Any] = {}
+        if user_id:
+            query["user_id"] = user_id
+        if status:
+            query["status"] = status
+        cursor = self.bookings.find(query, {"_id": 0}).sort("created_at", DESCENDING).limit(limit)
+        return await cursor.to_list(length=limit)
@@ -0,0 +1,436 @@
+"""
+Two-tier cache for upstream lookups.
+
+L1 is a per-process LRU. L2 is a MongoDB collection per namespace shared by
+every worker, with a TTL index on expires_at and zlib-compressed JSON values.
+Expired L1 entries are kept for CACHE_STALE_SECONDS so a fast-failed provider
+call (open circuit, shed by the rate limiter) can fall back to the last value.
+Integrations call get_cache(namespace) at import time; the L2 backend is
+attached later by server.py through configure_shared_backend().
+
+cache_stats() gives the cheap per-namespace counters (also exported as
+metrics); cache_report() adds the L1 memory footprint, entry ages and the
+L2 document count for /api/debug/caches. invalidate_prefix() drops every
+key starting with a prefix (one city, one route, ...) from this worker's L1
+and from the shared L2; other workers' L1 copies age out with their TTL.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from bson import Binary
+
+from core.errors import CallRejected
+from core.metrics import register_collector
+from core.server_timing import note_cache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+CACHE_STALE_SECONDS = float(os.getenv("CACHE_STALE_SECONDS", "3600"))
+
+
+class LRUCache:
+    """Per-process LRU with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 1024, stale_seconds: float = 0.0):
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        # key -> (expires_at, value, stored_at)
+        self._data: "OrderedDict[str, Tuple[float, Any, float]]" = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value, _ = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            if expires_at + self.stale_seconds <= now:
+                del self._data[key]
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def get_stale(self, key: str) -> Any:
+        """Return the value even if expired, as long as it is within the stale window"""
+        entry = self._data.get(key)
+        if entry is None or entry[0] + self.stale_seconds <= time.monotonic():
+            return _MISSING
+        return entry[1]
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        now = time.monotonic()
+        self._data[key] = (now + ttl_seconds, value, now)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str):
+        self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> int:
+        keys = [key for key in self._data if key.startswith(prefix)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def keys(self, prefix: str = "", limit: int = 100) -> List[str]:
+        """Most recently used first"""
+        keys = []
+        for key in reversed(self._data):
+            if key.startswith(prefix):
+                keys.append(key)
+                if len(keys) >= limit:
+                    break
+        return keys
+
+    def ages(self) -> Tuple[List[float], int]:
+        """Seconds since each entry was stored, and how many are past expiry (kept only as stale fallbacks)"""
+        now = time.monotonic()
+        ages = []
+        expired = 0
+        for expires_at, _, stored_at in self._data.values():
+            ages.append(now - stored_at)
+            if expires_at <= now:
+                expired += 1
+        return ages, expired
+
+    def footprint(self, sample: int = 256) -> int:
+        """Approximate bytes held by keys and values, extrapolated from up to `sample` entries"""
+        if not self._data:
+            return 0
+        step = max(len(self._data) // sample, 1)
+        sizes = [
+            sys.getsizeof(key) + _deep_size(value)
+            for i, (key, (_, value, _)) in enumerate(self._data.items())
+            if i % step == 0
+        ]
+        return int(sum(sizes) / len(sizes) * len(self._data))
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _deep_size(value: Any) -> int:
+    # Cached values are JSON-shaped, so containers nest without cycles
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + _deep_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_deep_size(v) for v in value)
+    elif hasattr(value, "__dict__"):
+        size += _deep_size(vars(value))
+    return size
+
+
+# Upper bounds of the entry age histogram, in seconds
+AGE_BUCKETS = (60, 600, 3600, 6 * 3600, 24 * 3600)
+
+
+def _age_distribution(ages: List[float]) -> Dict[str, Any]:
+    if not ages:
+        return {"buckets": {}, "p50_seconds": None, "p90_seconds": None, "max_seconds": None}
+    ages = sorted(ages)
+    buckets = {f"le_{bound}": 0 for bound in AGE_BUCKETS}
+    buckets["older"] = 0
+    for age in ages:
+        bound = next((b for b in AGE_BUCKETS if age <= b), None)
+        buckets[f"le_{bound}" if bound else "older"] += 1
+    return {
+        "buckets": buckets,
+        "p50_seconds": round(ages[len(ages) // 2], 1),
+        "p90_seconds": round(ages[min(int(len(ages) * 0.9), len(ages) - 1)], 1),
+        "max_seconds": round(ages[-1], 1),
+    }
+
+
+class MongoCacheBackend:
+    """Shared L2: one collection per namespace with a TTL index on expires_at"""
+
+    def __init__(self, db, collection_prefix: str = "cache_"):
+        self.db = db
+        self.collection_prefix = collection_prefix
+        self._indexed = set()
+
+    def _collection(self, namespace: str):
+        return self.db[f"{self.collection_prefix}{namespace}"]
+
+    @staticmethod
+    def encode(value: Any) -> Binary:
+        return Binary(zlib.compress(json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")))
+
+    @staticmethod
+    def decode(data: bytes) -> Any:
+        return json.loads(zlib.decompress(data))
+
+    async def get(self, namespace: str, key: str) -> Any:
+        """Return (value, seconds_left) or _MISSING"""
+        now = datetime.utcnow()
+        doc = await self._collection(namespace).find_one(
+            {"_id": key, "expires_at": {"$gt": now}}, {"v": 1, "expires_at": 1}
+        )
+        if doc is None:
+            return _MISSING
+        return self.decode(doc["v"]), (doc["expires_at"] - now).total_seconds()
+
+    async def set(self, namespace: str, key: str, value: Any, ttl_seconds: float):
+        collection = self._collection(namespace)
+        if namespace not in self._indexed:
+            await collection.create_index("expires_at", expireAfterSeconds=0)
+            self._indexed.add(namespace)
+        await collection.replace_one(
+            {"_id": key},
+            {"_id": key, "v": self.encode(value), "expires_at": datetime.utcnow() + timedelta(seconds=ttl_seconds)},
+            upsert=True,
+        )
+
+    async def delete(self, namespace: str, key: str):
+        await self._collection(namespace).delete_one({"_id": key})
+
+    async def delete_prefix(self, namespace: str, prefix: str) -> int:
+        # An anchored regex on _id is answered from the _id index
+        query = {"_id": {"$regex": f"^{re.escape(prefix)}"}} if prefix else {}
+        result = await self._collection(namespace).delete_many(query)
+        return result.deleted_count
+
+    async def count(self, namespace: str) -> int:
+        """Documents in the namespace, including expired ones the TTL monitor has not removed yet"""
+        return await self._collection(namespace).estimated_document_count()
+
+    async def scan(self, namespace: str, limit: int) -> List[Tuple[str, Any, float]]:
+        """Return up to limit live (key, value, seconds_left) entries, longest-lived first"""
+        now = datetime.utcnow()
+        cursor = self._collection(namespace).find({"expires_at": {"$gt": now}}).sort("expires_at", -1).limit(limit)
+        return [
+            (doc["_id"], self.decode(doc["v"]), (doc["expires_at"] - now).total_seconds())
+            async for doc in cursor
+        ]
+
+
+_shared_backend: Optional[MongoCacheBackend] = None
+_caches: Dict[str, "TieredCache"] = {}
+
+
+def configure_shared_backend(backend: Optional[MongoCacheBackend]):
+    """Attach (or detach with None) the shared L2 used by every namespace"""
+    global _shared_backend
+    _shared_backend = backend
+
+
+class TieredCache:
+    def __init__(self, namespace: str, ttl_seconds: float, max_entries: int = 1024):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.l1 = LRUCache(max_entries, stale_seconds=CACHE_STALE_SECONDS)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.invalidations = 0
+
+    async def get(self, key: str) -> Any:
+        """Return the cached value or None"""
+        value = await self._lookup(key)
+        return None if value is _MISSING else value
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        ttl = ttl_seconds or self.ttl_seconds
+        self.l1.set(key, value, ttl)
+        if _shared_backend is not None:
+            try:
+                await _shared_backend.set(self.namespace, key, value, ttl)
+            except Exception as e:
+                logger.warning(f"Shared cache write failed for {self.namespace}: {e}")
+
+    async def delete(self, key: str):
+        self.l1.delete(key)
+        if _shared_backend is not None:
+            try:
+                await _shared_backend.delete(self.namespace, key)
+            except Exception as e:
+                logger.warning(f"Shared cache delete failed for {self.namespace}: {e}")
+
+    async def invalidate_prefix(self, prefix: str) -> Dict[str, Optional[int]]:
+        """Drop every key starting with prefix ("" clears the namespace); returns the L1/L2 counts removed"""
+        removed: Dict[str, Optional[int]] = {"l1": self.l1.delete_prefix(prefix), "l2": None}
+        if _shared_backend is not None:
+            try:
+                removed["l2"] = await _shared_backend.delete_prefix(self.namespace, prefix)
+            except Exception as e:
+                logger.warning(f"Shared cache invalidation failed for {self.namespace}: {e}")
+        self.invalidations += removed["l1"] + (removed["l2"] or 0)
+        logger.info(f"Invalidated {self.namespace} keys starting with {prefix!r}: {removed}")
+        return removed
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_seconds: Optional[float] = None,
+        should_cache: Callable[[Any], bool] = lambda value: value is not None,
+    ) -> Any:
+        """
+        Return the cached value, or run loader once per key (concurrent callers
+        share the same load) and cache its result when should_cache allows.
+        If the loader is rejected without reaching the provider, a stale value
+        is returned when one is still held.
+        """
+        value = await self._lookup(key)
+        if value is not _MISSING:
+            note_cache("hit")
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            note_cache("shared")
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            try:
+                value = await loader()
+            except CallRejected as e:
+                value = self.l1.get_stale(key)
+                if value is _MISSING:
+                    raise
+                self.stale_hits += 1
+                note_cache("stale")
+                logger.info(f"Serving stale {self.namespace} entry: {e}")
+            else:
+                note_cache("miss")
+                if should_cache(value):
+                    await self.set(key, value, ttl_seconds)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure is not logged as lost
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def preload(self) -> int:
+        """Warm L1 from the shared tier; returns the number of entries loaded"""
+        if _shared_backend is None:
+            return 0
+        try:
+            entries = await _shared_backend.scan(self.namespace, self.l1.max_entries)
+        except Exception as e:
+            logger.warning(f"Shared cache preload failed for {self.namespace}: {e}")
+            return 0
+        for key, value, seconds_left in entries:
+            self.l1.set(key, value, min(self.ttl_seconds, seconds_left))
+        return len(entries)
+
+    async def _lookup(self, key: str) -> Any:
+        value = self.l1.get(key)
+        if value is not _MISSING:
+            self.l1_hits += 1
+            return value
+        if _shared_backend is not None:
+            try:
+                entry = await _shared_backend.get(self.namespace, key)
+            except Exception as e:
+                logger.warning(f"Shared cache read failed for {self.namespace}: {e}")
+                entry = _MISSING
+            if entry is not _MISSING:
+                value, seconds_left = entry
+                self.l2_hits += 1
+                self.l1.set(key, value, min(self.ttl_seconds, seconds_left))
+                return value
+        self.misses += 1
+        return _MISSING
+
+
+def get_cache_namespace(namespace: str) -> Optional[TieredCache]:
+    return _caches.get(namespace)
+
+
+def get_cache(namespace: str, ttl_seconds: float, max_entries: int = 1024) -> TieredCache:
+    """Return the process-wide cache for a namespace, creating it on first use"""
+    cache = _caches.get(namespace)
+    if cache is None:
+        cache = TieredCache(namespace, ttl_seconds, max_entries)
+        _caches[namespace] = cache
+    return cache
+
+
+def _stats(cache: TieredCache) -> Dict[str, Any]:
+    lookups = cache.l1_hits + cache.l2_hits + cache.misses
+    return {
+        "ttl_seconds": cache.ttl_seconds,
+        "entries": len(cache.l1),
+        "max_entries": cache.l1.max_entries,
+        "fill_ratio": round(len(cache.l1) / cache.l1.max_entries, 3),
+        "l1_hits": cache.l1_hits,
+        "l2_hits": cache.l2_hits,
+        "misses": cache.misses,
+        "stale_hits": cache.stale_hits,
+        "hit_ratio": round((cache.l1_hits + cache.l2_hits) / lookups, 3) if lookups else None,
+        "evictions": cache.l1.evictions,
+        "invalidations": cache.invalidations,
+    }
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {namespace: _stats(cache) for namespace, cache in _caches.items()}
+
+
+async def cache_report(namespace: str, keys_prefix: Optional[str] = None, keys_limit: int = 100) -> Dict[str, Any]:
+    """
+    cache_stats() for one namespace plus its approximate L1 memory footprint,
+    entry age distribution, L2 document count and, when keys_prefix is given,
+    matching L1 keys (to check a prefix before invalidating it).
+    """
+    cache = _caches[namespace]
+    report = _stats(cache)
+    ages, expired = cache.l1.ages()
+    report["stale_entries"] = expired
+    report["memory_bytes"] = cache.l1.footprint()
+    report["age"] = _age_distribution(ages)
+    report["l2_entries"] = None
+    if _shared_backend is not None:
+        try:
+            report["l2_entries"] = await _shared_backend.count(namespace)
+        except Exception as e:
+            logger.warning(f"Shared cache count failed for {namespace}: {e}")
+    if keys_prefix is not None:
+        report["keys"] = cache.l1.keys(keys_prefix, keys_limit)
+    return report
+
+
+def _collect_metrics():
+    stats = cache_stats()
+    yield (
+        "cache_lookups_total", "counter", "Cache lookups by namespace and result", ("namespace", "result"),
+        {
+            (namespace, result): s[key]
+            for namespace, s in stats.items()
+            for result, key in (("l1_hit", "l1_hits"), ("l2_hit", "l2_hits"), ("miss", "misses"), ("stale_hit", "stale_hits"))
+        },
+    )
+    yield ("cache_entries", "gauge", "Entries held in the L1 cache", ("namespace",), {(n,): s["entries"] for n, s in stats.items()})
+    yield ("cache_evictions_total", "counter", "L1 capacity evictions", ("namespace",), {(n,): s["evictions"] for n, s in stats.items()})
+    yield ("cache_invalidations_total", "counter", "Entries removed by prefix invalidation", ("namespace",), {(n,): s["invalidations"] for n, s in stats.items()})
+
+
+register_collector(_collect_metrics)
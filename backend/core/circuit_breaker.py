@@ -0,0 +1,214 @@
+"""
+Per-integration circuit breakers.
+
+A breaker counts provider failures over a rolling window. Once the failure
+rate crosses the threshold it opens, and calls fail immediately with
+CircuitOpen instead of waiting on a provider that is down. After the cool-off
+a few half-open probe calls are let through: success closes the circuit,
+failure opens it again. Configured from the environment:
+
+    CIRCUIT_<PROVIDER>_FAILURE_RATE   failure ratio that opens the circuit
+    CIRCUIT_<PROVIDER>_MIN_CALLS      calls in the window before it can open
+    CIRCUIT_<PROVIDER>_WINDOW         rolling window, in seconds
+    CIRCUIT_<PROVIDER>_OPEN_SECONDS   cool-off before half-open probing
+    CIRCUIT_<PROVIDER>_PROBES         concurrent half-open probe calls
+"""
+
+import logging
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from core.deadline import DeadlineExceeded
+from core.errors import CallRejected
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(CallRejected):
+    """Raised instead of calling a provider whose circuit is open"""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(provider, f"{provider} circuit is open, retry in {retry_after:.1f}s", retry_after)
+
+
+def error_status(error: BaseException) -> Optional[int]:
+    """HTTP status carried by an SDK or HTTP client exception, if any"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is None:
+        status = getattr(error, "status", None)
+    return status if isinstance(status, int) else None
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """Transport errors and 5xx answers count against a provider; 4xx answers do not"""
+    status = error_status(error)
+    return status is None or status >= 500
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        provider: str,
+        failure_rate: float = 0.5,
+        min_calls: int = 10,
+        window_seconds: float = 30.0,
+        open_seconds: float = 30.0,
+        probes: int = 1,
+        is_failure: Callable[[BaseException], bool] = is_provider_failure,
+    ):
+        self.provider = provider
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self.is_failure = is_failure
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._probes_inflight = 0
+        # One [second, successes, failures] bucket per second of the window
+        self._buckets: "deque[list]" = deque()
+        self.rejected = 0
+        self.times_opened = 0
+        self.last_failure: Optional[str] = None
+
+    def before_call(self):
+        """Raise CircuitOpen unless the call may go to the provider"""
+        if self.state == OPEN:
+            remaining = self.opened_at + self.open_seconds - time.monotonic()
+            if remaining > 0:
+                self.rejected += 1
+                raise CircuitOpen(self.provider, remaining)
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probes_inflight >= self.probes:
+                self.rejected += 1
+                raise CircuitOpen(self.provider, 1.0)
+            self._probes_inflight += 1
+
+    def record_success(self):
+        if self.state == HALF_OPEN:
+            self._probes_inflight -= 1
+            self._transition(CLOSED)
+        self._count(failed=False)
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        self.last_failure = f"{type(error).__name__}: {error}" if error is not None else None
+        if self.state == HALF_OPEN:
+            self._probes_inflight -= 1
+            self._transition(OPEN)
+            return
+        successes, failures = self._count(failed=True)
+        total = successes + failures
+        if self.state == CLOSED and total >= self.min_calls and failures / total >= self.failure_rate:
+            self._transition(OPEN)
+
+    def release(self):
+        """Give back a probe slot for a call that ended without an answer (e.g. cancelled)"""
+        if self.state == HALF_OPEN:
+            self._probes_inflight = max(self._probes_inflight - 1, 0)
+
+    @contextmanager
+    def guard(self, is_failure: Optional[Callable[[BaseException], bool]] = None):
+        """Wrap one provider call: reject it if open, then record how it went"""
+        self.before_call()
+        try:
+            yield
+        except DeadlineExceeded as e:
+            # Out of time mid-call is a provider timeout; before the call, a local shed
+            if e.in_flight:
+                self.record_failure(e)
+            else:
+                self.release()
+            raise
+        except CallRejected:
+            # Shed locally or throttled upstream: says nothing about provider health
+            self.release()
+            raise
+        except Exception as e:
+            if (is_failure or self.is_failure)(e):
+                self.record_failure(e)
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            self.release()
+            raise
+        else:
+            self.record_success()
+
+    def _count(self, failed: bool):
+        now = int(time.monotonic())
+        if not self._buckets or self._buckets[-1][0] != now:
+            self._buckets.append([now, 0, 0])
+        self._buckets[-1][2 if failed else 1] += 1
+        while self._buckets and self._buckets[0][0] <= now - self.window_seconds:
+            self._buckets.popleft()
+        return sum(b[1] for b in self._buckets), sum(b[2] for b in self._buckets)
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        logger.warning(f"{self.provider} circuit {self.state} -> {state}")
+        self.state = state
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+            self._probes_inflight = 0
+        elif state == CLOSED:
+            # Start the closed state from a clean window
+            self._buckets.clear()
+            self._probes_inflight = 0
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        window = [b for b in self._buckets if b[0] > int(now) - self.window_seconds]
+        successes = sum(b[1] for b in window)
+        failures = sum(b[2] for b in window)
+        total = successes + failures
+        return {
+            "state": self.state,
+            "failure_rate": round(failures / total, 3) if total else 0.0,
+            "window_calls": total,
+            "window_failures": failures,
+            "threshold": self.failure_rate,
+            "min_calls": self.min_calls,
+            "retry_in_seconds": round(max(self.opened_at + self.open_seconds - now, 0), 1) if self.state == OPEN else None,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "last_failure": self.last_failure,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(provider: str, **kwargs) -> CircuitBreaker:
+    """Return the process-wide breaker for a provider, configured from the environment"""
+    breaker = _breakers.get(provider)
+    if breaker is None:
+        prefix = f"CIRCUIT_{provider.upper()}_"
+        breaker = CircuitBreaker(
+            provider,
+            failure_rate=float(os.getenv(prefix + "FAILURE_RATE", "0.5")),
+            min_calls=int(os.getenv(prefix + "MIN_CALLS", "10")),
+            window_seconds=float(os.getenv(prefix + "WINDOW", "30")),
+            open_seconds=float(os.getenv(prefix + "OPEN_SECONDS", "30")),
+            probes=int(os.getenv(prefix + "PROBES", "1")),
+            **kwargs,
+        )
+        _breakers[provider] = breaker
+    return breaker
+
+
+def circuit_stats() -> Dict[str, Dict[str, Any]]:
+    return {provider: breaker.stats() for provider, breaker in _breakers.items()}
@@ -0,0 +1,226 @@
+"""
+Adaptive (gradient) concurrency limits for outbound provider calls.
+
+Each provider gets a limit on in-flight calls that moves with what the provider
+can take right now. After each successful call the limit is nudged towards
+limit * gradient + sqrt(limit), where gradient = tolerance * no-load latency /
+recent latency, clamped to [0.5, 1]. While latency stays within `tolerance` of
+the no-load latency the limit keeps growing; once calls start queueing upstream
+it shrinks. Failures and upstream 429s cut it by a multiplicative backoff.
+Configured from the environment:
+
+    CONCURRENCY_<PROVIDER>_INITIAL    starting limit
+    CONCURRENCY_<PROVIDER>_MIN        floor
+    CONCURRENCY_<PROVIDER>_MAX        ceiling
+    CONCURRENCY_<PROVIDER>_TOLERANCE  latency / no-load latency ratio still treated as healthy
+    CONCURRENCY_<PROVIDER>_MAX_WAIT   longest a call may wait for a slot, in seconds
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from core.circuit_breaker import error_status, is_provider_failure
+from core.deadline import DeadlineExceeded, remaining
+from core.errors import CallRejected
+from core.rate_limit import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMITS = {
+    "openai": {"initial": 8, "max": 64},
+    "amadeus": {"initial": 5, "max": 40},
+    "google_places": {"initial": 20, "max": 200},
+}
+
+
+class ConcurrencyLimitExceeded(CallRejected):
+    """Raised when no call slot frees up in time"""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(provider, f"{provider} concurrency limit reached", retry_after)
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        provider: str,
+        initial: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 100,
+        tolerance: float = 1.5,
+        backoff: float = 0.9,
+        min_latency_window: float = 30.0,
+        max_wait: float = 10.0,
+    ):
+        self.provider = provider
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.max_wait = max_wait
+        self.inflight = 0
+        self._waiters: "deque[asyncio.Future]" = deque()
+        self.min_latency_window = min_latency_window
+        # Recent latency (EWMA over roughly the last 10 calls) and the no-load
+        # latency: the lowest seen over the current and previous window
+        self.recent_latency: Optional[float] = None
+        self._window_min: Optional[float] = None
+        self._previous_window_min: Optional[float] = None
+        self._window_started = time.monotonic()
+        self._last_decrease = 0.0
+        self.increases = 0
+        self.decreases = 0
+        self.rejected = 0
+
+    async def acquire(self):
+        """Take an in-flight slot, waiting (bounded by max_wait and the request deadline) if none is free"""
+        if self.inflight < int(self.limit) and not self._waiters:
+            self.inflight += 1
+            return
+        left = remaining()
+        timeout = self.max_wait if left is None else min(self.max_wait, max(left, 0))
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # _wake() hands the slot over by resolving the future
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return
+            waiter.cancel()
+            self.rejected += 1
+            raise ConcurrencyLimitExceeded(self.provider, timeout or 1.0)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was already handed to us; pass it on
+                self.release()
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self):
+        self.inflight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.inflight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.inflight += 1
+                waiter.set_result(None)
+
+    @property
+    def min_latency(self) -> Optional[float]:
+        mins = [m for m in (self._window_min, self._previous_window_min) if m is not None]
+        return min(mins) if mins else None
+
+    def on_success(self, latency: float):
+        now = time.monotonic()
+        if now - self._window_started >= self.min_latency_window:
+            # Roll the window so the no-load latency can rise if the provider really got slower
+            self._previous_window_min, self._window_min = self._window_min, None
+            self._window_started = now
+        if self._window_min is None or latency < self._window_min:
+            self._window_min = latency
+        if self.recent_latency is None:
+            self.recent_latency = latency
+        else:
+            self.recent_latency += (latency - self.recent_latency) * 0.1
+
+        # Only move a limit that is actually being used
+        if self.inflight < self.limit / 2:
+            return
+        gradient = max(0.5, min(1.0, self.tolerance * self.min_latency / self.recent_latency))
+        target = self.limit * gradient + self.limit ** 0.5
+        previous = self.limit
+        self.limit = min(max(self.limit * 0.8 + target * 0.2, self.min_limit), self.max_limit)
+        if self.limit > previous:
+            self.increases += 1
+            self._wake()
+        elif self.limit < previous:
+            self.decreases += 1
+
+    def on_drop(self):
+        now = time.monotonic()
+        # At most one cut per round trip, so one failing burst is not punished many times over
+        if now - self._last_decrease < (self.recent_latency or 0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.limit * self.backoff, self.min_limit)
+        self.decreases += 1
+        logger.debug(f"{self.provider} concurrency limit lowered to {self.limit:.1f}")
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one in-flight slot for a provider call and feed its outcome back into the limit"""
+        await self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        except RateLimitExceeded:
+            # Raised inside the slot only for an upstream 429
+            self.on_drop()
+            raise
+        except DeadlineExceeded as e:
+            if e.in_flight:
+                self.on_drop()
+            raise
+        except CallRejected:
+            raise
+        except Exception as e:
+            if is_provider_failure(e) or error_status(e) == 429:
+                self.on_drop()
+            raise
+        else:
+            self.on_success(time.monotonic() - started)
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "limit_exact": round(self.limit, 2),
+            "min": self.min_limit,
+            "max": self.max_limit,
+            "inflight": self.inflight,
+            "waiting": len(self._waiters),
+            "recent_latency_ms": round(self.recent_latency * 1000, 1) if self.recent_latency is not None else None,
+            "min_latency_ms": round(self.min_latency * 1000, 1) if self.min_latency is not None else None,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "rejected": self.rejected,
+        }
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+
+
+def get_concurrency_limiter(provider: str) -> AdaptiveLimiter:
+    """Return the process-wide limiter for a provider, configured from the environment"""
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        defaults = DEFAULT_LIMITS.get(provider, {"initial": 10, "max": 100})
+        prefix = f"CONCURRENCY_{provider.upper()}_"
+        limiter = AdaptiveLimiter(
+            provider,
+            initial=int(os.getenv(prefix + "INITIAL", str(defaults["initial"]))),
+            min_limit=int(os.getenv(prefix + "MIN", "1")),
+            max_limit=int(os.getenv(prefix + "MAX", str(defaults["max"]))),
+            tolerance=float(os.getenv(prefix + "TOLERANCE", "1.5")),
+            max_wait=float(os.getenv(prefix + "MAX_WAIT", "10")),
+        )
+        _limiters[provider] = limiter
+    return limiter
+
+
+def concurrency_stats() -> Dict[str, Dict[str, Any]]:
+    return {provider: limiter.stats() for provider, limiter in _limiters.items()}
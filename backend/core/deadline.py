@@ -0,0 +1,108 @@
+"""
+Request deadlines and per-call timeouts for outbound provider calls.
+
+A composite route opens request_deadline(); the deadline is held in a context
+variable, so every integration call made while handling the request (including
+ones in worker threads started with asyncio.to_thread) sees it. Each outbound
+call waits at most min(OUTBOUND_TIMEOUT_SECONDS, time left). Outside a request
+deadline, calls are still capped at OUTBOUND_TIMEOUT_SECONDS.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Optional
+
+from core.errors import CallRejected
+
+logger = logging.getLogger(__name__)
+
+OUTBOUND_TIMEOUT_SECONDS = float(os.getenv("OUTBOUND_TIMEOUT_SECONDS", "30"))
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(CallRejected):
+    """
+    The request ran out of time before (or while) calling a provider. in_flight
+    is set when the call had already started, so the provider was slow to answer.
+    """
+
+    def __init__(self, provider: str, in_flight: bool = False):
+        super().__init__(provider, f"request deadline exceeded waiting for {provider}", 0.0)
+        self.in_flight = in_flight
+
+
+def remaining() -> Optional[float]:
+    """Seconds left on the current request's deadline, or None outside one"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def call_timeout(provider: str) -> float:
+    """Timeout for one outbound call; raises DeadlineExceeded if no time is left"""
+    left = remaining()
+    if left is None:
+        return OUTBOUND_TIMEOUT_SECONDS
+    if left <= 0:
+        raise DeadlineExceeded(provider)
+    return min(left, OUTBOUND_TIMEOUT_SECONDS)
+
+
+async def wait_bounded(provider: str, make_call: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Await make_call() for at most call_timeout(provider). Running out of request
+    time raises DeadlineExceeded; hitting the per-call cap raises TimeoutError.
+    """
+    timeout = call_timeout(provider)
+    try:
+        return await asyncio.wait_for(make_call(), timeout)
+    except asyncio.TimeoutError:
+        left = remaining()
+        if left is not None and left <= 0:
+            raise DeadlineExceeded(provider, in_flight=True) from None
+        raise
+
+
+async def run_blocking(provider: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking SDK call in a worker thread, bounded by call_timeout(provider)"""
+    return await wait_bounded(provider, lambda: asyncio.to_thread(func, *args, **kwargs))
+
+
+async def _cancel_on_disconnect(task: asyncio.Task, is_disconnected: Callable[[], Awaitable[bool]], poll_interval: float):
+    while not task.done():
+        await asyncio.sleep(poll_interval)
+        if await is_disconnected():
+            logger.info("Client disconnected; cancelling request work")
+            task.cancel()
+            return
+
+
+@asynccontextmanager
+async def request_deadline(
+    seconds: float,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    poll_interval: float = 0.5,
+):
+    """
+    Give the enclosed work `seconds` to finish. Integration calls inside get
+    timeouts from the remaining budget; the block itself raises TimeoutError
+    at the deadline, and is cancelled if is_disconnected() reports the client gone.
+    """
+    # Calls run out slightly before the hard deadline, so a fallback or a
+    # partial answer can still be assembled in time
+    reserve = min(0.2, seconds * 0.1)
+    token = _deadline.set(time.monotonic() + seconds - reserve)
+    watcher = None
+    if is_disconnected is not None:
+        watcher = asyncio.create_task(_cancel_on_disconnect(asyncio.current_task(), is_disconnected, poll_interval))
+    try:
+        async with asyncio.timeout(seconds):
+            yield
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+        _deadline.reset(token)
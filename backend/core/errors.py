@@ -0,0 +1,12 @@
+"""
+Errors shared by the outbound call guards (rate limits, circuit breakers).
+"""
+
+
+class CallRejected(Exception):
+    """An outbound call refused locally, without waiting on the provider"""
+
+    def __init__(self, provider: str, message: str, retry_after: float):
+        super().__init__(message)
+        self.provider = provider
+        self.retry_after = retry_after
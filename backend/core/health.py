@@ -0,0 +1,111 @@
+"""
+Cheap health checks: a cached MongoDB ping and connection-pool statistics.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Tracks connection pool usage from pymongo CMAP events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open_connections = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.checkout_failures = 0
+        self.pools_cleared = 0
+
+    def _add(self, attr: str, delta: int):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + delta)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add("pools_cleared", 1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add("open_connections", 1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add("open_connections", -1)
+
+    def connection_check_out_started(self, event):
+        self._add("waiting", 1)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        self._add("checked_out", -1)
+
+    def snapshot(self, max_pool_size: int) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_pool_size": max_pool_size,
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "waiting": self.waiting,
+                "checkout_failures": self.checkout_failures,
+                "pools_cleared": self.pools_cleared,
+                "utilisation": round(self.checked_out / max_pool_size, 3) if max_pool_size else None,
+            }
+
+
+class CachedPing:
+    """Runs the MongoDB ping command at most once per ttl_seconds"""
+
+    def __init__(self, client, ttl_seconds: float = 2.0, timeout_seconds: float = 2.0):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.timeout_seconds = timeout_seconds
+        self._lock = asyncio.Lock()
+        self._checked_at = 0.0
+        self._result: Optional[Dict[str, Any]] = None
+
+    async def check(self) -> Dict[str, Any]:
+        """Return {"ok", "latency_ms", "error", "checked_at"} from cache or a fresh ping"""
+        if self._result and time.monotonic() - self._checked_at < self.ttl_seconds:
+            return self._result
+        async with self._lock:
+            # Another caller may have refreshed the result while we waited
+            if self._result and time.monotonic() - self._checked_at < self.ttl_seconds:
+                return self._result
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(self.client.admin.command("ping"), timeout=self.timeout_seconds)
+                result = {"ok": True, "error": None}
+            except Exception as e:
+                logger.error(f"MongoDB ping failed: {e}")
+                result = {"ok": False, "error": str(e) or type(e).__name__}
+            result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            result["checked_at"] = time.time()
+            self._result = result
+            self._checked_at = time.monotonic()
+            return result
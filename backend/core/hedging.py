@@ -0,0 +1,142 @@
+"""
+Hedged requests for idempotent, tail-heavy provider calls.
+
+A HedgePolicy tracks the rolling latency of one operation. When enabled, a
+call that has not answered by the rolling p95 gets a second, identical
+attempt and the first successful answer wins. Each primary call earns
+`budget` hedge credits (e.g. 0.05), so hedges stay at or below that fraction
+of traffic even while the provider is slow across the board.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_MAX_CREDITS = 10.0
+
+
+class HedgePolicy:
+    def __init__(
+        self,
+        name: str,
+        enabled: bool = False,
+        budget: float = 0.05,
+        percentile: float = 0.95,
+        min_delay: float = 0.05,
+        max_delay: float = 2.0,
+        window: int = 500,
+        min_samples: int = 50,
+    ):
+        self.name = name
+        self.enabled = enabled
+        self.budget = budget
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self._latencies: "deque[float]" = deque(maxlen=window)
+        self._delay: Optional[float] = None
+        self._samples_since_sort = 0
+        self._credits = 0.0
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_exhausted = 0
+
+    def observe(self, seconds: float):
+        self._latencies.append(seconds)
+        self._samples_since_sort += 1
+
+    def delay(self) -> Optional[float]:
+        """Rolling percentile latency, clamped; None until there are enough samples"""
+        if len(self._latencies) < self.min_samples:
+            return None
+        # Re-sorting a few hundred floats is cheap, but there is no need to do it per call
+        if self._delay is None or self._samples_since_sort >= 20:
+            ordered = sorted(self._latencies)
+            value = ordered[min(int(len(ordered) * self.percentile), len(ordered) - 1)]
+            self._delay = min(max(value, self.min_delay), self.max_delay)
+            self._samples_since_sort = 0
+        return self._delay
+
+    def _start(self, attempt: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        started = time.monotonic()
+        task = asyncio.ensure_future(attempt())
+
+        def finished(t: asyncio.Task):
+            if t.cancelled():
+                return
+            # Retrieve the exception so a losing attempt's failure is not reported as lost
+            if t.exception() is None:
+                self.observe(time.monotonic() - started)
+
+        task.add_done_callback(finished)
+        return task
+
+    async def run(self, attempt: Callable[[], Awaitable[Any]]) -> Any:
+        """Run attempt(), hedging with a second call if it is slower than the rolling p95"""
+        self.calls += 1
+        self._credits = min(self._credits + self.budget, _MAX_CREDITS)
+        primary = self._start(attempt)
+        delay = self.delay() if self.enabled else None
+        if delay is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+        if self._credits < 1:
+            self.budget_exhausted += 1
+            return await primary
+
+        self._credits -= 1
+        self.hedges += 1
+        hedge = self._start(attempt)
+        pending = {primary, hedge}
+        first_error: Optional[BaseException] = None
+        # The losing attempt is left to finish on its own: the SDK call runs in a
+        # worker thread and cannot be interrupted, and its latency still counts
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        self.hedge_wins += 1
+                    return task.result()
+                if task is primary or first_error is None:
+                    first_error = task.exception()
+        raise first_error
+
+    def stats(self) -> Dict[str, Any]:
+        delay = self.delay()
+        return {
+            "enabled": self.enabled,
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "budget_exhausted": self.budget_exhausted,
+            "hedge_rate": round(self.hedges / self.calls, 4) if self.calls else 0.0,
+            "budget": self.budget,
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+            "samples": len(self._latencies),
+        }
+
+
+_policies: Dict[str, HedgePolicy] = {}
+
+
+def get_hedge_policy(name: str, **kwargs) -> HedgePolicy:
+    """Return the process-wide hedge policy for an operation, creating it on first use"""
+    policy = _policies.get(name)
+    if policy is None:
+        policy = HedgePolicy(name, **kwargs)
+        _policies[name] = policy
+    return policy
+
+
+def hedge_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: policy.stats() for name, policy in _policies.items()}
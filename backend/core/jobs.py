@@ -0,0 +1,316 @@
+"""
+Background job runner for long-running trip planning requests.
+Jobs are stored in MongoDB so any worker can report progress and results.
+
+A running job holds a lease that its worker renews while it runs. If the
+process dies mid-job (OOM, SIGKILL, a deploy past the grace period) the
+lease runs out and the next JobManager.start() claims the job again, up to
+max_attempts times before it is marked failed.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+# Job states
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+TERMINAL_STATES = (JOB_COMPLETED, JOB_FAILED)
+
+# Internal fields kept out of job snapshots
+_PROJECTION = {"_id": 0, "lease_token": 0}
+
+ProgressCallback = Callable[[str, Any], Awaitable[None]]
+JobRunner = Callable[[Dict[str, Any], ProgressCallback], Awaitable[Dict[str, Any]]]
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are waiting for a worker"""
+
+
+def request_hash(payload: Dict[str, Any]) -> str:
+    """Stable hash of a job payload used for de-duplication"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class JobManager:
+    def __init__(
+        self,
+        collection,
+        runner: JobRunner,
+        concurrency: int = 4,
+        max_pending: int = 100,
+        dedupe_window_seconds: int = 600,
+        retention_seconds: int = 7 * 24 * 3600,
+        lease_seconds: int = 60,
+        max_attempts: int = 3,
+    ):
+        self.collection = collection
+        self.runner = runner
+        self.concurrency = max(1, concurrency)
+        self.dedupe_window = timedelta(seconds=dedupe_window_seconds)
+        self.retention_seconds = retention_seconds
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max(1, max_attempts)
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._workers = []
+        # One event per local watcher, so a watcher clearing its own event
+        # never swallows another's wake-up
+        self._updates: Dict[str, Set[asyncio.Event]] = {}
+
+    async def ensure_indexes(self):
+        """Create the indexes used for lookup, de-duplication and expiry"""
+        await self.collection.create_index("id", unique=True)
+        # active_hash only exists while a job is pending/running, so the
+        # unique sparse index blocks duplicate in-flight jobs atomically
+        await self.collection.create_index("active_hash", unique=True, sparse=True)
+        await self.collection.create_index([("request_hash", ASCENDING), ("finished_at", DESCENDING)])
+        await self.collection.create_index("finished_at", expireAfterSeconds=self.retention_seconds)
+
+    def _claimable(self, now: datetime) -> Dict[str, Any]:
+        """Pending jobs, and running jobs whose worker stopped renewing the lease"""
+        return {
+            "$or": [
+                {"status": JOB_PENDING},
+                {"status": JOB_RUNNING, "lease_expires_at": {"$lt": now}},
+                # Claimed before leases existed
+                {"status": JOB_RUNNING, "lease_expires_at": {"$exists": False}, "updated_at": {"$lt": now - self.lease}},
+            ]
+        }
+
+    async def start(self):
+        """Create indexes, start the worker pool and re-queue orphaned pending and expired running jobs"""
+        await self.ensure_indexes()
+        self._start_workers()
+        async for job in self.collection.find(self._claimable(datetime.utcnow()), {"id": 1}):
+            try:
+                self._queue.put_nowait(job["id"])
+            except asyncio.QueueFull:
+                logger.warning("Job queue full while recovering jobs")
+                break
+
+    async def stop(self):
+        """Cancel the worker pool; unfinished jobs stay pending for recovery"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def _start_workers(self):
+        if self._workers:
+            return
+        for index in range(self.concurrency):
+            self._workers.append(asyncio.create_task(self._worker(index)))
+
+    async def submit(self, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Submit a job. Returns (job, created) where created is False when an
+        identical in-flight or recently finished job was returned instead.
+        """
+        digest = request_hash(payload)
+
+        existing = await self._find_duplicate(digest)
+        if existing:
+            return existing, False
+
+        if self._queue.full():
+            raise JobQueueFull("Too many planning jobs are waiting, try again shortly")
+
+        now = datetime.utcnow()
+        job = {
+            "id": str(uuid.uuid4()),
+            "request_hash": digest,
+            "active_hash": digest,
+            "status": JOB_PENDING,
+            "request": payload,
+            "progress": {"stage": "queued", "completed_steps": 0},
+            "partial": {},
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        try:
+            await self.collection.insert_one(job)
+        except DuplicateKeyError:
+            # Lost the race against an identical submission
+            existing = await self._find_duplicate(digest)
+            if existing:
+                return existing, False
+            raise
+
+        self._start_workers()
+        try:
+            self._queue.put_nowait(job["id"])
+        except asyncio.QueueFull:
+            # Concurrent submits filled the queue while we were inserting;
+            # drop the job rather than leave it pending with active_hash set
+            await self.collection.delete_one({"id": job["id"], "status": JOB_PENDING})
+            raise JobQueueFull("Too many planning jobs are waiting, try again shortly")
+        job.pop("_id", None)
+        return job, True
+
+    async def _find_duplicate(self, digest: str) -> Optional[Dict[str, Any]]:
+        active = await self.collection.find_one({"active_hash": digest}, _PROJECTION)
+        if active:
+            return active
+        return await self.collection.find_one(
+            {
+                "request_hash": digest,
+                "status": JOB_COMPLETED,
+                "finished_at": {"$gte": datetime.utcnow() - self.dedupe_window},
+            },
+            _PROJECTION,
+            sort=[("finished_at", DESCENDING)],
+        )
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a job by id"""
+        return await self.collection.find_one({"id": job_id}, _PROJECTION)
+
+    async def watch(self, job_id: str, poll_interval: float = 2.0) -> AsyncIterator[Dict[str, Any]]:
+        """Yield job snapshots whenever the job changes until it finishes"""
+        last_update = None
+        # Local updates wake us immediately; jobs running on another
+        # worker process are picked up by polling
+        event = asyncio.Event()
+        self._updates.setdefault(job_id, set()).add(event)
+        try:
+            while True:
+                job = await self.get(job_id)
+                if job is None:
+                    return
+                if job["updated_at"] != last_update:
+                    last_update = job["updated_at"]
+                    yield job
+                if job["status"] in TERMINAL_STATES:
+                    return
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                event.clear()
+        finally:
+            watchers = self._updates.get(job_id)
+            if watchers is not None:
+                watchers.discard(event)
+                if not watchers:
+                    del self._updates[job_id]
+
+    async def _worker(self, index: int):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker {index} failed on job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        # Claim the job so it only runs once across worker processes; the
+        # lease token keeps a worker that lost its lease from writing results
+        now = datetime.utcnow()
+        lease_token = uuid.uuid4().hex
+        job = await self.collection.find_one_and_update(
+            {"id": job_id, **self._claimable(now)},
+            {
+                "$set": {
+                    "status": JOB_RUNNING,
+                    "started_at": now,
+                    "updated_at": now,
+                    "lease_token": lease_token,
+                    "lease_expires_at": now + self.lease,
+                },
+                "$inc": {"attempts": 1},
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+        if job is None:
+            return
+        owned = {"id": job_id, "lease_token": lease_token}
+        if job["attempts"] > self.max_attempts:
+            logger.error(f"Job {job_id} abandoned after {job['attempts'] - 1} interrupted attempts")
+            await self._finish(owned, {"status": JOB_FAILED, "error": "Job was interrupted too many times"})
+            return
+        self._notify(job_id)
+
+        completed_steps = 0
+
+        async def progress(stage: str, data: Any = None, total_steps: Optional[int] = None):
+            nonlocal completed_steps
+            completed_steps += 1
+            update = {
+                "progress.stage": stage,
+                "progress.completed_steps": completed_steps,
+                "updated_at": datetime.utcnow(),
+            }
+            if total_steps is not None:
+                update["progress.total_steps"] = total_steps
+            if data is not None:
+                update[f"partial.{stage}"] = data
+            await self.collection.update_one(owned, {"$set": update})
+            self._notify(job_id)
+
+        heartbeat = asyncio.create_task(self._renew_lease(owned))
+        try:
+            result = await self.runner(job["request"], progress)
+            update = {"status": JOB_COMPLETED, "result": result, "partial": {}, "progress.stage": "done"}
+            logger.info(f"Job {job_id} completed")
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back so it is recovered on restart
+            await self.collection.update_one(
+                owned,
+                {
+                    "$set": {"status": JOB_PENDING, "updated_at": datetime.utcnow()},
+                    "$unset": {"lease_token": "", "lease_expires_at": ""},
+                    "$inc": {"attempts": -1},
+                },
+            )
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            update = {"status": JOB_FAILED, "error": str(e)}
+        finally:
+            heartbeat.cancel()
+
+        await self._finish(owned, update)
+
+    async def _finish(self, owned: Dict[str, Any], update: Dict[str, Any]):
+        now = datetime.utcnow()
+        update.update({"finished_at": now, "updated_at": now})
+        result = await self.collection.update_one(
+            owned, {"$set": update, "$unset": {"active_hash": "", "lease_token": "", "lease_expires_at": ""}}
+        )
+        if result.modified_count == 0:
+            logger.warning(f"Job {owned['id']} lease was lost before it finished; result discarded")
+        self._notify(owned["id"])
+
+    async def _renew_lease(self, owned: Dict[str, Any]):
+        while True:
+            await asyncio.sleep(self.lease.total_seconds() / 3)
+            try:
+                await self.collection.update_one(
+                    owned, {"$set": {"lease_expires_at": datetime.utcnow() + self.lease}}
+                )
+            except Exception as e:
+                logger.warning(f"Renewing the lease on job {owned['id']} failed: {e}")
+
+    def _notify(self, job_id: str):
+        for event in self._updates.get(job_id, ()):
+            event.set()
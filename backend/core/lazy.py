@@ -0,0 +1,103 @@
+"""
+Lazily constructed integration singletons.
+
+Each integration module exposes a LazyIntegration under its usual name. The
+real client is built on first attribute access, so importing server.py never
+fails because one provider is misconfigured; only calls to that provider do.
+status() never builds anything: health checks report the built/failed state,
+or for an integration not used yet, whether its required settings are present.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from core.startup import startup_profile
+
+logger = logging.getLogger(__name__)
+
+
+class IntegrationUnavailable(Exception):
+    """Raised when an integration cannot be constructed (e.g. missing API key)"""
+
+    def __init__(self, name: str, reason: str):
+        super().__init__(f"{name} integration is unavailable: {reason}")
+        self.name = name
+        self.reason = reason
+
+
+_registry: Dict[str, "LazyIntegration"] = {}
+
+
+class LazyIntegration:
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        retry_after_seconds: float = 30.0,
+        required_env: Sequence[str] = (),
+    ):
+        # Stored through __dict__ because __getattr__ forwards everything else
+        self.__dict__.update(
+            name=name,
+            factory=factory,
+            required_env=tuple(required_env),
+            retry_after_seconds=retry_after_seconds,
+            _instance=None,
+            _error=None,
+            _failed_at=0.0,
+            _lock=threading.Lock(),
+        )
+        _registry[name] = self
+
+    def get(self) -> Any:
+        """Return the integration, constructing it on first use"""
+        instance = self._instance
+        if instance is not None:
+            return instance
+        with self._lock:
+            if self._instance is not None:
+                return self._instance
+            # Don't retry a failed construction on every request
+            if self._error and time.monotonic() - self._failed_at < self.retry_after_seconds:
+                raise IntegrationUnavailable(self.name, self._error)
+            try:
+                # Construction includes the provider SDK import
+                with startup_profile.phase(f"integration:{self.name}"):
+                    self.__dict__["_instance"] = self.factory()
+                self.__dict__["_error"] = None
+                logger.info(f"{self.name} integration initialized")
+            except Exception as e:
+                self.__dict__["_error"] = str(e) or type(e).__name__
+                self.__dict__["_failed_at"] = time.monotonic()
+                logger.error(f"{self.name} integration failed to initialize: {e}")
+                raise IntegrationUnavailable(self.name, self._error)
+            return self._instance
+
+    def status(self) -> Dict[str, Any]:
+        """Availability for health checks, without constructing the integration"""
+        if self._instance is not None:
+            return {"available": True, "initialized": True, "error": None}
+        if self._error:
+            return {"available": False, "initialized": False, "error": self._error}
+        missing = [name for name in self.required_env if not os.getenv(name)]
+        if missing:
+            return {"available": False, "initialized": False, "error": f"{', '.join(missing)} not set"}
+        return {"available": True, "initialized": False, "error": None}
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.get(), attr)
+
+    def __setattr__(self, attr: str, value: Any):
+        setattr(self.get(), attr, value)
+
+
+def get_integration(name: str) -> Optional[LazyIntegration]:
+    return _registry.get(name)
+
+
+def integration_status() -> Dict[str, Dict[str, Any]]:
+    """Availability of every integration imported so far"""
+    return {name: integration.status() for name, integration in _registry.items()}
@@ -0,0 +1,111 @@
+"""
+Token usage and estimated cost of LLM completions.
+
+Every completion reports its prompt/completion token counts (from the
+response's `usage`), latency and max_tokens budget here. They are recorded
+per route template and model as metrics (llm_tokens_total,
+llm_cost_usd_total, llm_completion_tokens, llm_request_duration_seconds)
+and kept as running totals for /api/debug/llm-usage.
+
+Cost is estimated from PRICES (USD per 1K tokens, prompt then completion),
+matched on the longest model-name prefix so dated snapshots such as
+gpt-4-0613 price as gpt-4. Set LLM_PRICES to a JSON object such as
+{"gpt-4": [0.03, 0.06]} to add or override entries.
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+from core.metrics import Counter, Histogram, current_route
+
+logger = logging.getLogger(__name__)
+
+PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-32k": (0.06, 0.12),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.005, 0.015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+}
+PRICES.update({model: tuple(price) for model, price in json.loads(os.getenv("LLM_PRICES", "{}")).items()})
+
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens used", ("route", "model", "kind"))
+LLM_COST = Counter("llm_cost_usd_total", "Estimated LLM spend in USD", ("route", "model"))
+LLM_COMPLETION_TOKENS = Histogram(
+    "llm_completion_tokens",
+    "Completion tokens per call, to compare against max_tokens",
+    ("route", "model"),
+    buckets=(50, 100, 250, 500, 750, 1000, 1500, 2000, 4000),
+)
+LLM_LATENCY = Histogram("llm_request_duration_seconds", "LLM completion latency", ("route", "model"))
+
+_totals: Dict[Tuple[str, str], Dict[str, float]] = {}
+_unpriced = set()
+
+
+def price(model: str) -> Optional[Tuple[float, float]]:
+    matches = [name for name in PRICES if model == name or model.startswith(name + "-")]
+    return PRICES[max(matches, key=len)] if matches else None
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    rates = price(model)
+    if rates is None:
+        if model not in _unpriced:
+            _unpriced.add(model)
+            logger.warning(f"No LLM price for model {model}; its cost is counted as 0")
+        return 0.0
+    return (prompt_tokens * rates[0] + completion_tokens * rates[1]) / 1000
+
+
+def record_usage(model: str, usage, seconds: float, max_tokens: Optional[int] = None) -> Dict[str, float]:
+    """Record one completion's `usage` (prompt_tokens/completion_tokens) against the current route"""
+    route = current_route()
+    prompt = getattr(usage, "prompt_tokens", 0) or 0
+    completion = getattr(usage, "completion_tokens", 0) or 0
+    cost = estimate_cost(model, prompt, completion)
+
+    LLM_TOKENS.labels(route, model, "prompt").inc(prompt)
+    LLM_TOKENS.labels(route, model, "completion").inc(completion)
+    LLM_COST.labels(route, model).inc(cost)
+    LLM_COMPLETION_TOKENS.labels(route, model).observe(completion)
+    LLM_LATENCY.labels(route, model).observe(seconds)
+
+    totals = _totals.get((route, model))
+    if totals is None:
+        totals = _totals[(route, model)] = {
+            "calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "max_completion_tokens": 0,
+            "cost_usd": 0.0, "seconds": 0.0, "max_tokens_budget": 0,
+        }
+    totals["calls"] += 1
+    totals["prompt_tokens"] += prompt
+    totals["completion_tokens"] += completion
+    totals["max_completion_tokens"] = max(totals["max_completion_tokens"], completion)
+    totals["cost_usd"] += cost
+    totals["seconds"] += seconds
+    totals["max_tokens_budget"] += max_tokens or 0
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "cost_usd": cost}
+
+
+def llm_usage_stats() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Running totals per route and model, with per-call averages"""
+    report: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for (route, model), totals in sorted(_totals.items()):
+        calls = totals["calls"]
+        report.setdefault(route, {})[model] = {
+            "calls": calls,
+            "prompt_tokens": totals["prompt_tokens"],
+            "completion_tokens": totals["completion_tokens"],
+            "avg_prompt_tokens": round(totals["prompt_tokens"] / calls, 1),
+            "avg_completion_tokens": round(totals["completion_tokens"] / calls, 1),
+            "max_completion_tokens": totals["max_completion_tokens"],
+            # Share of the max_tokens budget the completions actually used
+            "max_tokens_used_ratio": round(totals["completion_tokens"] / totals["max_tokens_budget"], 3) if totals["max_tokens_budget"] else None,
+            "cost_usd": round(totals["cost_usd"], 4),
+            "avg_cost_usd": round(totals["cost_usd"] / calls, 5),
+            "avg_latency_ms": round(totals["seconds"] / calls * 1000, 1),
+        }
+    return report
@@ -0,0 +1,177 @@
+"""
+Event loop lag monitor.
+
+A task on the loop sleeps LOOP_LAG_INTERVAL_MS at a time and records how
+late it wakes up (event_loop_lag_seconds). Lag means something ran on the
+loop thread without yielding: typically a blocking SDK or `requests` call
+made from an `async def` instead of through asyncio.to_thread.
+
+Measuring after the fact can't say what blocked, so a watchdog thread also
+checks the task's heartbeat. When the loop has been stuck for more than
+LOOP_LAG_THRESHOLD_MS it captures the loop thread's stack while the blocking
+call is still on it, works out the route (from the ASGI scope held by the
+middleware frames) and the integration module in the stack, logs all three
+and counts the stall in event_loop_stalls_total. Recent stalls are kept for
+/api/debug/loop-lag. Set LOOP_LAG_MONITOR=0 to turn it off.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from core.metrics import Counter, Gauge, Histogram, route_template
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_MONITOR = os.getenv("LOOP_LAG_MONITOR", "1") != "0"
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
+LOOP_LAG_THRESHOLD_MS = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "200"))
+
+LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a timer that was due",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_LAG_MAX = Gauge("event_loop_lag_max_seconds", "Largest event loop lag seen by this worker")
+LOOP_STALLS = Counter(
+    "event_loop_stalls_total", "Times the event loop was blocked past the threshold", ("route", "integration")
+)
+
+INTEGRATION_PACKAGE = "external_integrations."
+
+
+def _loop_frames(frame) -> List[Any]:
+    """Frames on the loop thread, outermost first, starting at the running callback"""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    # Drop the event loop machinery above the callback (Handle._run)
+    for index in range(len(frames) - 1, -1, -1):
+        code = frames[index].f_code
+        if code.co_name == "_run" and frames[index].f_globals.get("__name__") == "asyncio.events":
+            return frames[index + 1:]
+    return frames
+
+
+def _format_frames(frames: List[Any]) -> List[str]:
+    return [f"{f.f_code.co_filename}:{f.f_lineno} in {f.f_code.co_name}" for f in frames]
+
+
+def _integration(frames: List[Any]) -> str:
+    """The innermost integration module on the stack, e.g. foursquare_integration.search_venues"""
+    for frame in reversed(frames):
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith(INTEGRATION_PACKAGE):
+            return f"{module[len(INTEGRATION_PACKAGE):]}.{frame.f_code.co_name}"
+    return "none"
+
+
+def _route(frames: List[Any]) -> str:
+    """Route of the request being served, from the innermost ASGI scope on the stack"""
+    for frame in reversed(frames):
+        # Only frames whose code has a `scope` variable; f_locals on the rest is wasted work
+        if "scope" not in frame.f_code.co_varnames:
+            continue
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") == "http":
+            return route_template(scope)
+    return "none"
+
+
+class LoopMonitor:
+    def __init__(self, interval: float, threshold: float, keep: int = 50):
+        self.interval = interval
+        self.threshold = threshold
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self.max_lag = 0.0
+        self._heartbeat = 0.0
+        self._stall: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._measure())
+        self._watchdog = threading.Thread(
+            target=self._watch, args=(threading.get_ident(),), name="loop-lag-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._watchdog.join(timeout=1)
+        self._task = self._watchdog = None
+
+    async def _measure(self):
+        lag_metric = LOOP_LAG.labels()
+        while True:
+            due = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - due, 0.0)
+            self._heartbeat = now
+            lag_metric.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+            LOOP_LAG_MAX.labels().set(self.max_lag)
+            stall, self._stall = self._stall, None
+            if stall is not None:
+                stall["lag_ms"] = round(lag * 1000, 1)
+                logger.warning(f"Event loop resumed after {stall['lag_ms']:.0f}ms (route {stall['route']}, integration {stall['integration']})")
+
+    def _watch(self, loop_thread: int):
+        check_every = min(self.threshold / 2, self.interval)
+        while not self._stopped.wait(check_every):
+            beat = self._heartbeat
+            blocked = time.monotonic() - beat - self.interval
+            # One capture per stall; the next heartbeat clears it
+            if blocked < self.threshold or self._stall is not None:
+                continue
+            frame = sys._current_frames().get(loop_thread)
+            if frame is None:
+                continue
+            frames = _loop_frames(frame)
+            stall = {
+                "at": datetime.utcnow().isoformat(),
+                "blocked_ms": round(blocked * 1000, 1),
+                "route": _route(frames),
+                "integration": _integration(frames),
+                "stack": _format_frames(frames),
+            }
+            self._stall = stall
+            self.recent.appendleft(stall)
+            LOOP_STALLS.labels(stall["route"], stall["integration"]).inc()
+            logger.warning(
+                f"Event loop blocked for {stall['blocked_ms']:.0f}ms in route {stall['route']} "
+                f"(integration {stall['integration']}):\n  " + "\n  ".join(stall["stack"])
+            )
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "enabled": self._task is not None,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "recent_stalls": list(self.recent),
+        }
+
+
+loop_monitor = LoopMonitor(LOOP_LAG_INTERVAL_MS / 1000, LOOP_LAG_THRESHOLD_MS / 1000)
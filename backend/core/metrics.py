@@ -0,0 +1,246 @@
+"""
+Prometheus text-format metrics without a client library.
+
+Metrics are recorded on the event loop thread, so plain attribute updates are
+safe without locks. Labelled children are created once per label set and can
+be bound ahead of time (e.g. `child = HISTOGRAM.labels("google_places", "geocode")`)
+so recording a value is an index lookup and an add. State that already lives
+elsewhere (cache counters, limiter state) is read at scrape time by collectors
+registered with register_collector().
+
+Integrations calling from worker threads rely on the GIL instead of a lock;
+an increment lost to a thread switch is an accepted cost. Each worker process
+keeps its own registry, so with several workers scrape each one (process_info
+carries the pid to tell them apart).
+"""
+
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Latency buckets (seconds) covering cache hits through slow LLM completions
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        _registry.append(self)
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def _samples(self):
+        for values, child in self._children.items():
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1):
+        self.labels().dec(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _samples(self):
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float("inf"),), child.counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), values + (_format_value(bound),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {child.sum!r}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+_registry: List[_Metric] = []
+_collectors: List[Callable[[], Iterable[tuple]]] = []
+
+
+def register_collector(collect: Callable[[], Iterable[tuple]]):
+    """
+    Register a scrape-time collector. It yields (name, kind, help, labelnames, samples)
+    tuples where samples maps label value tuples to numbers.
+    """
+    _collectors.append(collect)
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        for name, kind, documentation, labelnames, samples in collect():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for values, value in samples.items():
+                lines.append(f"{name}{_format_labels(labelnames, values)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# HTTP server metrics, recorded by MetricsMiddleware
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route, method and status", ("route", "method", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by route", ("route", "method"))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+
+PROCESS_INFO = Gauge("process_info", "Worker process serving this scrape", ("pid",))
+PROCESS_INFO.labels(str(os.getpid())).set(1)
+
+
+def route_template(scope: Dict[str, Any]) -> str:
+    # Route templates keep label cardinality bounded; unmatched paths share one label
+    return getattr(scope.get("route"), "path", None) or "unmatched"
+
+
+# Scope of the request being served, so code deeper down can label by route
+_request_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar("request_scope", default=None)
+# Label for work done outside an HTTP request, e.g. a background job run
+_route_label: ContextVar[Optional[str]] = ContextVar("route_label", default=None)
+
+
+def current_route() -> str:
+    """Route template of the current request, the route_scope() label, or "none" outside both"""
+    label = _route_label.get()
+    if label is not None:
+        return label
+    scope = _request_scope.get()
+    return route_template(scope) if scope is not None else "none"
+
+
+@contextmanager
+def route_scope(label: str):
+    """Label metrics recorded in the enclosed block with `label` instead of a request route"""
+    token = _route_label.set(label)
+    try:
+        yield
+    finally:
+        _route_label.reset(token)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request, labelled by route template"""
+
+    def __init__(self, app, skip_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = HTTP_IN_FLIGHT.labels()
+        in_flight.inc()
+        token = _request_scope.set(scope)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_scope.reset(token)
+            in_flight.dec()
+            template = route_template(scope)
+            method = scope["method"]
+            HTTP_LATENCY.labels(template, method).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(template, method, str(status)).inc()
@@ -0,0 +1,110 @@
+"""
+Instrumentation for outbound provider calls.
+
+Every integration wraps its provider call in outbound_call(provider, operation),
+which records latency, outcome and in-flight counts in core.metrics, counts
+the call against the current Server-Timing stage and opens a client span
+(core.tracing). Outcomes
+are "ok", "error" (the provider or transport failed), "timeout" (per-call cap
+or request deadline) and "rejected" (shed locally by a rate limiter, circuit
+breaker or concurrency limit). The state of those guards is exported at scrape time.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+from core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, circuit_stats
+from core.concurrency import concurrency_stats
+from core.deadline import DeadlineExceeded
+from core.errors import CallRejected
+from core.hedging import hedge_stats
+from core.metrics import Counter, Gauge, Histogram, register_collector
+from core.rate_limit import rate_limiter_stats
+from core.server_timing import note_upstream_call
+from core.tracing import CLIENT, span
+
+OUTBOUND_LATENCY = Histogram(
+    "outbound_request_duration_seconds", "Outbound provider call latency", ("provider", "operation")
+)
+OUTBOUND_REQUESTS = Counter(
+    "outbound_requests_total", "Outbound provider calls by outcome", ("provider", "operation", "outcome")
+)
+OUTBOUND_IN_FLIGHT = Gauge("outbound_requests_in_flight", "Outbound provider calls in progress", ("provider",))
+
+OUTCOMES = ("ok", "error", "timeout", "rejected")
+
+
+class _CallMetrics:
+    """Pre-bound metric children for one (provider, operation)"""
+
+    __slots__ = ("latency", "outcomes", "in_flight")
+
+    def __init__(self, provider: str, operation: str):
+        self.latency = OUTBOUND_LATENCY.labels(provider, operation)
+        self.outcomes = {outcome: OUTBOUND_REQUESTS.labels(provider, operation, outcome) for outcome in OUTCOMES}
+        self.in_flight = OUTBOUND_IN_FLIGHT.labels(provider)
+
+
+_bound: Dict[Tuple[str, str], _CallMetrics] = {}
+
+
+def _outcome(error: BaseException) -> str:
+    if isinstance(error, (DeadlineExceeded, asyncio.TimeoutError)):
+        return "timeout"
+    if isinstance(error, CallRejected):
+        return "rejected"
+    return "error"
+
+
+@contextmanager
+def outbound_call(provider: str, operation: str):
+    """Record one outbound call (usable around sync or async code)"""
+    metrics = _bound.get((provider, operation))
+    if metrics is None:
+        metrics = _bound[(provider, operation)] = _CallMetrics(provider, operation)
+    metrics.in_flight.value += 1
+    note_upstream_call()
+    started = time.perf_counter()
+    outcome = "ok"
+    with span(f"{provider}.{operation}", CLIENT, provider=provider, operation=operation) as call_span:
+        try:
+            yield
+        except Exception as e:
+            outcome = _outcome(e)
+            raise
+        except BaseException:
+            # Cancelled (client gone): neither a latency sample nor an outcome
+            outcome = None
+            raise
+        finally:
+            metrics.in_flight.value -= 1
+            if outcome is not None:
+                metrics.latency.observe(time.perf_counter() - started)
+                metrics.outcomes[outcome].value += 1
+            if call_span is not None:
+                call_span.attributes["outcome"] = outcome or "cancelled"
+
+
+_CIRCUIT_STATES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def _collect_guard_metrics():
+    limits = concurrency_stats()
+    yield ("outbound_concurrency_limit", "gauge", "Current adaptive in-flight limit", ("provider",), {(p,): s["limit_exact"] for p, s in limits.items()})
+    yield ("outbound_concurrency_waiting", "gauge", "Calls waiting for a concurrency slot", ("provider",), {(p,): s["waiting"] for p, s in limits.items()})
+    circuits = circuit_stats()
+    yield ("circuit_state", "gauge", "Circuit state (0 closed, 1 half-open, 2 open)", ("provider",), {(p,): _CIRCUIT_STATES[s["state"]] for p, s in circuits.items()})
+    yield ("circuit_opened_total", "counter", "Times the circuit opened", ("provider",), {(p,): s["times_opened"] for p, s in circuits.items()})
+    buckets = rate_limiter_stats()
+    yield ("rate_limit_shed_total", "counter", "Calls shed instead of waiting for a rate-limit token", ("provider",), {(p,): s["shed"] for p, s in buckets.items()})
+    yield ("rate_limit_queued_total", "counter", "Calls that waited for a rate-limit token", ("provider",), {(p,): s["queued"] for p, s in buckets.items()})
+    yield ("rate_limit_queue_seconds_total", "counter", "Time spent waiting for rate-limit tokens", ("provider",), {(p,): s["total_queue_seconds"] for p, s in buckets.items()})
+    yield ("rate_limit_upstream_throttled_total", "counter", "Upstream 429 answers", ("provider",), {(p,): s["upstream_429"] for p, s in buckets.items()})
+    hedges = hedge_stats()
+    yield ("hedged_requests_total", "counter", "Hedge attempts started", ("operation",), {(o,): s["hedges"] for o, s in hedges.items()})
+    yield ("hedged_request_wins_total", "counter", "Hedge attempts that answered first", ("operation",), {(o,): s["hedge_wins"] for o, s in hedges.items()})
+
+
+register_collector(_collect_guard_metrics)
@@ -0,0 +1,201 @@
+"""
+On-demand profiling of single requests.
+
+A request carrying `X-Debug-Profile: sample` (or `cprofile`) together with a
+valid `X-Admin-Token` is profiled and the result is kept in memory under a
+generated id, returned in the `X-Profile-Id` response header:
+
+    sample    a sampling profiler thread records the stacks of the event loop
+              thread and of busy executor threads (where asyncio.to_thread
+              runs the provider SDKs) every PROFILE_SAMPLE_INTERVAL_MS.
+              Stored as folded stacks, ready for flamegraph.pl or speedscope.
+    cprofile  deterministic cProfile of the event loop thread. Stored as
+              pstats data (snakeviz, flameprof, `python -m pstats`).
+
+Both see every coroutine that runs on the loop while the request is in
+flight, not only this request's, so profile an otherwise quiet worker where
+possible. One request is profiled at a time per worker; others carrying the
+header meanwhile get `X-Profile-Id: busy`. Requests without the header only
+pay for a scan of the header list.
+"""
+
+import cProfile
+import hmac
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+PROFILE_HEADER = b"x-debug-profile"
+ADMIN_HEADER = b"x-admin-token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+MODES = ("sample", "cprofile")
+
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "50"))
+# Executor workers waiting for work sit in this frame; their samples are noise
+_IDLE_WORKER = ("concurrent.futures.thread", "_worker")
+
+
+def _frame_label(frame) -> str:
+    # ';' separates frames in the folded format
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}".replace(";", ":")
+
+
+class StackSampler(threading.Thread):
+    """Counts folded stacks of the loop thread and busy executor threads until stopped"""
+
+    def __init__(self, loop_thread: int, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.loop_thread = loop_thread
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                name = names.get(ident, str(ident))
+                if ident != self.loop_thread and not name.startswith("asyncio"):
+                    continue
+                if (frame.f_globals.get("__name__"), frame.f_code.co_name) == _IDLE_WORKER:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                thread = "event-loop" if ident == self.loop_thread else name
+                self.samples[";".join([thread, *reversed(stack)])] += 1
+
+    def stop(self) -> Counter:
+        self._stop_event.set()
+        self.join()
+        return self.samples
+
+
+class ProfileStore:
+    """The most recent profiles, oldest evicted first"""
+
+    def __init__(self, max_entries: int = PROFILE_MAX_STORED):
+        self.max_entries = max_entries
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def add(self, profile: Dict[str, Any]):
+        self._profiles[profile["id"]] = profile
+        while len(self._profiles) > self.max_entries:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [
+            {key: value for key, value in profile.items() if key not in ("samples", "stats")}
+            for profile in reversed(self._profiles.values())
+        ]
+
+
+profile_store = ProfileStore()
+
+
+def folded(profile: Dict[str, Any]) -> str:
+    """Folded stacks ("frame;frame;frame count" per line) of a sampled profile"""
+    return "".join(f"{stack} {count}\n" for stack, count in profile["samples"].most_common())
+
+
+def pstats_dump(profile: Dict[str, Any]) -> bytes:
+    """A cProfile result in the file format pstats.Stats() loads"""
+    return marshal.dumps(profile["stats"])
+
+
+def pstats_text(profile: Dict[str, Any], limit: int = 60) -> str:
+    stream = io.StringIO()
+    stats = pstats.Stats(stream=stream)
+    stats.stats = profile["stats"]
+    stats.get_top_level_stats()
+    stats.sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests that ask for it with a valid admin token"""
+
+    def __init__(self, app, admin_token: Optional[str]):
+        self.app = app
+        self.admin_token = admin_token.encode() if admin_token else None
+        self._active = False
+
+    def _requested_mode(self, scope) -> Optional[str]:
+        mode = token = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                mode = value.decode("latin-1").strip().lower()
+            elif name == ADMIN_HEADER:
+                token = value
+        if mode is None or self.admin_token is None or token is None:
+            return None
+        if not hmac.compare_digest(token, self.admin_token):
+            return None
+        return mode if mode in MODES else "sample"
+
+    async def __call__(self, scope, receive, send):
+        mode = self._requested_mode(scope) if scope["type"] == "http" else None
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        busy = self._active
+        profile_id = "busy" if busy else uuid.uuid4().hex
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (PROFILE_ID_HEADER.lower().encode(), profile_id.encode())]
+            await send(message)
+
+        if busy:
+            await self.app(scope, receive, send_wrapper)
+            return
+
+        self._active = True
+        sampler = profiler = None
+        if mode == "sample":
+            sampler = StackSampler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL_MS / 1000)
+            sampler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            profile = {
+                "id": profile_id,
+                "mode": mode,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(scope.get("route"), "path", None),
+                "status": status,
+                "duration_ms": round(duration * 1000, 2),
+                "created_at": datetime.utcnow().isoformat(),
+            }
+            if sampler is not None:
+                profile["samples"] = sampler.stop()
+                profile["sample_count"] = sum(profile["samples"].values())
+            else:
+                profiler.disable()
+                profiler.create_stats()
+                profile["stats"] = profiler.stats
+            profile_store.add(profile)
+            self._active = False
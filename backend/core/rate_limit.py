@@ -0,0 +1,177 @@
+"""
+Per-provider token-bucket rate limiting for outbound API calls.
+
+Each provider gets a bucket configured from the environment:
+
+    RATE_LIMIT_<PROVIDER>_RPS       sustained requests per second (0 disables)
+    RATE_LIMIT_<PROVIDER>_BURST     bucket size
+    RATE_LIMIT_<PROVIDER>_MODE      "queue" (wait for a token) or "shed" (fail fast)
+    RATE_LIMIT_<PROVIDER>_MAX_WAIT  longest a queued call may wait, in seconds
+
+RPS and BURST are the quota for the whole deployment. Buckets live in each
+process, so every worker gets 1/WEB_CONCURRENCY of them (gunicorn.conf.py
+exports the worker count it uses); with several hosts, set the values to
+each host's share.
+
+Calls that cannot get a token in time raise RateLimitExceeded. Integrations
+report upstream 429s through throttled(), which raises the same error and
+holds the bucket back for the provider's Retry-After instead of retrying.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from core.deadline import remaining
+from core.errors import CallRejected
+
+logger = logging.getLogger(__name__)
+
+# Worker processes sharing the provider quotas
+WORKERS = max(int(os.getenv("WEB_CONCURRENCY", "1")), 1)
+
+# Defaults sit just under each provider's documented per-second quota
+DEFAULT_LIMITS = {
+    "amadeus": {"rps": 10, "burst": 10},  # test environment: 10 TPS
+    "google_places": {"rps": 50, "burst": 50},
+    "foursquare": {"rps": 30, "burst": 30},
+    "eventbrite": {"rps": 8, "burst": 8},
+    "weather": {"rps": 10, "burst": 20},
+    "openai": {"rps": 0, "burst": 0},
+}
+
+
+class RateLimitExceeded(CallRejected):
+    """Raised when a call is shed instead of exceeding the provider quota"""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(provider, f"{provider} rate limit exceeded, retry in {retry_after:.2f}s", retry_after)
+
+
+class TokenBucket:
+    def __init__(self, provider: str, rate: float, burst: float, mode: str = "queue", max_wait: float = 5.0):
+        self.provider = provider
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.mode = mode
+        self.max_wait = max_wait
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self.acquired = 0
+        self.shed = 0
+        self.upstream_throttled = 0
+        self.queued = 0
+        self.waiting = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seen = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Take a token, waiting in line for one in queue mode"""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        self._refill(now)
+        if self._tokens >= 1:
+            self._tokens -= 1
+            self.acquired += 1
+            return
+
+        wait = (1 - self._tokens) / self.rate
+        # Never queue past the current request's deadline
+        left = remaining()
+        max_wait = self.max_wait if left is None else min(self.max_wait, left)
+        if self.mode == "shed" or wait > max_wait:
+            self.shed += 1
+            logger.warning(f"Shedding {self.provider} call: rate limit reached")
+            raise RateLimitExceeded(self.provider, wait)
+
+        # Reserve the token now (the balance goes negative) so later callers
+        # queue behind us instead of racing for the same refill
+        self._tokens -= 1
+        self.queued += 1
+        self.waiting += 1
+        slept = False
+        try:
+            await asyncio.sleep(wait)
+            slept = True
+        finally:
+            self.waiting -= 1
+            if not slept:
+                # Cancelled while queued (deadline, hedge loser, disconnect):
+                # give the reserved token back to the callers behind us
+                self._tokens += 1
+        self.acquired += 1
+        self.total_wait_seconds += wait
+        self.max_wait_seen = max(self.max_wait_seen, wait)
+
+    def throttled(self, retry_after: Optional[float] = None) -> RateLimitExceeded:
+        """Record an upstream 429 and hold further calls back for retry_after seconds"""
+        retry_after = retry_after if retry_after is not None else 1.0
+        self.upstream_throttled += 1
+        if self.enabled:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, -retry_after * self.rate)
+        logger.warning(f"{self.provider} returned 429, backing off {retry_after:.2f}s")
+        return RateLimitExceeded(self.provider, retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill(time.monotonic())
+        return {
+            "enabled": self.enabled,
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "workers_sharing_quota": WORKERS,
+            "mode": self.mode,
+            "max_wait_seconds": self.max_wait,
+            "tokens_available": round(max(self._tokens, 0), 2),
+            "acquired": self.acquired,
+            "queued": self.queued,
+            "waiting_now": self.waiting,
+            "shed": self.shed,
+            "upstream_429": self.upstream_throttled,
+            "total_queue_seconds": round(self.total_wait_seconds, 3),
+            "avg_queue_ms": round(self.total_wait_seconds / self.queued * 1000, 2) if self.queued else 0.0,
+            "max_queue_ms": round(self.max_wait_seen * 1000, 2),
+        }
+
+
+_buckets: Dict[str, TokenBucket] = {}
+
+
+def get_rate_limiter(provider: str) -> TokenBucket:
+    """Return the process-wide bucket for a provider, configured from the environment"""
+    bucket = _buckets.get(provider)
+    if bucket is None:
+        defaults = DEFAULT_LIMITS.get(provider, {"rps": 0, "burst": 0})
+        prefix = f"RATE_LIMIT_{provider.upper()}_"
+        bucket = TokenBucket(
+            provider,
+            rate=float(os.getenv(prefix + "RPS", str(defaults["rps"]))) / WORKERS,
+            burst=float(os.getenv(prefix + "BURST", str(defaults["burst"]))) / WORKERS,
+            mode=os.getenv(prefix + "MODE", "queue"),
+            max_wait=float(os.getenv(prefix + "MAX_WAIT", "5")),
+        )
+        _buckets[provider] = bucket
+    return bucket
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header; HTTP-date values are ignored"""
+    try:
+        return max(float(value), 0.0) if value is not None else None
+    except ValueError:
+        return None
+
+
+def rate_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    return {provider: bucket.stats() for provider, bucket in _buckets.items()}
@@ -0,0 +1,124 @@
+"""
+Per-request latency attribution for composite endpoints.
+
+A route opens server_timing() and wraps each stage in timed("name"). Cache
+lookups (core.cache) and provider calls (core.outbound) made inside a stage
+are noted against it, so every stage reports its duration and whether it was
+answered from cache. The result is rendered as a Server-Timing header, which
+browser devtools show per request, and optionally as a JSON block. When
+tracing is on, each stage is also a span (core.tracing).
+Outside server_timing() every helper here is a no-op.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from core.tracing import set_attributes, span
+
+HEADER = "Server-Timing"
+
+# Worst first: one miss makes the whole stage a miss
+_CACHE_ORDER = ("miss", "partial", "stale", "shared", "hit")
+
+
+class _Stage:
+    __slots__ = ("name", "started", "duration", "lookups", "upstream_calls")
+
+    def __init__(self, name: str, started: float):
+        self.name = name
+        self.started = started
+        self.duration = 0.0
+        self.lookups: List[str] = []
+        self.upstream_calls = 0
+
+    @property
+    def cache(self) -> Optional[str]:
+        """hit / shared / stale / partial / miss, or None if nothing cacheable was looked up"""
+        if not self.lookups:
+            return None
+        if "miss" in self.lookups:
+            return "miss"
+        if self.upstream_calls:
+            # Cached lookups, but the stage still had to call a provider
+            return "partial"
+        return min(self.lookups, key=_CACHE_ORDER.index)
+
+
+class ServerTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: List[_Stage] = []
+
+    def header(self) -> str:
+        parts = []
+        for stage in self.stages:
+            desc = f"cache {stage.cache}" if stage.cache else "uncached"
+            parts.append(f'{stage.name};desc="{desc}";dur={stage.duration * 1000:.1f}')
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "stages": [
+                {
+                    "name": stage.name,
+                    "start_ms": round((stage.started - self.started) * 1000, 1),
+                    "duration_ms": round(stage.duration * 1000, 1),
+                    "cache": stage.cache,
+                    "upstream_calls": stage.upstream_calls,
+                }
+                for stage in self.stages
+            ],
+        }
+
+
+_timing: ContextVar[Optional[ServerTiming]] = ContextVar("server_timing", default=None)
+_stage: ContextVar[Optional[_Stage]] = ContextVar("server_timing_stage", default=None)
+
+
+@contextmanager
+def server_timing():
+    """Collect stage timings for the enclosed request handling"""
+    timing = ServerTiming()
+    token = _timing.set(timing)
+    try:
+        yield timing
+    finally:
+        _timing.reset(token)
+
+
+@contextmanager
+def timed(name: str):
+    """Time one stage of the current request (names must be header tokens, e.g. places-attractions)"""
+    timing = _timing.get()
+    if timing is None:
+        yield
+        return
+    stage = _Stage(name, time.perf_counter())
+    timing.stages.append(stage)
+    with span(name) as stage_span:
+        token = _stage.set(stage)
+        try:
+            yield
+        finally:
+            stage.duration = time.perf_counter() - stage.started
+            _stage.reset(token)
+            if stage_span is not None:
+                stage_span.attributes.update({"cache.status": stage.cache, "upstream_calls": stage.upstream_calls})
+
+
+def note_cache(result: str):
+    """Record a cache lookup result (hit, shared, stale or miss) against the current stage"""
+    stage = _stage.get()
+    if stage is not None:
+        stage.lookups.append(result)
+    set_attributes(**{"cache.status": result})
+
+
+def note_upstream_call():
+    stage = _stage.get()
+    if stage is not None:
+        stage.upstream_calls += 1
@@ -0,0 +1,102 @@
+"""
+Startup timing: in-process phase timings plus a `python -X importtime` report.
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+class StartupProfile:
+    """Wall-clock timings for import, lifespan and first-use initialization phases"""
+
+    def __init__(self):
+        self.created_at = time.time()
+        self.phases: List[Dict[str, Any]] = []
+        self.ready_at: Optional[float] = None
+        self.stopping = False
+
+    def record(self, name: str, seconds: float):
+        self.phases.append({"phase": name, "ms": round(seconds * 1000, 2), "at": time.time()})
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def mark_ready(self):
+        self.ready_at = time.time()
+
+    def mark_stopping(self):
+        """Flip readiness off at shutdown so load balancers drain this worker"""
+        self.stopping = True
+
+    @property
+    def is_ready(self) -> bool:
+        return self.ready_at is not None and not self.stopping
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "phases": self.phases,
+            "seconds_to_ready": round(self.ready_at - self.created_at, 3) if self.ready_at else None,
+        }
+
+
+startup_profile = StartupProfile()
+
+
+def parse_importtime(output: str) -> List[Dict[str, Any]]:
+    """Parse `-X importtime` stderr into [{module, self_ms, cumulative_ms, depth}]"""
+    entries = []
+    for line in output.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append({
+                "module": module,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": (len(indent) - 1) // 2,
+            })
+    return entries
+
+
+def measure_import(module: str = "server", top: int = 25, env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Import a module in a fresh interpreter with -X importtime and summarise it.
+    Returns the module's cumulative import time and the slowest imports.
+    """
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **(env or {})},
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    entries = parse_importtime(completed.stderr)
+    total = next((e["cumulative_ms"] for e in entries if e["module"] == module and e["depth"] == 0), None)
+    # Top-level packages only, so nested submodules don't crowd out the list
+    packages = [e for e in entries if e["depth"] <= 1 and "." not in e["module"]]
+    return {
+        "module": module,
+        "ok": completed.returncode == 0,
+        "error": completed.stderr.strip().splitlines()[-1] if completed.returncode else None,
+        "import_ms": total,
+        "process_wall_ms": round(wall_ms, 2),
+        "slowest_cumulative": sorted(packages, key=lambda e: e["cumulative_ms"], reverse=True)[:top],
+        "slowest_self": sorted(entries, key=lambda e: e["self_ms"], reverse=True)[:top],
+    }
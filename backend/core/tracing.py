@@ -0,0 +1,250 @@
+"""
+Lightweight request tracing.
+
+TracingMiddleware opens a server span per HTTP request. Inside it,
+server_timing stages (core.server_timing.timed) and provider calls
+(core.outbound.outbound_call) open child spans. Integrations attach facts
+about a call, such as result_count and payload_bytes, with
+set_attributes(), and cache lookups record cache.status on the current span.
+An incoming W3C `traceparent` header makes the request span a child of the
+caller's trace.
+
+Finished spans are batched and written by a background thread, so the event
+loop never waits on the exporter:
+
+    TRACE_EXPORT=file   OTLP/JSON batches, one per line, appended to TRACE_FILE
+    TRACE_EXPORT=otlp   OTLP/HTTP JSON POSTed to TRACE_OTLP_ENDPOINT (a real
+                        collector, or `python -m benchmarks collector`)
+
+Tracing is off unless TRACE_EXPORT is set; then every helper here is a
+no-op. TRACE_SAMPLE_RATE keeps a fraction of requests (default 1.0).
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from core.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "").lower()
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://127.0.0.1:4318/v1/traces")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "drift-backend")
+
+SERVER, CLIENT, INTERNAL = "server", "client", "internal"
+# OTLP SpanKind values
+_KINDS = {INTERNAL: 1, SERVER: 2, CLIENT: 3}
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def end(self):
+        self.end_ns = time.time_ns()
+        _exporter.submit(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": _KINDS[self.kind],
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items() if value is not None],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def otlp_payload(spans: List[Span]) -> Dict[str, Any]:
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", TRACE_SERVICE_NAME), _otlp_attribute("process.pid", os.getpid())]},
+            "scopeSpans": [{"scope": {"name": "core.tracing"}, "spans": [span.to_otlp() for span in spans]}],
+        }]
+    }
+
+
+class SpanExporter:
+    """Batches finished spans on a queue and writes them from a daemon thread"""
+
+    def __init__(self, mode: str, max_queue: int = 10000, batch_size: int = 512, flush_interval: float = 1.0):
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.exported = 0
+        self.dropped = 0
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, span: Span):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+                self.exported += len(batch)
+            except Exception as e:
+                self.dropped += len(batch)
+                logger.warning(f"Exporting {len(batch)} spans failed: {e}")
+
+    def _write(self, batch: List[Span]):
+        body = json.dumps(otlp_payload(batch), separators=(",", ":"))
+        if self.mode == "otlp":
+            request = urllib.request.Request(
+                TRACE_OTLP_ENDPOINT, data=body.encode(), headers={"Content-Type": "application/json"}, method="POST"
+            )
+            with urllib.request.urlopen(request, timeout=5):
+                pass
+        else:
+            with open(TRACE_FILE, "a") as f:
+                f.write(body + "\n")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "exported": self.exported, "dropped": self.dropped, "queued": self._queue.qsize()}
+
+
+_exporter = SpanExporter(TRACE_EXPORT)
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, kind: str = INTERNAL, **attributes):
+    """Child span of the current one; yields None (and records nothing) outside a trace"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, kind, parent.trace_id, parent.span_id, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        child.end()
+
+
+def set_attributes(**attributes):
+    """Attach attributes to the current span, if any"""
+    current = _current.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+
+def _parse_traceparent(value: bytes):
+    # version-traceid-parentid-flags
+    parts = value.decode("latin-1").strip().split("-")
+    if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+        return parts[1], parts[2]
+    return None, None
+
+
+def tracer_stats() -> Dict[str, Any]:
+    return {"enabled": bool(TRACE_EXPORT), "sample_rate": TRACE_SAMPLE_RATE, **_exporter.stats()}
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the server span for each sampled HTTP request"""
+
+    def __init__(self, app, skip_paths=("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if not TRACE_EXPORT or scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+        if TRACE_SAMPLE_RATE < 1.0 and random.random() >= TRACE_SAMPLE_RATE:
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = parent_id = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                trace_id, parent_id = _parse_traceparent(value)
+                break
+        request_span = Span(
+            scope["method"], SERVER, trace_id or f"{random.getrandbits(128):032x}", parent_id,
+            {"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        response_bytes = 0
+
+        async def send_wrapper(message):
+            nonlocal response_bytes
+            if message["type"] == "http.response.start":
+                request_span.attributes["http.status_code"] = message["status"]
+                if message["status"] >= 500:
+                    request_span.error = f"HTTP {message['status']}"
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        token = _current.set(request_span)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            request_span.error = type(e).__name__
+            raise
+        finally:
+            _current.reset(token)
+            route = route_template(scope)
+            request_span.name = f"{scope['method']} {route}"
+            request_span.attributes["http.route"] = route
+            request_span.attributes["http.response_bytes"] = response_bytes
+            request_span.end()
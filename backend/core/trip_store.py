@@ -0,0 +1,155 @@
+"""
+MongoDB persistence for generated trips and itineraries.
+Saved plans can be re-opened with an indexed read instead of regenerating them.
+"""
+
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING
+
+logger = logging.getLogger(__name__)
+
+# Fields left out of list responses; fetch the document by id for everything
+TRIP_SUMMARY_PROJECTION = {"_id": 0, "plan": 0}
+ITINERARY_SUMMARY_PROJECTION = {"_id": 0, "itinerary.activities": 0}
+
+
+def normalize_key(value: Optional[str]) -> Optional[str]:
+    """Case/whitespace-insensitive key used for destination lookups"""
+    return " ".join(value.lower().split()) if value else None
+
+
+class TripStore:
+    def __init__(self, db):
+        self.trips = db.trips
+        self.itineraries = db.itineraries
+
+    async def ensure_indexes(self):
+        """Create the indexes backing every retrieval query"""
+        await self.trips.create_index("id", unique=True)
+        await self.trips.create_index([("user_id", ASCENDING), ("created_at", DESCENDING)])
+        await self.trips.create_index([("destination_key", ASCENDING), ("departure_date", ASCENDING)])
+        await self.trips.create_index([("departure_date", ASCENDING)])
+
+        await self.itineraries.create_index("id", unique=True)
+        await self.itineraries.create_index([("user_id", ASCENDING), ("created_at", DESCENDING)])
+        await self.itineraries.create_index([("location_key", ASCENDING), ("date", ASCENDING)])
+        await self.itineraries.create_index([("trip_id", ASCENDING), ("day", ASCENDING)])
+
+    async def save_trip(self, request: Dict[str, Any], plan: Dict[str, Any], user_id: Optional[str] = None) -> str:
+        """Store a plan-and-book result and its day itineraries; returns the trip id"""
+        trip_id = str(uuid.uuid4())
+        now = datetime.utcnow()
+        await self.trips.insert_one({
+            "id": trip_id,
+            "user_id": user_id,
+            "destination": request.get("destination"),
+            "destination_key": normalize_key(request.get("destination")),
+            "departure_date": request.get("departure_date"),
+            "return_date": request.get("return_date"),
+            "request": request,
+            "summary": plan.get("summary"),
+            "plan": plan,
+            "created_at": now,
+        })
+
+        day_docs = [
+            {
+                "id": str(uuid.uuid4()),
+                "trip_id": trip_id,
+                "user_id": user_id,
+                "location": request.get("destination"),
+                "location_key": normalize_key(request.get("destination")),
+                "day": day.get("day"),
+                "date": day.get("date"),
+                "itinerary": day.get("itinerary"),
+                "created_at": now,
+            }
+            for day in plan.get("itineraries", [])
+            if day.get("itinerary")
+        ]
+        if day_docs:
+            await self.itineraries.insert_many(day_docs)
+        return trip_id
+
+    async def save_itinerary(
+        self,
+        location: str,
+        itinerary: Dict[str, Any],
+        user_id: Optional[str] = None,
+        date: Optional[str] = None,
+        preferences: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Store a standalone generated itinerary; returns its id"""
+        itinerary_id = str(uuid.uuid4())
+        await self.itineraries.insert_one({
+            "id": itinerary_id,
+            "trip_id": None,
+            "user_id": user_id,
+            "location": location,
+            "location_key": normalize_key(location),
+            "date": date or datetime.utcnow().strftime("%Y-%m-%d"),
+            "preferences": preferences or {},
+            "itinerary": itinerary,
+            "created_at": datetime.utcnow(),
+        })
+        return itinerary_id
+
+    async def get_trip(self, trip_id: str) -> Optional[Dict[str, Any]]:
+        return await self.trips.find_one({"id": trip_id}, {"_id": 0})
+
+    async def get_itinerary(self, itinerary_id: str) -> Optional[Dict[str, Any]]:
+        return await self.itineraries.find_one({"id": itinerary_id}, {"_id": 0})
+
+    async def list_trips(
+        self,
+        user_id: Optional[str] = None,
+        destination: Optional[str] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """List trip summaries, newest first, filtered on indexed fields"""
+        query: Dict[str, Any] = {}
+        if user_id:
+            query["user_id"] = user_id
+        if destination:
+            query["destination_key"] = normalize_key(destination)
+        date_range = {}
+        if from_date:
+            date_range["$gte"] = from_date
+        if to_date:
+            date_range["$lte"] = to_date
+        if date_range:
+            query["departure_date"] = date_range
+
+        sort = [("departure_date", ASCENDING)] if date_range and not user_id else [("created_at", DESCENDING)]
+        cursor = self.trips.find(query, TRIP_SUMMARY_PROJECTION).sort(sort).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def list_itineraries(
+        self,
+        user_id: Optional[str] = None,
+        location: Optional[str] = None,
+        trip_id: Optional[str] = None,
+        date: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """List itinerary summaries filtered on indexed fields"""
+        query: Dict[str, Any] = {}
+        if trip_id:
+            query["trip_id"] = trip_id
+            sort = [("day", ASCENDING)]
+        else:
+            sort = [("created_at", DESCENDING)]
+        if user_id:
+            query["user_id"] = user_id
+        if location:
+            query["location_key"] = normalize_key(location)
+        if date:
+            query["date"] = date
+        cursor = self.itineraries.find(query, ITINERARY_SUMMARY_PROJECTION).sort(sort).limit(limit)
+        return await cursor.to_list(length=limit)
@@ -0,0 +1,147 @@
+"""
+In-process write buffer that batches inserts into one insert_many per flush.
+Every buffer's depth and written/failed/rejected counts are exported on
+/metrics and reported by write_buffer_stats().
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from core.metrics import register_collector
+
+logger = logging.getLogger(__name__)
+
+_buffers: Dict[str, "WriteBuffer"] = {}
+
+
+class WriteBufferFull(Exception):
+    """Raised when the buffer stays full for longer than the put timeout"""
+
+
+class WriteBuffer:
+    def __init__(
+        self,
+        collection,
+        max_batch: int = 500,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000,
+        ttl_field: Optional[str] = None,
+        ttl_seconds: Optional[int] = None,
+    ):
+        self.collection = collection
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.ttl_field = ttl_field
+        self.ttl_seconds = ttl_seconds
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._flusher: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._leftover: List[Dict[str, Any]] = []
+        self.written = 0
+        self.failed = 0
+        self.rejected = 0
+        _buffers[collection.name] = self
+
+    async def start(self):
+        """Create the TTL index (if configured) and start the background flusher"""
+        if self.ttl_field and self.ttl_seconds:
+            await self.collection.create_index(self.ttl_field, expireAfterSeconds=self.ttl_seconds)
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and drain everything still buffered"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        if self._inflight is not None:
+            await self._inflight
+            self._inflight = None
+        if self._leftover:
+            await self._flush(self._leftover)
+            self._leftover = []
+        while not self._queue.empty():
+            await self._flush(self._take(self.max_batch))
+
+    async def put(self, document: Dict[str, Any], timeout: Optional[float] = 1.0):
+        """Queue a document, waiting up to timeout seconds for space when full"""
+        try:
+            await asyncio.wait_for(self._queue.put(document), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise WriteBufferFull(f"Write buffer for {self.collection.name} is full")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self._queue.qsize(),
+            "capacity": self._queue.maxsize,
+            "written": self.written,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    def _take(self, limit: int) -> List[Dict[str, Any]]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Block until there is work, then collect until the batch is full
+            # or the flush interval since the first document has passed
+            batch = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = loop.time() + self.flush_interval
+                while len(batch) < self.max_batch:
+                    batch.extend(self._take(self.max_batch - len(batch)))
+                    remaining = deadline - loop.time()
+                    if len(batch) >= self.max_batch or remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Collected but not yet written; stop() flushes these
+                self._leftover.extend(batch)
+                raise
+            # Shielded so shutdown never interrupts a half-sent insert_many
+            self._inflight = asyncio.ensure_future(self._flush(batch))
+            await asyncio.shield(self._inflight)
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        if not batch:
+            return
+        try:
+            await self.collection.insert_many(batch, ordered=False)
+            self.written += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Failed to flush {len(batch)} documents to {self.collection.name}: {e}")
+
+
+def write_buffer_stats() -> Dict[str, Dict[str, Any]]:
+    """stats() of every buffer, keyed by collection name"""
+    return {name: buffer.stats() for name, buffer in _buffers.items()}
+
+
+def _collect_metrics():
+    stats = write_buffer_stats()
+    yield ("write_buffer_pending", "gauge", "Documents waiting to be flushed", ("collection",), {(n,): s["pending"] for n, s in stats.items()})
+    yield ("write_buffer_capacity", "gauge", "Most documents a buffer holds before put() waits", ("collection",), {(n,): s["capacity"] for n, s in stats.items()})
+    yield (
+        "write_buffer_documents_total", "counter", "Buffered documents by outcome", ("collection", "outcome"),
+        {
+            (name, outcome): s[outcome]
+            for name, s in stats.items()
+            for outcome in ("written", "failed", "rejected")
+        },
+    )
+
+
+register_collector(_collect_metrics)
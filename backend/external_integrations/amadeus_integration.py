@@ -4,10 +4,45 @@ from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from datetime import datetime
 import asyncio
-from amadeus import Client, ResponseError
+
+from core.cache import get_cache
+from core.lazy import LazyIntegration
+from core.circuit_breaker import get_circuit_breaker
+from core.concurrency import get_concurrency_limiter
+from core.deadline import run_blocking
+from core.errors import CallRejected
+from core.outbound import outbound_call
+from core.rate_limit import get_rate_limiter, parse_retry_after
+from core.tracing import set_attributes
 
 logger = logging.getLogger(__name__)
 
+# Airport/city reference data changes rarely; cache it for a day
+locations_cache = get_cache("amadeus_locations", ttl_seconds=int(os.getenv("CACHE_TTL_REFERENCE_DATA", str(24 * 3600))), max_entries=2048)
+
+rate_limiter = get_rate_limiter("amadeus")
+circuit_breaker = get_circuit_breaker("amadeus")
+concurrency_limiter = get_concurrency_limiter("amadeus")
+
+# Send SDK traffic somewhere other than the Amadeus hosts, e.g. a local stub
+# (http://127.0.0.1:9102) for benchmarks
+AMADEUS_BASE_URL = os.getenv("AMADEUS_BASE_URL")
+
+def sdk_host_options() -> Dict[str, Any]:
+    """host/ssl/port Client options for AMADEUS_BASE_URL; empty when it is unset"""
+    if not AMADEUS_BASE_URL:
+        return {}
+    from urllib.parse import urlsplit
+    url = urlsplit(AMADEUS_BASE_URL)
+    ssl = url.scheme == "https"
+    return {"host": url.hostname, "ssl": ssl, "port": url.port or (443 if ssl else 80)}
+
+def trace_response(response):
+    """Attach result count and payload size of an SDK response to the current span"""
+    data = response.data
+    set_attributes(result_count=len(data) if isinstance(data, list) else int(data is not None), payload_bytes=len(response.body or ""))
+    return response
+
 # Pydantic models
 class FlightSearchRequest(BaseModel):
     origin: str
@@ -42,6 +77,99 @@ class HotelOffer(BaseModel):
     location: Optional[Dict[str, Any]] = None
     amenities: Optional[List[str]] = None
 
+# Common city/airport mappings, built once at import so every worker shares it
+COMMON_AIRPORT_CODES = {
+    'NEW YORK': 'JFK',
+    'NYC': 'JFK', 
+    'NEW YORK CITY': 'JFK',
+    'LOS ANGELES': 'LAX',
+    'LA': 'LAX',
+    'CHICAGO': 'ORD',
+    'MIAMI': 'MIA',
+    'ATLANTA': 'ATL',
+    'DALLAS': 'DFW',
+    'DENVER': 'DEN',
+    'SEATTLE': 'SEA',
+    'SAN FRANCISCO': 'SFO',
+    'SF': 'SFO',
+    'BOSTON': 'BOS',
+    'PHILADELPHIA': 'PHL',
+    'PHOENIX': 'PHX',
+    'HOUSTON': 'IAH',
+    'DETROIT': 'DTW',
+    'MINNEAPOLIS': 'MSP',
+    'ORLANDO': 'MCO',
+    'TAMPA': 'TPA',
+    'LAS VEGAS': 'LAS',
+    'VEGAS': 'LAS',
+    'PORTLAND': 'PDX',
+    'SAN DIEGO': 'SAN',
+    'BALTIMORE': 'BWI',
+    'NASHVILLE': 'BNA',
+    'AUSTIN': 'AUS',
+    'CHARLOTTE': 'CLT',
+    'RALEIGH': 'RDU',
+    'KANSAS CITY': 'MCI',
+    'CLEVELAND': 'CLE',
+    'CINCINNATI': 'CVG',
+    'PITTSBURGH': 'PIT',
+    'ST. LOUIS': 'STL',
+    'SAINT LOUIS': 'STL',
+    'MILWAUKEE': 'MKE',
+    'INDIANAPOLIS': 'IND',
+    'COLUMBUS': 'CMH',
+    'SACRAMENTO': 'SMF',
+    'SAN ANTONIO': 'SAT',
+    'FORT LAUDERDALE': 'FLL',
+    'JACKSONVILLE': 'JAX',
+    'NEW ORLEANS': 'MSY',
+    'MEMPHIS': 'MEM',
+    'OKLAHOMA CITY': 'OKC',
+    'TULSA': 'TUL',
+    'ALBUQUERQUE': 'ABQ',
+    'SALT LAKE CITY': 'SLC',
+    'LONDON': 'LHR',
+    'PARIS': 'CDG',
+    'TOKYO': 'NRT',
+    'BERLIN': 'BER',
+    'MADRID': 'MAD',
+    'ROME': 'FCO',
+    'AMSTERDAM': 'AMS',
+    'FRANKFURT': 'FRA',
+    'ZURICH': 'ZUR',
+    'BARCELONA': 'BCN',
+    'MUNICH': 'MUC',
+    'VIENNA': 'VIE',
+    'DUBLIN': 'DUB',
+    'STOCKHOLM': 'ARN',
+    'COPENHAGEN': 'CPH',
+    'OSLO': 'OSL',
+    'HELSINKI': 'HEL',
+    'TORONTO': 'YYZ',
+    'VANCOUVER': 'YVR',
+    'MONTREAL': 'YUL',
+    'SYDNEY': 'SYD',
+    'MELBOURNE': 'MEL',
+    'SINGAPORE': 'SIN',
+    'HONG KONG': 'HKG',
+    'DUBAI': 'DXB',
+    'DOHA': 'DOH',
+    'WASHINGTON': 'DCA',
+    'WASHINGTON, DC': 'DCA',
+    'DC': 'DCA'
+}
+
+# The Amadeus SDK is imported on first construction (see _import_sdk).
+# Until then ResponseError is a placeholder that matches nothing.
+Client = None
+
+class ResponseError(Exception):
+    pass
+
+def _import_sdk():
+    global Client, ResponseError
+    from amadeus import Client, ResponseError
+
 class AmadeusIntegration:
     def __init__(self):
         self.api_key = os.getenv("AMADEUS_API_KEY")
@@ -51,13 +179,29 @@ class AmadeusIntegration:
         if not self.api_key or not self.api_secret:
             raise ValueError("AMADEUS_API_KEY and AMADEUS_API_SECRET environment variables must be set")
         
+        _import_sdk()
         self.client = Client(
             client_id=self.api_key,
             client_secret=self.api_secret,
-            hostname='production' if self.environment == 'production' else 'test'
+            hostname='production' if self.environment == 'production' else 'test',
+            **sdk_host_options()
         )
         
         logger.info(f"Amadeus client initialized in {self.environment} environment")
+
+    async def _call(self, method, **params):
+        """Call an Amadeus SDK endpoint under the provider circuit breaker, rate and concurrency limits"""
+        # Endpoint objects are named after the API (FlightOffersSearch, HotelOffers, ...)
+        with outbound_call("amadeus", type(method.__self__).__name__), circuit_breaker.guard():
+            await rate_limiter.acquire()
+            async with concurrency_limiter.slot():
+                try:
+                    return trace_response(await run_blocking("amadeus", method, **params))
+                except ResponseError as error:
+                    if getattr(error.response, "status_code", None) == 429:
+                        headers = getattr(error.response.http_response, "headers", None) or {}
+                        raise rate_limiter.throttled(parse_retry_after(headers.get("Retry-After")))
+                    raise
     
     async def _resolve_airport_code(self, location: str) -> str:
         """
@@ -69,91 +213,9 @@ class AmadeusIntegration:
         if len(location) == 3 and location.isalpha():
             return location
         
-        # Common city/airport mappings
-        common_mappings = {
-            'NEW YORK': 'JFK',
-            'NYC': 'JFK', 
-            'NEW YORK CITY': 'JFK',
-            'LOS ANGELES': 'LAX',
-            'LA': 'LAX',
-            'CHICAGO': 'ORD',
-            'MIAMI': 'MIA',
-            'ATLANTA': 'ATL',
-            'DALLAS': 'DFW',
-            'DENVER': 'DEN',
-            'SEATTLE': 'SEA',
-            'SAN FRANCISCO': 'SFO',
-            'SF': 'SFO',
-            'BOSTON': 'BOS',
-            'PHILADELPHIA': 'PHL',
-            'PHOENIX': 'PHX',
-            'HOUSTON': 'IAH',
-            'DETROIT': 'DTW',
-            'MINNEAPOLIS': 'MSP',
-            'ORLANDO': 'MCO',
-            'TAMPA': 'TPA',
-            'LAS VEGAS': 'LAS',
-            'VEGAS': 'LAS',
-            'PORTLAND': 'PDX',
-            'SAN DIEGO': 'SAN',
-            'BALTIMORE': 'BWI',
-            'NASHVILLE': 'BNA',
-            'AUSTIN': 'AUS',
-            'CHARLOTTE': 'CLT',
-            'RALEIGH': 'RDU',
-            'KANSAS CITY': 'MCI',
-            'CLEVELAND': 'CLE',
-            'CINCINNATI': 'CVG',
-            'PITTSBURGH': 'PIT',
-            'ST. LOUIS': 'STL',
-            'SAINT LOUIS': 'STL',
-            'MILWAUKEE': 'MKE',
-            'INDIANAPOLIS': 'IND',
-            'COLUMBUS': 'CMH',
-            'SACRAMENTO': 'SMF',
-            'SAN ANTONIO': 'SAT',
-            'FORT LAUDERDALE': 'FLL',
-            'JACKSONVILLE': 'JAX',
-            'NEW ORLEANS': 'MSY',
-            'MEMPHIS': 'MEM',
-            'OKLAHOMA CITY': 'OKC',
-            'TULSA': 'TUL',
-            'ALBUQUERQUE': 'ABQ',
-            'SALT LAKE CITY': 'SLC',
-            'LONDON': 'LHR',
-            'PARIS': 'CDG',
-            'TOKYO': 'NRT',
-            'BERLIN': 'BER',
-            'MADRID': 'MAD',
-            'ROME': 'FCO',
-            'AMSTERDAM': 'AMS',
-            'FRANKFURT': 'FRA',
-            'ZURICH': 'ZUR',
-            'BARCELONA': 'BCN',
-            'MUNICH': 'MUC',
-            'VIENNA': 'VIE',
-            'DUBLIN': 'DUB',
-            'STOCKHOLM': 'ARN',
-            'COPENHAGEN': 'CPH',
-            'OSLO': 'OSL',
-            'HELSINKI': 'HEL',
-            'TORONTO': 'YYZ',
-            'VANCOUVER': 'YVR',
-            'MONTREAL': 'YUL',
-            'SYDNEY': 'SYD',
-            'MELBOURNE': 'MEL',
-            'SINGAPORE': 'SIN',
-            'HONG KONG': 'HKG',
-            'DUBAI': 'DXB',
-            'DOHA': 'DOH',
-            'WASHINGTON': 'DCA',
-            'WASHINGTON, DC': 'DCA',
-            'DC': 'DCA'
-        }
-        
         # Check common mappings first
-        if location in common_mappings:
-            return common_mappings[location]
+        if location in COMMON_AIRPORT_CODES:
+            return COMMON_AIRPORT_CODES[location]
         
         # Try to search for airports by keyword
         try:
@@ -219,7 +281,7 @@ class AmadeusIntegration:
             logger.info(f"Searching flights from {origin_code} to {destination_code}")
             
             # Make API call
-            response = self.client.shopping.flight_offers_search.get(**search_params)
+            response = await self._call(self.client.shopping.flight_offers_search.get, **search_params)
             
             # Process results
             flights = []
@@ -237,6 +299,8 @@ class AmadeusIntegration:
             logger.info(f"Found {len(flights)} flight offers")
             return flights
             
+        except CallRejected:
+            raise
         except ResponseError as error:
             logger.error(f"Amadeus ResponseError: {error}")
             raise Exception(f"Flight search failed: {str(error)}")
@@ -267,7 +331,7 @@ class AmadeusIntegration:
             if return_date:
                 search_params['returnDate'] = return_date
             
-            response = self.client.shopping.flight_dates.get(**search_params)
+            response = await self._call(self.client.shopping.flight_dates.get, **search_params)
             
             flights = []
             for offer in response.data:
@@ -285,6 +349,8 @@ class AmadeusIntegration:
             
             return flights
             
+        except CallRejected:
+            raise
         except ResponseError as error:
             logger.error(f"Flexible flight search error: {error}")
             raise Exception(f"Flexible flight search failed: {str(error)}")
@@ -296,7 +362,8 @@ class AmadeusIntegration:
         """Search for hotels using Amadeus API"""
         try:
             # Get hotel offers by city
-            response = self.client.shopping.hotel_offers.get(
+            response = await self._call(
+                self.client.shopping.hotel_offers.get,
                 cityCode=request.location[:3].upper(),  # Use first 3 chars as city code
                 checkInDate=request.check_in,
                 checkOutDate=request.check_out,
@@ -325,6 +392,8 @@ class AmadeusIntegration:
             logger.info(f"Found {len(hotels)} hotel offers")
             return hotels
             
+        except CallRejected:
+            raise
         except ResponseError as error:
             logger.error(f"Hotel search error: {error}")
             # Return empty list for test environment
@@ -335,8 +404,15 @@ class AmadeusIntegration:
 
     async def search_airports(self, keyword: str) -> List[Dict[str, Any]]:
         """Search for airports by keyword"""
+        # Empty results are not cached: errors below also come back as []
+        return await locations_cache.get_or_load(
+            f"AIRPORT:{keyword.upper().strip()}", lambda: self._search_airports(keyword), should_cache=bool
+        )
+
+    async def _search_airports(self, keyword: str) -> List[Dict[str, Any]]:
         try:
-            response = self.client.reference_data.locations.get(
+            response = await self._call(
+                self.client.reference_data.locations.get,
                 keyword=keyword,
                 subType='AIRPORT'
             )
@@ -353,6 +429,8 @@ class AmadeusIntegration:
             
             return airports
             
+        except CallRejected:
+            raise
         except ResponseError as error:
             logger.error(f"Airport search error: {error}")
             return []
@@ -362,8 +440,14 @@ class AmadeusIntegration:
 
     async def search_cities(self, keyword: str) -> List[Dict[str, Any]]:
         """Search for cities by keyword"""
+        return await locations_cache.get_or_load(
+            f"CITY:{keyword.upper().strip()}", lambda: self._search_cities(keyword), should_cache=bool
+        )
+
+    async def _search_cities(self, keyword: str) -> List[Dict[str, Any]]:
         try:
-            response = self.client.reference_data.locations.get(
+            response = await self._call(
+                self.client.reference_data.locations.get,
                 keyword=keyword,
                 subType='CITY'
             )
@@ -384,7 +468,8 @@ class AmadeusIntegration:
                         # Search for airports in this city
                         city_name = location.get('name', '')
                         if city_name:
-                            airport_response = self.client.reference_data.locations.get(
+                            airport_response = await self._call(
+                                self.client.reference_data.locations.get,
                                 keyword=city_name,
                                 subType='AIRPORT'
                             )
@@ -398,6 +483,8 @@ class AmadeusIntegration:
             
             return cities
             
+        except CallRejected:
+            raise
         except ResponseError as error:
             logger.error(f"City search error: {error}")
             return []
@@ -405,5 +492,5 @@ class AmadeusIntegration:
             logger.error(f"City search error: {e}")
             return []
 
-# Create a singleton instance
-amadeus_integration = AmadeusIntegration()
+# Singleton, constructed on first use
+amadeus_integration = LazyIntegration("amadeus", AmadeusIntegration, required_env=("AMADEUS_API_KEY", "AMADEUS_API_SECRET"))
@@ -1,13 +1,24 @@
 
+import asyncio
 import os
-import requests
 from dotenv import load_dotenv
 from typing import List, Dict, Any
 
+from core.circuit_breaker import get_circuit_breaker
+from core.deadline import call_timeout
+from core.lazy import LazyIntegration
+from core.outbound import outbound_call
+from core.rate_limit import get_rate_limiter, parse_retry_after
+from core.tracing import set_attributes
+
 load_dotenv()
 
 EVENTBRITE_API_KEY = os.getenv("EVENTBRITE_API_KEY")
-EVENTBRITE_API_URL = "https://www.eventbriteapi.com/v3/events/search/"
+EVENTBRITE_API_BASE = os.getenv("EVENTBRITE_API_BASE", "https://www.eventbriteapi.com/v3")
+EVENTBRITE_API_URL = f"{EVENTBRITE_API_BASE}/events/search/"
+
+rate_limiter = get_rate_limiter("eventbrite")
+circuit_breaker = get_circuit_breaker("eventbrite")
 
 class EventbriteIntegration:
     def __init__(self, api_key: str):
@@ -21,6 +32,7 @@ class EventbriteIntegration:
 
     def search_events(self, lat: float, lon: float, within: str = "10km", limit: int = 10) -> List[Dict[str, Any]]:
         """Search for events near a given location."""
+        import requests  # deferred: only needed once events are requested
         params = {
             "location.latitude": lat,
             "location.longitude": lon,
@@ -29,9 +41,13 @@ class EventbriteIntegration:
             "page_size": limit
         }
         try:
-            response = requests.get(EVENTBRITE_API_URL, headers=self.headers, params=params)
-            response.raise_for_status()
-            data = response.json()
+            with outbound_call("eventbrite", "search_events"), circuit_breaker.guard():
+                response = requests.get(EVENTBRITE_API_URL, headers=self.headers, params=params, timeout=call_timeout("eventbrite"))
+                if response.status_code == 429:
+                    raise rate_limiter.throttled(parse_retry_after(response.headers.get("Retry-After")))
+                response.raise_for_status()
+                data = response.json()
+                set_attributes(result_count=len(data.get("events", [])), payload_bytes=len(response.content))
             return data.get("events", [])
         except requests.exceptions.RequestException as e:
             print(f"Error searching Eventbrite events: {e}")
@@ -39,6 +55,7 @@ class EventbriteIntegration:
 
     async def get_local_events(self, lat: float, lon: float, limit: int = 5) -> List[Dict[str, Any]]:
         """Get a list of local events."""
-        return self.search_events(lat, lon, limit=limit)
+        await rate_limiter.acquire()
+        return await asyncio.to_thread(self.search_events, lat, lon, limit=limit)
 
-eventbrite_integration = EventbriteIntegration(api_key=EVENTBRITE_API_KEY)
+eventbrite_integration = LazyIntegration("eventbrite", lambda: EventbriteIntegration(api_key=EVENTBRITE_API_KEY), required_env=("EVENTBRITE_API_KEY",))
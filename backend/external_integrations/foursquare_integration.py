@@ -1,12 +1,24 @@
+import asyncio
 import os
-import requests
 from dotenv import load_dotenv
 from typing import List, Dict, Any
 
+from core.circuit_breaker import get_circuit_breaker
+from core.deadline import call_timeout
+from core.errors import CallRejected
+from core.lazy import LazyIntegration
+from core.outbound import outbound_call
+from core.rate_limit import get_rate_limiter, parse_retry_after
+from core.tracing import set_attributes
+
 load_dotenv()
 
 FOURSQUARE_API_KEY = os.getenv("FOURSQUARE_API_KEY")
-FOURSQUARE_API_URL = "https://api.foursquare.com/v3/places/search"
+FOURSQUARE_API_BASE = os.getenv("FOURSQUARE_API_BASE", "https://api.foursquare.com/v3")
+FOURSQUARE_API_URL = f"{FOURSQUARE_API_BASE}/places/search"
+
+rate_limiter = get_rate_limiter("foursquare")
+circuit_breaker = get_circuit_breaker("foursquare")
 
 class FoursquareIntegration:
     def __init__(self, api_key: str):
@@ -20,6 +32,7 @@ class FoursquareIntegration:
 
     def search_venues(self, lat: float, lon: float, category: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Search for venues near a given location."""
+        import requests  # deferred: only needed once venues are requested
         params = {
             "ll": f"{lat},{lon}",
             "categories": category,
@@ -27,9 +40,13 @@ class FoursquareIntegration:
             "fields": "fsq_id,name,location,categories,rating,price,photos"
         }
         try:
-            response = requests.get(FOURSQUARE_API_URL, headers=self.headers, params=params)
-            response.raise_for_status()
-            data = response.json()
+            with outbound_call("foursquare", "search_venues"), circuit_breaker.guard():
+                response = requests.get(FOURSQUARE_API_URL, headers=self.headers, params=params, timeout=call_timeout("foursquare"))
+                if response.status_code == 429:
+                    raise rate_limiter.throttled(parse_retry_after(response.headers.get("Retry-After")))
+                response.raise_for_status()
+                data = response.json()
+                set_attributes(result_count=len(data.get("results", [])), payload_bytes=len(response.content))
             return data.get("results", [])
         except requests.exceptions.RequestException as e:
             print(f"Error searching Foursquare venues: {e}")
@@ -37,12 +54,17 @@ class FoursquareIntegration:
 
     def get_venue_photos(self, fsq_id: str) -> List[str]:
         """Get photo URLs for a specific venue."""
+        import requests
         photo_urls = []
-        photo_api_url = f"https://api.foursquare.com/v3/places/{fsq_id}/photos"
+        photo_api_url = f"{FOURSQUARE_API_BASE}/places/{fsq_id}/photos"
         try:
-            response = requests.get(photo_api_url, headers=self.headers)
-            response.raise_for_status()
-            photos_data = response.json()
+            with outbound_call("foursquare", "venue_photos"), circuit_breaker.guard():
+                response = requests.get(photo_api_url, headers=self.headers, timeout=call_timeout("foursquare"))
+                if response.status_code == 429:
+                    raise rate_limiter.throttled(parse_retry_after(response.headers.get("Retry-After")))
+                response.raise_for_status()
+                photos_data = response.json()
+                set_attributes(result_count=len(photos_data), payload_bytes=len(response.content))
             for photo in photos_data:
                 prefix = photo.get("prefix")
                 suffix = photo.get("suffix")
@@ -55,12 +77,21 @@ class FoursquareIntegration:
 
     async def get_restaurants_with_photos(self, lat: float, lon: float, limit: int = 5) -> List[Dict[str, Any]]:
         """Get a list of restaurants with their photos."""
-        restaurants = self.search_venues(lat, lon, category="13065", limit=limit) # 13065 is the category for "Restaurant"
+        await rate_limiter.acquire()
+        restaurants = await asyncio.to_thread(self.search_venues, lat, lon, category="13065", limit=limit) # 13065 is the category for "Restaurant"
+        photos_limited = False
         for restaurant in restaurants:
             fsq_id = restaurant.get("fsq_id")
-            photos = self.get_venue_photos(fsq_id) if fsq_id else []
+            photos = []
+            # Photos are decoration: once the quota is hit, keep the venues and use the fallback image
+            if fsq_id and not photos_limited:
+                try:
+                    await rate_limiter.acquire()
+                    photos = await asyncio.to_thread(self.get_venue_photos, fsq_id)
+                except CallRejected:
+                    photos_limited = True
             # Use the first photo if available, else fallback
             restaurant["photo_url"] = photos[0] if photos else "https://via.placeholder.com/300x200?text=No+Image"
         return restaurants
 
-foursquare_integration = FoursquareIntegration(api_key=FOURSQUARE_API_KEY)
+foursquare_integration = LazyIntegration("foursquare", lambda: FoursquareIntegration(api_key=FOURSQUARE_API_KEY), required_env=("FOURSQUARE_API_KEY",))
@@ -1,12 +1,41 @@
-import googlemaps
 import os
 import logging
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 import random
 
+from core.cache import get_cache
+from core.circuit_breaker import get_circuit_breaker, is_provider_failure
+from core.concurrency import get_concurrency_limiter
+from core.deadline import OUTBOUND_TIMEOUT_SECONDS, run_blocking
+from core.errors import CallRejected
+from core.hedging import get_hedge_policy
+from core.lazy import LazyIntegration
+from core.outbound import outbound_call
+from core.rate_limit import get_rate_limiter
+from core.tracing import set_attributes
+
 logger = logging.getLogger(__name__)
 
+# Cached raw Google responses, shared across workers through the L2 tier
+geocode_cache = get_cache("geocode", ttl_seconds=int(os.getenv("CACHE_TTL_GEOCODE", str(7 * 24 * 3600))), max_entries=2048)
+places_cache = get_cache("places", ttl_seconds=int(os.getenv("CACHE_TTL_PLACES", "3600")), max_entries=1024)
+place_details_cache = get_cache("place_details", ttl_seconds=int(os.getenv("CACHE_TTL_PLACE_DETAILS", str(24 * 3600))), max_entries=1024)
+
+rate_limiter = get_rate_limiter("google_places")
+circuit_breaker = get_circuit_breaker("google_places")
+concurrency_limiter = get_concurrency_limiter("google_places")
+
+# Opt-in hedging for the two calls on the planners' critical path
+HEDGE_SETTINGS = dict(
+    enabled=os.getenv("GOOGLE_HEDGE_ENABLED", "false").lower() == "true",
+    budget=float(os.getenv("GOOGLE_HEDGE_BUDGET", "0.05")),
+    min_delay=float(os.getenv("GOOGLE_HEDGE_MIN_DELAY_MS", "50")) / 1000,
+    max_delay=float(os.getenv("GOOGLE_HEDGE_MAX_DELAY_MS", "2000")) / 1000,
+)
+geocode_hedge = get_hedge_policy("google_places.geocode", **HEDGE_SETTINGS)
+nearby_hedge = get_hedge_policy("google_places.nearby", **HEDGE_SETTINGS)
+
 # Pydantic models
 class PlaceDetail(BaseModel):
     place_id: str
@@ -36,24 +65,75 @@ class GooglePlacesIntegration:
         self.api_key = os.getenv("GOOGLE_MAPS_API_KEY")
         if not self.api_key:
             raise ValueError("GOOGLE_MAPS_API_KEY environment variable is not set")
-        self.client = googlemaps.Client(key=self.api_key)
+        # Heavy SDK import deferred until the integration is first used
+        import googlemaps
+        self.errors = googlemaps.exceptions
+        # Quota is enforced by rate_limiter; the SDK's own over-limit retries
+        # would turn a burst into a retry storm
+        self.client = googlemaps.Client(
+            key=self.api_key,
+            retry_over_query_limit=False,
+            timeout=OUTBOUND_TIMEOUT_SECONDS,
+            base_url=os.getenv("GOOGLE_MAPS_BASE_URL", "https://maps.googleapis.com"),
+        )
+
+    def _is_failure(self, error: BaseException) -> bool:
+        # An ApiError is Google answering (NOT_FOUND, INVALID_REQUEST, ...), not an outage
+        if isinstance(error, self.errors.ApiError):
+            return error.status == "UNKNOWN_ERROR"
+        return is_provider_failure(error)
+
+    async def _call(self, method, hedge=None, **params):
+        """
+        Call a googlemaps client method under the provider circuit breaker.
+        With a hedge policy, a slow call may be duplicated (see core.hedging).
+        """
+        with outbound_call("google_places", method.__name__), circuit_breaker.guard(self._is_failure):
+            if hedge is not None:
+                result = await hedge.run(lambda: self._attempt(method, params))
+            else:
+                result = await self._attempt(method, params)
+            # geocode returns a list; search and details return the API envelope
+            set_attributes(result_count=len(result) if isinstance(result, list) else len(result.get("results", [result.get("result")])))
+            return result
+
+    async def _attempt(self, method, params: Dict[str, Any]):
+        """One rate- and concurrency-limited request; the blocking SDK call runs in a worker thread"""
+        await rate_limiter.acquire()
+        async with concurrency_limiter.slot():
+            try:
+                return await run_blocking("google_places", method, **params)
+            except self.errors.ApiError as e:
+                if e.status == "OVER_QUERY_LIMIT":
+                    raise rate_limiter.throttled()
+                raise
+            except self.errors.HTTPError as e:
+                if e.status_code == 429:
+                    raise rate_limiter.throttled()
+                raise
 
     async def geocode_location(self, address: str) -> LocationInfo:
         """Convert address to coordinates and location info"""
-        try:
-            geocode_result = self.client.geocode(address)
+        async def load():
+            geocode_result = await self._call(self.client.geocode, hedge=geocode_hedge, address=address)
             if not geocode_result:
                 raise Exception(f"No location found for: {address}")
             
             result = geocode_result[0]
             location = result['geometry']['location']
             
-            return LocationInfo(
-                formatted_address=result['formatted_address'],
-                coordinates={'lat': location['lat'], 'lng': location['lng']},
-                place_id=result.get('place_id'),
-                types=result.get('types', [])
-            )
+            return {
+                'formatted_address': result['formatted_address'],
+                'coordinates': {'lat': location['lat'], 'lng': location['lng']},
+                'place_id': result.get('place_id'),
+                'types': result.get('types', [])
+            }
+
+        try:
+            cache_key = " ".join(address.lower().split())
+            return LocationInfo(**await geocode_cache.get_or_load(cache_key, load))
+        except CallRejected:
+            raise
         except Exception as e:
             logger.error(f"Geocoding error for {address}: {e}")
             raise Exception(f"Failed to geocode location: {address}")
@@ -77,20 +157,27 @@ class GooglePlacesIntegration:
                     pass  # Continue without location bias
             
             # Search for places
-            places_result = self.client.places(
-                query=query,
-                location=location_coords,
-                radius=radius,
-                type=place_type
-            )
+            async def load():
+                return (await self._call(
+                    self.client.places,
+                    query=query,
+                    location=location_coords,
+                    radius=radius,
+                    type=place_type
+                )).get('results', [])
+
+            cache_key = f"search:{query.lower().strip()}:{location_coords}:{radius}:{place_type}"
+            results = await places_cache.get_or_load(cache_key, load)
             
             places = []
-            for place in places_result.get('results', []):
+            for place in results:
                 place_detail = self._convert_to_place_detail(place)
                 places.append(place_detail)
             
             return places
             
+        except CallRejected:
+            raise
         except Exception as e:
             logger.error(f"Places search error: {e}")
             return []
@@ -107,14 +194,21 @@ class GooglePlacesIntegration:
             location = f"{latitude},{longitude}"
             
             # Get nearby places
-            places_result = self.client.places_nearby(
-                location=location,
-                radius=radius,
-                type=place_type
-            )
+            async def load():
+                return (await self._call(
+                    self.client.places_nearby,
+                    hedge=nearby_hedge,
+                    location=location,
+                    radius=radius,
+                    type=place_type
+                )).get('results', [])
+
+            # ~11m grid so nearby requests for the same spot share an entry
+            cache_key = f"nearby:{round(float(latitude), 4)},{round(float(longitude), 4)}:{radius}:{place_type}"
+            results = await places_cache.get_or_load(cache_key, load)
             
             places = []
-            for place in places_result.get('results', []):
+            for place in results:
                 place_detail = self._convert_to_place_detail(place)
                 places.append(place_detail)
             
@@ -122,6 +216,8 @@ class GooglePlacesIntegration:
             places.sort(key=lambda x: x.rating or 0, reverse=True)
             return places[:20]  # Return top 20 places
             
+        except CallRejected:
+            raise
         except Exception as e:
             logger.error(f"Nearby places error: {e}")
             return []
@@ -129,21 +225,25 @@ class GooglePlacesIntegration:
     async def get_place_details(self, place_id: str) -> PlaceDetail:
         """Get detailed information about a specific place"""
         try:
-            place_result = self.client.place(
-                place_id=place_id,
-                fields=[
-                    'place_id', 'name', 'rating', 'price_level', 'type',
-                    'formatted_address', 'vicinity', 'opening_hours',
-                    'photo', 'geometry', 'website', 'formatted_phone_number',
-                    'user_ratings_total', 'review'
-                ]
-            )
-            
-            place_data = place_result.get('result', {})
+            async def load():
+                return (await self._call(
+                    self.client.place,
+                    place_id=place_id,
+                    fields=[
+                        'place_id', 'name', 'rating', 'price_level', 'type',
+                        'formatted_address', 'vicinity', 'opening_hours',
+                        'photo', 'geometry', 'website', 'formatted_phone_number',
+                        'user_ratings_total', 'review'
+                    ]
+                )).get('result', {})
+
+            place_data = await place_details_cache.get_or_load(place_id, load, should_cache=bool)
             place_detail = self._convert_to_place_detail(place_data, include_details=True)
             
             return place_detail
             
+        except CallRejected:
+            raise
         except Exception as e:
             logger.error(f"Place details error: {e}")
             raise Exception(f"Failed to get place details for: {place_id}")
@@ -230,5 +330,5 @@ class GooglePlacesIntegration:
         
         return "$$"  # Default moderate cost
 
-# Create a singleton instance
-google_places_integration = GooglePlacesIntegration()
+# Singleton, constructed on first use
+google_places_integration = LazyIntegration("google_places", GooglePlacesIntegration, required_env=("GOOGLE_MAPS_API_KEY",))
@@ -1,12 +1,26 @@
-import openai
 import os
 import logging
+import time
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 import json
 
+from core.circuit_breaker import get_circuit_breaker
+from core.concurrency import get_concurrency_limiter
+from core.deadline import call_timeout, run_blocking
+from core.lazy import LazyIntegration
+from core.llm_usage import record_usage
+from core.outbound import outbound_call
+from core.tracing import set_attributes
+
 logger = logging.getLogger(__name__)
 
+circuit_breaker = get_circuit_breaker("openai")
+concurrency_limiter = get_concurrency_limiter("openai")
+
+OPENAI_MODEL = "gpt-4"
+OPENAI_MAX_TOKENS = 2000
+
 # Pydantic models
 class ItineraryActivity(BaseModel):
     title: str
@@ -28,11 +42,80 @@ class JournalRecapResponse(BaseModel):
     mood_score: int  # 1-10
     shareable_text: str
 
+# Static prompt data, built once at import so pre-forked workers share it
+BUDGET_DESCRIPTIONS = {
+    'low': 'budget-conscious, looking for free and low-cost activities (under $50)',
+    'medium': 'treating myself reasonably ($50-150)',
+    'high': 'premium experiences, willing to splurge ($150+)'
+}
+
+MOOD_DESCRIPTIONS = {
+    'adventurous': 'seeking exciting, thrilling experiences and outdoor activities',
+    'relaxed': 'wanting calm, peaceful activities and leisurely experiences',
+    'cultural': 'interested in museums, art, history, and cultural experiences',
+    'foodie': 'focused on culinary experiences, restaurants, and local cuisine',
+    'romantic': 'looking for intimate, romantic activities perfect for couples',
+    'family': 'seeking family-friendly activities suitable for all ages',
+    'nightlife': 'interested in evening entertainment, bars, and vibrant nightlife',
+    'nature': 'preferring outdoor activities, parks, and natural settings',
+    'shopping': 'focused on shopping districts, markets, and retail experiences',
+    'wellness': 'interested in spa, yoga, meditation - peaceful and mindful'
+}
+
+ITINERARY_SYSTEM_PROMPT = """You are a world-class travel planner creating personalized itineraries. 
+Create an engaging {duration_hours}-hour itinerary for {location}.
+
+User preferences:
+- Mood: {mood_desc}
+- Budget: {budget_desc}
+- Duration: {duration_hours} hours
+
+{real_venues_line}
+
+Format your response as a JSON object with this structure:
+{{
+    "activities": [
+        {{
+            "title": "Activity Name",
+            "description": "Detailed description (50-100 words)",
+            "location": "Specific address or neighborhood",
+            "duration_minutes": 120,
+            "estimated_cost": "$", "$$", or "$$$",
+            "category": "category_name"
+        }}
+    ],
+    "narrative_summary": "Engaging overview of the day (100-150 words)",
+    "total_estimated_cost": "Overall budget estimate"
+}}
+
+Guidelines:
+- Include 3-6 activities
+- Use real places when possible
+- Vary activity types and locations
+- Consider travel time between activities
+- Make descriptions engaging and specific
+- Include practical details"""
+
+JOURNAL_SYSTEM_PROMPT = """You are a creative travel journal writer. Create an engaging, personal journal recap of the user's day.
+
+Format your response as a JSON object with this structure:
+{
+    "title": "Catchy title for the day",
+    "content": "Personal, reflective journal entry (200-300 words)",
+    "highlights": ["Top 3-5 memorable moments"],
+    "mood_score": 8,
+    "shareable_text": "Social media friendly summary (Twitter-length)"
+}
+
+Make it personal, engaging, and capture the emotions and experiences of the day."""
+
 class OpenAIIntegration:
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY environment variable is not set")
+        # Heavy SDK import deferred until the integration is first used
+        import openai
         openai.api_key = self.api_key
         self.client = openai.OpenAI(api_key=self.api_key)
 
@@ -46,64 +129,17 @@ class OpenAIIntegration:
     ) -> ItineraryResponse:
         """Generate a personalized itinerary based on user preferences"""
         try:
-            # Budget mapping
-            budget_descriptions = {
-                'low': 'budget-conscious, looking for free and low-cost activities (under $50)',
-                'medium': 'treating myself reasonably ($50-150)',
-                'high': 'premium experiences, willing to splurge ($150+)'
-            }
-            
-            # Mood mapping
-            mood_descriptions = {
-                'adventurous': 'seeking exciting, thrilling experiences and outdoor activities',
-                'relaxed': 'wanting calm, peaceful activities and leisurely experiences',
-                'cultural': 'interested in museums, art, history, and cultural experiences',
-                'foodie': 'focused on culinary experiences, restaurants, and local cuisine',
-                'romantic': 'looking for intimate, romantic activities perfect for couples',
-                'family': 'seeking family-friendly activities suitable for all ages',
-                'nightlife': 'interested in evening entertainment, bars, and vibrant nightlife',
-                'nature': 'preferring outdoor activities, parks, and natural settings',
-                'shopping': 'focused on shopping districts, markets, and retail experiences',
-                'wellness': 'interested in spa, yoga, meditation - peaceful and mindful'
-            }
-            
-            budget_desc = budget_descriptions.get(budget, budget_descriptions['medium'])
-            mood_desc = mood_descriptions.get(mood, mood_descriptions['adventurous'])
+            budget_desc = BUDGET_DESCRIPTIONS.get(budget, BUDGET_DESCRIPTIONS['medium'])
+            mood_desc = MOOD_DESCRIPTIONS.get(mood, MOOD_DESCRIPTIONS['adventurous'])
             
             # Enhanced prompt with real venue data
-            system_prompt = f"""You are a world-class travel planner creating personalized itineraries. 
-            Create an engaging {duration_hours}-hour itinerary for {location}.
-            
-            User preferences:
-            - Mood: {mood_desc}
-            - Budget: {budget_desc}
-            - Duration: {duration_hours} hours
-            
-            {f"Real venues available: {real_venues}" if real_venues else ""}
-            
-            Format your response as a JSON object with this structure:
-            {{
-                "activities": [
-                    {{
-                        "title": "Activity Name",
-                        "description": "Detailed description (50-100 words)",
-                        "location": "Specific address or neighborhood",
-                        "duration_minutes": 120,
-                        "estimated_cost": "$", "$$", or "$$$",
-                        "category": "category_name"
-                    }}
-                ],
-                "narrative_summary": "Engaging overview of the day (100-150 words)",
-                "total_estimated_cost": "Overall budget estimate"
-            }}
-            
-            Guidelines:
-            - Include 3-6 activities
-            - Use real places when possible
-            - Vary activity types and locations
-            - Consider travel time between activities
-            - Make descriptions engaging and specific
-            - Include practical details"""
+            system_prompt = ITINERARY_SYSTEM_PROMPT.format(
+                duration_hours=duration_hours,
+                location=location,
+                mood_desc=mood_desc,
+                budget_desc=budget_desc,
+                real_venues_line=f"Real venues available: {real_venues}" if real_venues else ""
+            )
 
             user_prompt = f"Create a perfect {duration_hours}-hour itinerary for {location} for someone who is {mood_desc} with a {budget_desc} budget."
 
@@ -125,18 +161,7 @@ class OpenAIIntegration:
         try:
             activities_text = "\n".join([f"- {activity}" for activity in activities])
             
-            system_prompt = """You are a creative travel journal writer. Create an engaging, personal journal recap of the user's day.
-            
-            Format your response as a JSON object with this structure:
-            {
-                "title": "Catchy title for the day",
-                "content": "Personal, reflective journal entry (200-300 words)",
-                "highlights": ["Top 3-5 memorable moments"],
-                "mood_score": 8,
-                "shareable_text": "Social media friendly summary (Twitter-length)"
-            }
-            
-            Make it personal, engaging, and capture the emotions and experiences of the day."""
+            system_prompt = JOURNAL_SYSTEM_PROMPT
 
             user_prompt = f"""Create a journal recap for this day:
             Location: {location or 'Unknown'}
@@ -154,16 +179,26 @@ class OpenAIIntegration:
     async def _make_openai_request(self, system_prompt: str, user_prompt: str) -> str:
         """Make request to OpenAI API"""
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=2000
-            )
-            return response.choices[0].message.content
+            with outbound_call("openai", "chat_completion"), circuit_breaker.guard():
+                async with concurrency_limiter.slot():
+                    started = time.perf_counter()
+                    response = await run_blocking(
+                        "openai",
+                        self.client.chat.completions.create,
+                        model=OPENAI_MODEL,
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": user_prompt}
+                        ],
+                        temperature=0.7,
+                        max_tokens=OPENAI_MAX_TOKENS,
+                        # Also bound the SDK's own request so the worker thread is freed
+                        timeout=call_timeout("openai")
+                    )
+                content = response.choices[0].message.content
+                usage = record_usage(OPENAI_MODEL, response.usage, time.perf_counter() - started, OPENAI_MAX_TOKENS)
+                set_attributes(result_count=len(response.choices), payload_bytes=len((content or "").encode()), **usage)
+            return content
         except Exception as e:
             logger.error(f"OpenAI API error: {e}")
             raise
@@ -300,5 +335,5 @@ class OpenAIIntegration:
             shareable_text=f"Amazing day in {location or 'the city'}! 🌟✈️"
         )
 
-# Create a singleton instance
-openai_integration = OpenAIIntegration()
+# Singleton, constructed on first use
+openai_integration = LazyIntegration("openai", OpenAIIntegration, required_env=("OPENAI_API_KEY",))
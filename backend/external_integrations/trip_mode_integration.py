@@ -7,13 +7,29 @@ import os
 from typing import List, Dict, Optional, Any
 from pydantic import BaseModel
 from datetime import date, datetime
-from amadeus import Client, ResponseError
 import logging
 
+from core.booking_store import new_booking_id
+from core.circuit_breaker import get_circuit_breaker
+from core.deadline import run_blocking
+from core.lazy import LazyIntegration
+from core.outbound import outbound_call
+from external_integrations.amadeus_integration import sdk_host_options, trace_response
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Set once by server.py through configure_booking_store(); bookings are not
+# persisted without it
+_booking_store = None
+
+
+def configure_booking_store(booking_store):
+    """Persist bookings (and de-duplicate retries) through a BookingStore"""
+    global _booking_store
+    _booking_store = booking_store
+
 # Pydantic Models for Trip Mode
 class FlightSegment(BaseModel):
     origin: str
@@ -58,6 +74,22 @@ class TripBookingRequest(BaseModel):
     hotel_id: Optional[str] = None
     guest_details: Dict[str, Any]
     total_price: float
+    user_id: Optional[str] = None
+    idempotency_key: Optional[str] = None  # client-generated; retries with the same key are no-ops
+
+# Production Amadeus credentials, so a separate breaker from the search integration
+circuit_breaker = get_circuit_breaker("trip_mode")
+
+# The Amadeus SDK is imported on first construction (see _import_sdk).
+# Until then ResponseError is a placeholder that matches nothing.
+Client = None
+
+class ResponseError(Exception):
+    pass
+
+def _import_sdk():
+    global Client, ResponseError
+    from amadeus import Client, ResponseError
 
 class TripModeIntegration:
     def __init__(self):
@@ -67,13 +99,20 @@ class TripModeIntegration:
         if not self.client_id or not self.client_secret:
             raise ValueError("Amadeus API credentials not found in environment variables")
         
+        _import_sdk()
         # Initialize Amadeus client
         self.amadeus = Client(
             client_id=self.client_id,
             client_secret=self.client_secret,
-            hostname='production'  # Use 'test' for testing
+            hostname='production',  # Use 'test' for testing
+            **sdk_host_options()
         )
-        
+
+    async def _call(self, method, *args, **params):
+        """Call an Amadeus endpoint under the trip mode circuit breaker"""
+        with outbound_call("trip_mode", type(method.__self__).__name__), circuit_breaker.guard():
+            return trace_response(await run_blocking("trip_mode", method, *args, **params))
+
     async def search_flights(self, request: FlightSearchRequest) -> List[FlightOffer]:
         """
         Search for flights using Amadeus Flight Offers Search API
@@ -83,7 +122,8 @@ class TripModeIntegration:
             
             if request.itinerary_type == "one-way":
                 segment = request.segments[0]
-                response = self.amadeus.shopping.flight_offers_search.get(
+                response = await self._call(
+                    self.amadeus.shopping.flight_offers_search.get,
                     originLocationCode=segment.origin,
                     destinationLocationCode=segment.destination,
                     departureDate=segment.departure_date,
@@ -99,7 +139,8 @@ class TripModeIntegration:
                 if not return_segment:
                     raise ValueError("Round-trip requires return segment")
                 
-                response = self.amadeus.shopping.flight_offers_search.get(
+                response = await self._call(
+                    self.amadeus.shopping.flight_offers_search.get,
                     originLocationCode=outbound.origin,
                     destinationLocationCode=outbound.destination,
                     departureDate=outbound.departure_date,
@@ -113,7 +154,8 @@ class TripModeIntegration:
                 # For multi-city, we'll handle the first segment for now
                 # Full multi-city requires more complex API calls
                 segment = request.segments[0]
-                response = self.amadeus.shopping.flight_offers_search.get(
+                response = await self._call(
+                    self.amadeus.shopping.flight_offers_search.get,
                     originLocationCode=segment.origin,
                     destinationLocationCode=segment.destination,
                     departureDate=segment.departure_date,
@@ -139,7 +181,8 @@ class TripModeIntegration:
             logger.info(f"Searching hotels in {request.location}")
             
             # First, get city code from location name
-            city_response = self.amadeus.reference_data.locations.get(
+            city_response = await self._call(
+                self.amadeus.reference_data.locations.get,
                 keyword=request.location,
                 subType='CITY'
             )
@@ -151,7 +194,8 @@ class TripModeIntegration:
             city_code = city_response.data[0]['iataCode']
             
             # Search for hotels
-            hotel_response = self.amadeus.shopping.hotel_offers.get(
+            hotel_response = await self._call(
+                self.amadeus.shopping.hotel_offers.get,
                 cityCode=city_code,
                 checkInDate=request.check_in,
                 checkOutDate=request.check_out,
@@ -173,7 +217,8 @@ class TripModeIntegration:
         Get detailed pricing for a specific flight offer
         """
         try:
-            response = self.amadeus.shopping.flight_offers.pricing.post(
+            response = await self._call(
+                self.amadeus.shopping.flight_offers.pricing.post,
                 {"data": {"type": "flight-offers-pricing", "flightOffers": [{"id": flight_id}]}}
             )
             return response.data
@@ -186,7 +231,7 @@ class TripModeIntegration:
         Get detailed information for a specific hotel
         """
         try:
-            response = self.amadeus.shopping.hotel_offers.get(hotelId=hotel_id)
+            response = await self._call(self.amadeus.shopping.hotel_offers.get, hotelId=hotel_id)
             return response.data
         except ResponseError as error:
             logger.error(f"Hotel details error: {error}")
@@ -292,59 +337,50 @@ class TripModeIntegration:
         
         return formatted_offers
     
-    async def create_flight_booking(self, booking_request: TripBookingRequest) -> Dict[str, Any]:
-        """
-        Create a flight booking (Note: This requires additional Amadeus booking API setup)
-        """
-        try:
-            # This is a simplified booking flow
-            # Real implementation requires Amadeus Flight Create Orders API
-            booking_id = f"DRIFT-FL-{datetime.now().strftime('%Y%m%d%H%M%S')}"
-            
-            booking_data = {
-                "booking_id": booking_id,
-                "type": "flight",
-                "status": "confirmed",
-                "flight_id": booking_request.flight_id,
-                "guest_details": booking_request.guest_details,
-                "total_price": booking_request.total_price,
-                "created_at": datetime.now().isoformat(),
-                "confirmation_number": f"DRIFT-{booking_id[-8:]}"
-            }
-            
-            logger.info(f"Flight booking created: {booking_id}")
-            return booking_data
-            
-        except Exception as e:
-            logger.error(f"Flight booking error: {str(e)}")
-            raise Exception(f"Failed to create flight booking: {str(e)}")
-    
-    async def create_hotel_booking(self, booking_request: TripBookingRequest) -> Dict[str, Any]:
-        """
-        Create a hotel booking (Note: This requires additional Amadeus booking API setup)
-        """
-        try:
-            # This is a simplified booking flow
-            # Real implementation requires Amadeus Hotel Booking API
-            booking_id = f"DRIFT-HT-{datetime.now().strftime('%Y%m%d%H%M%S')}"
-            
-            booking_data = {
-                "booking_id": booking_id,
-                "type": "hotel",
-                "status": "confirmed",
-                "hotel_id": booking_request.hotel_id,
-                "guest_details": booking_request.guest_details,
-                "total_price": booking_request.total_price,
-                "created_at": datetime.now().isoformat(),
-                "confirmation_number": f"DRIFT-{booking_id[-8:]}"
-            }
-            
-            logger.info(f"Hotel booking created: {booking_id}")
-            return booking_data
-            
-        except Exception as e:
-            logger.error(f"Hotel booking error: {str(e)}")
-            raise Exception(f"Failed to create hotel booking: {str(e)}")
 
-# Initialize the integration
-trip_mode_integration = TripModeIntegration()
\ No newline at end of file
+# Booking types: record id prefix and the request field naming the booked item
+BOOKING_TYPES = {
+    "flight": ("DRIFT-FL", "flight_id"),
+    "hotel": ("DRIFT-HT", "hotel_id"),
+}
+
+
+async def create_booking(booking_request: TripBookingRequest) -> Dict[str, Any]:
+    """
+    Create a flight or hotel booking, replaying any earlier booking with the
+    same idempotency key. This is a simplified flow that only records the
+    booking (a real one needs the Amadeus Flight Create Orders / Hotel Booking
+    APIs), so it does not need the Amadeus client or credentials.
+    """
+    if booking_request.trip_type not in BOOKING_TYPES:
+        raise ValueError(f"Unsupported trip_type {booking_request.trip_type!r}")
+    id_prefix, item_field = BOOKING_TYPES[booking_request.trip_type]
+
+    if _booking_store and booking_request.idempotency_key:
+        existing = await _booking_store.find_by_idempotency_key(booking_request.idempotency_key)
+        if existing:
+            return existing
+
+    booking_id = new_booking_id(id_prefix)
+    booking_data = {
+        "booking_id": booking_id,
+        "type": booking_request.trip_type,
+        "status": "confirmed",
+        item_field: getattr(booking_request, item_field),
+        "guest_details": booking_request.guest_details,
+        "total_price": booking_request.total_price,
+        "created_at": datetime.utcnow(),
+        "confirmation_number": f"DRIFT-{booking_id[-8:]}"
+    }
+    if not _booking_store:
+        return booking_data
+
+    booking_data["user_id"] = booking_request.user_id
+    if booking_request.idempotency_key:
+        booking_data["idempotency_key"] = booking_request.idempotency_key
+    booking = await _booking_store.create(booking_data)
+    logger.info(f"{booking_request.trip_type.capitalize()} booking created: {booking['booking_id']}")
+    return booking
+
+# Initialize the integration on first use
+trip_mode_integration = LazyIntegration("trip_mode", TripModeIntegration, required_env=("AMADEUS_CLIENT_ID", "AMADEUS_CLIENT_SECRET"))
\ No newline at end of file
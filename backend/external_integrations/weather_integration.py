@@ -1,12 +1,29 @@
 import asyncio
-import aiohttp
+import json
 import logging
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from datetime import datetime
+import os
+
+from core.cache import get_cache
+from core.circuit_breaker import get_circuit_breaker
+from core.deadline import wait_bounded
+from core.errors import CallRejected
+from core.lazy import LazyIntegration
+from core.outbound import outbound_call
+from core.rate_limit import get_rate_limiter, parse_retry_after
+from core.tracing import set_attributes
 
 logger = logging.getLogger(__name__)
 
+# Raw Open-Meteo payloads keyed on a ~1km coordinate grid
+current_weather_cache = get_cache("weather_current", ttl_seconds=int(os.getenv("CACHE_TTL_WEATHER_CURRENT", "600")), max_entries=1024)
+forecast_cache = get_cache("weather_forecast", ttl_seconds=int(os.getenv("CACHE_TTL_WEATHER_FORECAST", "3600")), max_entries=1024)
+
+rate_limiter = get_rate_limiter("weather")
+circuit_breaker = get_circuit_breaker("weather")
+
 # Pydantic models
 class WeatherData(BaseModel):
     temperature: float
@@ -31,39 +48,45 @@ class WeatherForecast(BaseModel):
     precipitation_sum: float
     wind_speed_max: float
 
+# WMO weather interpretation codes, built once at import
+WEATHER_CODES = {
+    0: "Clear sky",
+    1: "Mainly clear",
+    2: "Partly cloudy",
+    3: "Overcast",
+    45: "Fog",
+    48: "Depositing rime fog",
+    51: "Light drizzle",
+    53: "Moderate drizzle",
+    55: "Dense drizzle",
+    56: "Light freezing drizzle",
+    57: "Dense freezing drizzle",
+    61: "Slight rain",
+    63: "Moderate rain",
+    65: "Heavy rain",
+    66: "Light freezing rain",
+    67: "Heavy freezing rain",
+    71: "Slight snow fall",
+    73: "Moderate snow fall",
+    75: "Heavy snow fall",
+    77: "Snow grains",
+    80: "Slight rain showers",
+    81: "Moderate rain showers",
+    82: "Violent rain showers",
+    85: "Slight snow showers",
+    86: "Heavy snow showers",
+    95: "Thunderstorm",
+    96: "Thunderstorm with slight hail",
+    99: "Thunderstorm with heavy hail"
+}
+
 class WeatherIntegration:
     def __init__(self):
-        self.base_url = "https://api.open-meteo.com/v1"
-        self.weather_codes = {
-            0: "Clear sky",
-            1: "Mainly clear",
-            2: "Partly cloudy",
-            3: "Overcast",
-            45: "Fog",
-            48: "Depositing rime fog",
-            51: "Light drizzle",
-            53: "Moderate drizzle",
-            55: "Dense drizzle",
-            56: "Light freezing drizzle",
-            57: "Dense freezing drizzle",
-            61: "Slight rain",
-            63: "Moderate rain",
-            65: "Heavy rain",
-            66: "Light freezing rain",
-            67: "Heavy freezing rain",
-            71: "Slight snow fall",
-            73: "Moderate snow fall",
-            75: "Heavy snow fall",
-            77: "Snow grains",
-            80: "Slight rain showers",
-            81: "Moderate rain showers",
-            82: "Violent rain showers",
-            85: "Slight snow showers",
-            86: "Heavy snow showers",
-            95: "Thunderstorm",
-            96: "Thunderstorm with slight hail",
-            99: "Thunderstorm with heavy hail"
-        }
+        self.base_url = os.getenv("OPEN_METEO_BASE_URL", "https://api.open-meteo.com/v1")
+        # Shared keep-alive connection pool, opened by open() in the app lifespan
+        self._session = None
+        self.pool_size = int(os.getenv("WEATHER_HTTP_POOL_SIZE", "20"))
+        self.weather_codes = WEATHER_CODES
 
     async def get_current_weather(self, latitude: float, longitude: float) -> WeatherData:
         """Get current weather for given coordinates"""
@@ -77,14 +100,12 @@ class WeatherIntegration:
                 'timezone': 'auto'
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._parse_current_weather(data)
-                    else:
-                        raise Exception(f"Weather API returned status {response.status}")
-                        
+            cache_key = f"{round(float(latitude), 2)},{round(float(longitude), 2)}"
+            data = await current_weather_cache.get_or_load(cache_key, lambda: self._fetch(url, params, "current"))
+            return self._parse_current_weather(data)
+
+        except CallRejected:
+            raise
         except Exception as e:
             logger.error(f"Current weather fetch error: {e}")
             raise Exception(f"Failed to fetch current weather: {str(e)}")
@@ -101,18 +122,46 @@ class WeatherIntegration:
                 'forecast_days': int(days)
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._parse_forecast_data(data)
-                    else:
-                        raise Exception(f"Weather API returned status {response.status}")
-                        
+            cache_key = f"{round(float(latitude), 2)},{round(float(longitude), 2)}:{int(days)}"
+            data = await forecast_cache.get_or_load(cache_key, lambda: self._fetch(url, params, "forecast"))
+            return self._parse_forecast_data(data)
+
+        except CallRejected:
+            raise
         except Exception as e:
             logger.error(f"Weather forecast fetch error: {e}")
             raise Exception(f"Failed to fetch weather forecast: {str(e)}")
 
+    async def open(self):
+        """Open the shared HTTP connection pool"""
+        import aiohttp  # deferred: only needed once weather is used
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size))
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _fetch(self, url: str, params: Dict[str, Any], operation: str) -> Dict[str, Any]:
+        """GET an Open-Meteo endpoint and return the JSON body"""
+        if self._session is None or self._session.closed:
+            await self.open()
+        async def get():
+            async with self._session.get(url, params=params) as response:
+                if response.status == 200:
+                    body = await response.read()
+                    set_attributes(payload_bytes=len(body))
+                    return json.loads(body)
+                if response.status == 429:
+                    raise rate_limiter.throttled(parse_retry_after(response.headers.get("Retry-After")))
+                response.raise_for_status()
+                raise Exception(f"Weather API returned status {response.status}")
+
+        with outbound_call("weather", operation), circuit_breaker.guard():
+            await rate_limiter.acquire()
+            return await wait_bounded("weather", get)
+
     def _parse_current_weather(self, data: Dict[str, Any]) -> WeatherData:
         """Parse current weather data from API response and convert temperature to Fahrenheit"""
         try:
@@ -213,5 +262,5 @@ class WeatherIntegration:
                 )
             ]
 
-# Create a singleton instance
-weather_integration = WeatherIntegration()
+# Singleton, constructed on first use
+weather_integration = LazyIntegration("weather", WeatherIntegration)
@@ -0,0 +1,30 @@
+"""
+Gunicorn settings for multi-worker serving (`gunicorn -c gunicorn.conf.py server:app`).
+
+The app is imported once in the master (preload_app) so read-only data built
+at import - airport index, weather codes, prompt templates - is shared
+copy-on-write by every forked worker. Nothing touches the network before the
+fork: Motor connects lazily, and each worker opens its own Mongo and HTTP
+pools in the app lifespan.
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8001")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+# The app reads this to split per-provider rate limits across workers
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("WORKER_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+
+def when_ready(server):
+    # Move everything allocated during preload into the permanent generation
+    # so the garbage collector in each worker doesn't dirty the shared pages
+    gc.freeze()
+    server.log.info(f"Preloaded app, starting {workers} workers")
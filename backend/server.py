@@ -1,12 +1,21 @@
+import time
+_import_started = time.perf_counter()
+
 import os
 import sys
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import uuid
+import json
+import math
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 import logging
 
@@ -42,12 +51,78 @@ from external_integrations.weather_integration import (
 )
 from external_integrations.foursquare_integration import foursquare_integration
 from external_integrations.eventbrite_integration import eventbrite_integration
+from external_integrations.trip_mode_integration import BOOKING_TYPES, configure_booking_store, create_booking as create_trip_booking, TripBookingRequest
+from core.jobs import JobManager, JobQueueFull
+from core.trip_store import TripStore
+from core.health import CachedPing, PoolStatsListener
+from core.write_buffer import WriteBuffer, WriteBufferFull, write_buffer_stats
+from core.cache import MongoCacheBackend, cache_report, cache_stats, configure_shared_backend, get_cache_namespace
+from core.booking_store import BookingStore
+from core.lazy import IntegrationUnavailable, get_integration, integration_status
+from core.llm_usage import llm_usage_stats
+from core.loop_monitor import LOOP_LAG_MONITOR, loop_monitor
+from core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, render_metrics, route_scope
+from core.circuit_breaker import circuit_stats
+from core.concurrency import concurrency_stats
+from core.deadline import DeadlineExceeded, request_deadline
+from core.errors import CallRejected
+from core.hedging import hedge_stats
+from core.profiling import PROFILE_ID_HEADER, ProfilingMiddleware, folded, profile_store, pstats_dump, pstats_text
+from core.rate_limit import rate_limiter_stats
+from core.server_timing import HEADER as SERVER_TIMING_HEADER, server_timing, timed
+from core.startup import measure_import, startup_profile
+from core.tracing import TracingMiddleware, tracer_stats
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="DRIFT Travel API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Readiness stays red until every step below has finished
+    with startup_profile.phase("lifespan:mongo"):
+        ping = await db_ping.check()
+        if not ping["ok"]:
+            logger.error(f"MongoDB not reachable at startup: {ping['error']}")
+    with startup_profile.phase("lifespan:indexes"):
+        await trip_store.ensure_indexes()
+        await booking_store.ensure_indexes()
+    with startup_profile.phase("lifespan:write_buffers"):
+        await status_buffer.start()
+        await analytics_buffer.start()
+    with startup_profile.phase("lifespan:job_manager"):
+        await job_manager.start()
+    with startup_profile.phase("lifespan:integration_pools"):
+        await weather_integration.open()
+        # Optionally build provider clients now rather than on the first request
+        for name in WARMUP_INTEGRATIONS:
+            integration = get_integration(name)
+            if integration:
+                try:
+                    integration.get()
+                except IntegrationUnavailable:
+                    pass  # logged by get(); its endpoints answer 503
+    with startup_profile.phase("lifespan:cache_preload"):
+        for namespace in CACHE_PRELOAD_NAMESPACES:
+            cache = get_cache_namespace(namespace)
+            if cache:
+                loaded = await cache.preload()
+                logger.info(f"Preloaded {loaded} {namespace} cache entries")
+    if LOOP_LAG_MONITOR:
+        loop_monitor.start()
+    startup_profile.mark_ready()
+    yield
+    startup_profile.mark_stopping()
+    await loop_monitor.stop()
+    await job_manager.stop()
+    # Drain buffered writes before the Mongo client goes away
+    await status_buffer.stop()
+    await analytics_buffer.stop()
+    await weather_integration.close()
+
+app = FastAPI(title="DRIFT Travel API", version="1.0.0", lifespan=lifespan)
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 
 # CORS configuration
 app.add_middleware(
@@ -56,14 +131,138 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the web app read per-stage planner timings
+    expose_headers=[SERVER_TIMING_HEADER, PROFILE_ID_HEADER],
 )
+# Request spans when TRACE_EXPORT is set (core/tracing.py)
+app.add_middleware(TracingMiddleware)
+# Admin-only: X-Debug-Profile: sample|cprofile profiles that one request
+app.add_middleware(ProfilingMiddleware, admin_token=ADMIN_TOKEN)
+# Outermost, so the recorded latency covers the whole middleware stack
+app.add_middleware(MetricsMiddleware)
 
 # MongoDB configuration
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "drift_travel")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "20000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+HEALTH_PING_CACHE_SECONDS = float(os.getenv("HEALTH_PING_CACHE_SECONDS", "2"))
 
-client = AsyncIOMotorClient(MONGO_URL)
+pool_stats = PoolStatsListener()
+client = AsyncIOMotorClient(
+    MONGO_URL,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+    connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+    waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    event_listeners=[pool_stats]
+)
 db = client[DB_NAME]
+db_ping = CachedPing(client, ttl_seconds=HEALTH_PING_CACHE_SECONDS)
+
+# Shared L2 cache behind the integrations' per-process LRUs
+if os.getenv("SHARED_CACHE_ENABLED", "true").lower() == "true":
+    configure_shared_backend(MongoCacheBackend(db))
+# Integrations constructed in each worker's lifespan, e.g. "openai,google_places"
+WARMUP_INTEGRATIONS = [name.strip() for name in os.getenv("WARMUP_INTEGRATIONS", "").split(",") if name.strip()]
+# Shared-cache namespaces copied into the local LRU before the worker reports ready
+CACHE_PRELOAD_NAMESPACES = [
+    namespace.strip()
+    for namespace in os.getenv("CACHE_PRELOAD_NAMESPACES", "amadeus_locations").split(",")
+    if namespace.strip()
+]
+
+# Buffered writes: batched into insert_many by size or time, TTL-expired
+WRITE_BUFFER_MAX_BATCH = int(os.getenv("WRITE_BUFFER_MAX_BATCH", "500"))
+WRITE_BUFFER_FLUSH_INTERVAL = float(os.getenv("WRITE_BUFFER_FLUSH_INTERVAL", "1.0"))
+WRITE_BUFFER_MAX_PENDING = int(os.getenv("WRITE_BUFFER_MAX_PENDING", "10000"))
+STATUS_CHECK_TTL_SECONDS = int(os.getenv("STATUS_CHECK_TTL_SECONDS", str(7 * 24 * 3600)))
+ANALYTICS_TTL_SECONDS = int(os.getenv("ANALYTICS_TTL_SECONDS", str(30 * 24 * 3600)))
+# Analytics only waits briefly for buffer space so it never holds up a request
+ANALYTICS_PUT_TIMEOUT = float(os.getenv("ANALYTICS_PUT_TIMEOUT", "0.05"))
+
+status_buffer = WriteBuffer(
+    db.status_checks,
+    max_batch=WRITE_BUFFER_MAX_BATCH,
+    flush_interval=WRITE_BUFFER_FLUSH_INTERVAL,
+    max_pending=WRITE_BUFFER_MAX_PENDING,
+    ttl_field="timestamp",
+    ttl_seconds=STATUS_CHECK_TTL_SECONDS
+)
+analytics_buffer = WriteBuffer(
+    db.analytics_events,
+    max_batch=WRITE_BUFFER_MAX_BATCH,
+    flush_interval=WRITE_BUFFER_FLUSH_INTERVAL,
+    max_pending=WRITE_BUFFER_MAX_PENDING,
+    ttl_field="timestamp",
+    ttl_seconds=ANALYTICS_TTL_SECONDS
+)
+
+async def record_event(event: str, properties: Dict[str, Any]):
+    """Queue a planner/search analytics event; dropped if the buffer stays full"""
+    try:
+        await analytics_buffer.put(
+            {"event": event, "properties": properties, "timestamp": datetime.utcnow()},
+            timeout=ANALYTICS_PUT_TIMEOUT
+        )
+    except WriteBufferFull:
+        logger.warning(f"Analytics buffer full, dropping {event} event")
+trip_store = TripStore(db)
+booking_store = BookingStore(db)
+configure_booking_store(booking_store)
+
+def require_integrations(*names: str):
+    """Route dependency: 503 when a provider the endpoint needs is misconfigured"""
+    async def check():
+        for name in names:
+            try:
+                get_integration(name).get()
+            except IntegrationUnavailable as e:
+                raise HTTPException(status_code=503, detail=str(e))
+    return check
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Debug/admin routes are hidden unless ADMIN_TOKEN is set and presented"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+def provider_rejected(e: CallRejected) -> HTTPException:
+    """503 with Retry-After for a provider call shed by its rate limiter or circuit breaker"""
+    if isinstance(e, DeadlineExceeded):
+        return HTTPException(status_code=504, detail=str(e))
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))})
+
+@app.exception_handler(CallRejected)
+async def call_rejected_handler(request: Request, e: CallRejected):
+    """Provider calls refused by a guard surface as 503 + Retry-After (504 past the deadline)"""
+    error = provider_rejected(e)
+    return JSONResponse({"detail": error.detail}, status_code=error.status_code, headers=error.headers)
+
+def with_server_timing(error: HTTPException, timing) -> HTTPException:
+    """Attach the stage breakdown to a planner error, so a timeout shows where the time went"""
+    error.headers = {**(error.headers or {}), SERVER_TIMING_HEADER: timing.header()}
+    return error
+
+# Time budgets for the composite planners; clients may ask for less (or more,
+# up to the max) with an X-Request-Timeout-Ms header
+HERE_NOW_DEADLINE_SECONDS = float(os.getenv("HERE_NOW_DEADLINE_SECONDS", "20"))
+TRIP_PLAN_DEADLINE_SECONDS = float(os.getenv("TRIP_PLAN_DEADLINE_SECONDS", "120"))
+REQUEST_DEADLINE_MAX_SECONDS = float(os.getenv("REQUEST_DEADLINE_MAX_SECONDS", "300"))
+
+def deadline_for(raw_request: Request, timeout_ms: Optional[int], default_seconds: float):
+    """Deadline scope for a route: header budget or the route default, cancelled on client disconnect"""
+    seconds = default_seconds if timeout_ms is None or timeout_ms <= 0 else timeout_ms / 1000
+    return request_deadline(min(seconds, REQUEST_DEADLINE_MAX_SECONDS), raw_request.is_disconnected)
 
 # Pydantic models
 class StatusCheck(BaseModel):
@@ -85,17 +284,41 @@ class TripPlanRequest(BaseModel):
     budget: float
     travelers: Dict[str, int]
     preferences: Dict[str, Any]
+    user_id: Optional[str] = None
 
 # Status endpoints
 @app.get("/api/status")
 async def get_status():
-    try:
-        # Test database connection
-        await db.list_collection_names()
-        return {"status": "healthy", "timestamp": datetime.now(), "database": "connected"}
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
+    ping = await db_ping.check()
+    if not ping["ok"]:
         raise HTTPException(status_code=500, detail="Service unavailable")
+    return {"status": "healthy", "timestamp": datetime.now(), "database": "connected"}
+
+@app.get("/api/health/live")
+async def liveness():
+    """Liveness probe: the process is up and serving, no dependencies touched"""
+    return {"status": "alive"}
+
+@app.get("/api/health/ready")
+async def readiness():
+    """
+    Readiness probe: green once the lifespan startup has finished (Mongo,
+    integration pools, cache preload) and the cached MongoDB ping succeeds.
+    """
+    ping = await db_ping.check()
+    ready = startup_profile.is_ready and ping["ok"]
+    body = {
+        "status": "ready" if ready else "unavailable",
+        "startup": {
+            "complete": startup_profile.is_ready,
+            "seconds_to_ready": startup_profile.report()["seconds_to_ready"]
+        },
+        "database": ping,
+        "pool": pool_stats.snapshot(MONGO_MAX_POOL_SIZE),
+        # Informational: a missing provider only disables its own endpoints
+        "integrations": integration_status()
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=jsonable_encoder(body))
 
 @app.post("/api/status")
 async def create_status_check(status_data: StatusCheck):
@@ -104,37 +327,43 @@ async def create_status_check(status_data: StatusCheck):
         status_doc = {
             "id": str(uuid.uuid4()),
             "status": status_data.status,
-            "timestamp": datetime.now(),
+            "timestamp": datetime.utcnow(),
             "message": status_data.message
         }
         
-        result = await db.status_checks.insert_one(status_doc)
+        await status_buffer.put(status_doc)
         return {"success": True, "id": status_doc["id"]}
+    except WriteBufferFull:
+        raise HTTPException(status_code=503, detail="Status check queue is full, try again shortly")
     except Exception as e:
         logger.error(f"Failed to create status check: {e}")
         raise HTTPException(status_code=500, detail="Failed to create status check")
 
 # Weather endpoints
-@app.get("/api/weather/current")
+@app.get("/api/weather/current", dependencies=[Depends(require_integrations("weather"))])
 async def get_current_weather(lat: float, lon: float):
     try:
         weather_data = await weather_integration.get_current_weather(lat, lon)
         return {"success": True, "weather": weather_data}
+    except CallRejected:
+        raise
     except Exception as e:
         logger.error(f"Weather fetch error: {e}")
         raise HTTPException(status_code=500, detail=f"Weather fetch failed: {str(e)}")
 
-@app.get("/api/weather/forecast")
+@app.get("/api/weather/forecast", dependencies=[Depends(require_integrations("weather"))])
 async def get_weather_forecast(lat: float, lon: float, days: int = 5):
     try:
         forecast_data = await weather_integration.get_weather_forecast(lat, lon, days)
         return {"success": True, "forecast": forecast_data}
+    except CallRejected:
+        raise
     except Exception as e:
         logger.error(f"Forecast fetch error: {e}")
         raise HTTPException(status_code=500, detail=f"Forecast fetch failed: {str(e)}")
 
 # AI endpoints
-@app.post("/api/ai/generate-itinerary")
+@app.post("/api/ai/generate-itinerary", dependencies=[Depends(require_integrations("openai"))])
 async def generate_itinerary(request: Dict[str, Any]):
     try:
         location = request.get('location')
@@ -151,13 +380,27 @@ async def generate_itinerary(request: Dict[str, Any]):
             budget=budget,
             duration_hours=duration_hours
         )
+
+        itinerary_id = None
+        try:
+            itinerary_id = await trip_store.save_itinerary(
+                location=location,
+                itinerary=jsonable_encoder(itinerary),
+                user_id=request.get('user_id'),
+                date=request.get('date'),
+                preferences={"mood": mood, "budget": budget, "duration_hours": duration_hours}
+            )
+        except Exception as e:
+            logger.warning(f"Failed to persist itinerary for {location}: {e}")
         
-        return {"success": True, "itinerary": itinerary}
+        return {"success": True, "itinerary": itinerary, "itinerary_id": itinerary_id}
+    except CallRejected:
+        raise
     except Exception as e:
         logger.error(f"Itinerary generation error: {e}")
         raise HTTPException(status_code=500, detail=f"Itinerary generation failed: {str(e)}")
 
-@app.post("/api/ai/generate-journal-recap")
+@app.post("/api/ai/generate-journal-recap", dependencies=[Depends(require_integrations("openai"))])
 async def generate_journal_recap(request: Dict[str, Any]):
     try:
         activities = request.get('activities', [])
@@ -174,12 +417,14 @@ async def generate_journal_recap(request: Dict[str, Any]):
         )
         
         return {"success": True, "journal_recap": journal_recap}
+    except CallRejected:
+        raise
     except Exception as e:
         logger.error(f"Journal recap generation error: {e}")
         raise HTTPException(status_code=500, detail=f"Journal recap generation failed: {str(e)}")
 
 # Places endpoints
-@app.post("/api/places/search")
+@app.post("/api/places/search", dependencies=[Depends(require_integrations("google_places"))])
 async def search_places(request: Dict[str, Any]):
     try:
         query = request.get('query')
@@ -197,14 +442,17 @@ async def search_places(request: Dict[str, Any]):
             place_type=place_type
         )
         
+        await record_event("places_search", {"query": query, "location": location, "type": place_type, "results": len(places)})
         return {"success": True, "places": places, "count": len(places)}
+    except CallRejected:
+        raise
     except Exception as e:
         logger.error(f"Places search error: {e}")
         raise HTTPException(status_code=500, detail=f"Places search failed: {str(e)}")
 
 
 # Location Search Endpoints (Amadeus)
-@app.get("/api/locations/airports", summary="Search for airports by keyword", tags=["Locations"])
+@app.get("/api/locations/airports", summary="Search for airports by keyword", tags=["Locations"], dependencies=[Depends(require_integrations("amadeus"))])
 async def get_airports_by_keyword(keyword: str):
     """
     Search for airports using the Amadeus API based on a keyword.
@@ -217,6 +465,8 @@ async def get_airports_by_keyword(keyword: str):
         airports_data = await amadeus_integration.search_airports(keyword=keyword)
         # amadeus_integration.search_airports typically returns an empty list on API error or no results.
         return {"success": True, "airports": airports_data, "count": len(airports_data)}
+    except CallRejected:
+        raise
     except Exception as e:
         # This catches errors if amadeus_integration itself is not initialized (e.g. missing keys at startup)
         # or other unexpected issues not caught within search_airports.
@@ -228,7 +478,7 @@ async def get_airports_by_keyword(keyword: str):
             status_code = 503 # Service Unavailable, often due to config/auth issues
         raise HTTPException(status_code=status_code, detail=detail_msg)
 
-@app.get("/api/locations/cities", summary="Search for cities by keyword", tags=["Locations"])
+@app.get("/api/locations/cities", summary="Search for cities by keyword", tags=["Locations"], dependencies=[Depends(require_integrations("amadeus"))])
 async def get_cities_by_keyword(keyword: str):
     """
     Search for cities using the Amadeus API based on a keyword.
@@ -239,6 +489,8 @@ async def get_cities_by_keyword(keyword: str):
     try:
         cities_data = await amadeus_integration.search_cities(keyword=keyword)
         return {"success": True, "cities": cities_data, "count": len(cities_data)}
+    except CallRejected:
+        raise
     except Exception as e:
         logger.error(f"Error in /api/locations/cities for keyword '{keyword}': {str(e)}")
         detail_msg = "Failed to search cities. Check server logs and Amadeus API key configuration."
@@ -249,16 +501,18 @@ async def get_cities_by_keyword(keyword: str):
         raise HTTPException(status_code=status_code, detail=detail_msg)
 
 
-@app.get("/api/places/details")
+@app.get("/api/places/details", dependencies=[Depends(require_integrations("google_places"))])
 async def get_place_details(place_id: str):
     try:
         place_details = await google_places_integration.get_place_details(place_id)
         return {"success": True, "place": place_details}
+    except CallRejected:
+        raise
     except Exception as e:
         logger.error(f"Place details error: {e}")
         raise HTTPException(status_code=500, detail=f"Place details failed: {str(e)}")
 
-@app.post("/api/places/nearby")
+@app.post("/api/places/nearby", dependencies=[Depends(require_integrations("google_places"))])
 async def get_nearby_places(request: Dict[str, Any]):
     try:
         latitude = request.get('latitude')
@@ -277,11 +531,13 @@ async def get_nearby_places(request: Dict[str, Any]):
         )
         
         return {"success": True, "places": places, "count": len(places)}
+    except CallRejected:
+        raise
     except Exception as e:
         logger.error(f"Nearby places error: {e}")
         raise HTTPException(status_code=500, detail=f"Nearby places failed: {str(e)}")
 
-@app.post("/api/places/geocode")
+@app.post("/api/places/geocode", dependencies=[Depends(require_integrations("google_places"))])
 async def geocode_location(request: Dict[str, Any]):
     try:
         address = request.get('address')
@@ -291,12 +547,14 @@ async def geocode_location(request: Dict[str, Any]):
         
         location_info = await google_places_integration.geocode_location(address)
         return {"success": True, "location": location_info}
+    except CallRejected:
+        raise
     except Exception as e:
         logger.error(f"Geocoding error: {e}")
         raise HTTPException(status_code=500, detail=f"Geocoding failed: {str(e)}")
 
 # Flight search endpoints
-@app.post("/api/flights/search-smart")
+@app.post("/api/flights/search-smart", dependencies=[Depends(require_integrations("amadeus"))])
 async def search_smart_flights(request: Dict[str, Any]):
     """
     Enhanced flight search with smart features like sustainability, budget intelligence, etc.
@@ -349,6 +607,12 @@ async def search_smart_flights(request: Dict[str, Any]):
         if smart_features.get('sustainabilityMode'):
             carbon_data = calculate_trip_carbon_impact(enhanced_flights)
         
+        await record_event("flight_search", {
+            "mode": "smart",
+            "origin": search_data['origin'],
+            "destination": search_data['destination'],
+            "results": len(enhanced_flights)
+        })
         return {
             "success": True,
             "flights": enhanced_flights,
@@ -357,20 +621,30 @@ async def search_smart_flights(request: Dict[str, Any]):
             "smart_features_applied": smart_features
         }
         
+    except CallRejected:
+        raise
     except Exception as e:
         logger.error(f"Smart flight search error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Smart flight search failed: {str(e)}")
 
-@app.post("/api/flights/search")
+@app.post("/api/flights/search", dependencies=[Depends(require_integrations("amadeus"))])
 async def search_flights(request: FlightSearchRequest):
     try:
         flights = await amadeus_integration.search_flights(request)
+        await record_event("flight_search", {
+            "mode": "standard",
+            "origin": request.origin,
+            "destination": request.destination,
+            "results": len(flights)
+        })
         return {"success": True, "flights": flights}
+    except CallRejected:
+        raise
     except Exception as e:
         logger.error(f"Flight search error: {e}")
         raise HTTPException(status_code=500, detail=f"Flight search failed: {str(e)}")
 
-@app.post("/api/flights/flexible-search")
+@app.post("/api/flights/flexible-search", dependencies=[Depends(require_integrations("amadeus"))])
 async def flexible_flight_search(request: Dict[str, Any]):
     try:
         origin = request.get('origin')
@@ -388,12 +662,14 @@ async def flexible_flight_search(request: Dict[str, Any]):
         )
         
         return {"success": True, "flights": flights}
+    except CallRejected:
+        raise
     except Exception as e:
         logger.error(f"Flexible flight search error: {e}")
         raise HTTPException(status_code=500, detail=f"Flexible flight search failed: {str(e)}")
 
 # Hotel search endpoints
-@app.post("/api/hotels/search")
+@app.post("/api/hotels/search", dependencies=[Depends(require_integrations("amadeus"))])
 async def search_hotels(request: Dict[str, Any]):
     try:
         location = request.get('location')
@@ -409,48 +685,74 @@ async def search_hotels(request: Dict[str, Any]):
         )
         
         hotels = await amadeus_integration.search_hotels(hotel_request)
+        await record_event("hotel_search", {"location": location, "guests": guests, "results": len(hotels)})
         return {"success": True, "hotels": hotels}
+    except CallRejected:
+        raise
     except Exception as e:
         logger.error(f"Hotel search error: {e}")
         raise HTTPException(status_code=500, detail=f"Hotel search failed: {str(e)}")
 
 # Airport and city search endpoints
-@app.get("/api/amadeus/search-airports")
+@app.get("/api/amadeus/search-airports", dependencies=[Depends(require_integrations("amadeus"))])
 async def search_airports(keyword: str):
     try:
         airports = await amadeus_integration.search_airports(keyword)
         return {"success": True, "airports": airports}
+    except CallRejected:
+        raise
     except Exception as e:
         logger.error(f"Airport search error: {e}")
         raise HTTPException(status_code=500, detail=f"Airport search failed: {str(e)}")
 
-@app.get("/api/amadeus/search-cities")
+@app.get("/api/amadeus/search-cities", dependencies=[Depends(require_integrations("amadeus"))])
 async def search_cities(keyword: str):
     try:
         cities = await amadeus_integration.search_cities(keyword)
         return {"success": True, "cities": cities}
+    except CallRejected:
+        raise
     except Exception as e:
         logger.error(f"City search error: {e}")
         raise HTTPException(status_code=500, detail=f"City search failed: {str(e)}")
 
-# Here-Now planning endpoint
-@app.post("/api/here-now/plan")
-async def create_here_now_plan(request: HereNowRequest):
-    try:
-        # Step 1: Get location coordinates
+# Here-Now planning
+async def build_here_now_plan(request: HereNowRequest) -> Dict[str, Any]:
+    """Geocode, weather, venues and an OpenAI overview for a here-now request"""
+    # Step 1: Get location coordinates
+    with timed("geocode"):
         location_info = await google_places_integration.geocode_location(request.location)
-        lat = location_info.coordinates['lat']
-        lon = location_info.coordinates['lng']
-        # Step 2: Get current weather
+    lat = location_info.coordinates['lat']
+    lon = location_info.coordinates['lng']
+    # Step 2: Get current weather
+    with timed("weather"):
         weather_data = await weather_integration.get_current_weather(lat, lon)
-        # Step 3: Get data for each category using exact coordinates
-        dining = await foursquare_integration.get_restaurants_with_photos(lat, lon, limit=5)
-        events = await eventbrite_integration.get_local_events(lat, lon, limit=5)
+    # Step 3: Get data for each category using exact coordinates
+    # Dining and events are optional sections; skip them (and say so) if the
+    # provider is not configured, over its rate limit or failing fast
+    degraded = []
+    try:
+        with timed("foursquare"):
+            dining = await foursquare_integration.get_restaurants_with_photos(lat, lon, limit=5)
+    except (IntegrationUnavailable, CallRejected) as e:
+        logger.warning(str(e))
+        dining = []
+        degraded.append("dining")
+    try:
+        with timed("eventbrite"):
+            events = await eventbrite_integration.get_local_events(lat, lon, limit=5)
+    except (IntegrationUnavailable, CallRejected) as e:
+        logger.warning(str(e))
+        events = []
+        degraded.append("events")
+    with timed("places-attractions"):
         attractions = await google_places_integration.get_nearby_places(lat, lon, place_type='tourist_attraction', radius=5000)
+    with timed("places-fun"):
         fun = await google_places_integration.get_nearby_places(lat, lon, place_type='amusement_park', radius=5000)
 
-        # Step 4: Generate an overview with OpenAI
-        overview_prompt = f"Create a short, exciting overview for a {request.duration_hours}-hour trip in {request.location} with a {request.mood} mood and a {request.budget} budget. The weather is {weather_data.description} at {weather_data.temperature}°F."
+    # Step 4: Generate an overview with OpenAI
+    overview_prompt = f"Create a short, exciting overview for a {request.duration_hours}-hour trip in {request.location} with a {request.mood} mood and a {request.budget} budget. The weather is {weather_data.description} at {weather_data.temperature}°F."
+    with timed("openai"):
         overview = await openai_integration.generate_itinerary(
             location=request.location,
             mood=request.mood,
@@ -459,114 +761,357 @@ async def create_here_now_plan(request: HereNowRequest):
             real_venues=overview_prompt
         )
 
-        # Step 5: Structure the itinerary
-        structured_itinerary = {
-            "overview": overview,
-            "dining": dining,
-            "events": events,
-            "attractions": attractions,
-            "fun": fun
-        }
-        
-        return {
-            "success": True,
-            "location_info": location_info,
-            "weather": weather_data,
-            "itinerary": structured_itinerary
-        }
-        
+    # Step 5: Structure the itinerary
+    structured_itinerary = {
+        "overview": overview,
+        "dining": dining,
+        "events": events,
+        "attractions": attractions,
+        "fun": fun
+    }
+    return {
+        "success": True,
+        "location_info": location_info,
+        "weather": weather_data,
+        "itinerary": structured_itinerary,
+        "degraded_sections": degraded
+    }
+
+@app.post("/api/here-now/plan", dependencies=[Depends(require_integrations("google_places", "weather", "openai"))])
+async def create_here_now_plan(
+    request: HereNowRequest,
+    raw_request: Request,
+    response: Response,
+    x_request_timeout_ms: Optional[int] = Header(None),
+    timings: bool = False,
+):
+    """Build a here-now plan; `?timings=true` adds the per-stage breakdown from the Server-Timing header"""
+    try:
+        with server_timing() as timing:
+            async with deadline_for(raw_request, x_request_timeout_ms, HERE_NOW_DEADLINE_SECONDS):
+                result = await build_here_now_plan(request)
+        response.headers[SERVER_TIMING_HEADER] = timing.header()
+        if timings:
+            result["timings"] = timing.as_dict()
+        await record_event("here_now_plan", {
+            "location": request.location,
+            "mood": request.mood,
+            "budget": request.budget,
+            "duration_hours": request.duration_hours
+        })
+        return result
+    except TimeoutError:
+        raise with_server_timing(HTTPException(status_code=504, detail="Here-now plan did not finish within the request deadline"), timing)
+    except CallRejected as e:
+        raise with_server_timing(provider_rejected(e), timing)
     except Exception as e:
         logger.error(f"Here-now plan error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create here-now plan: {str(e)}")
 
-# Trip planning endpoint
-@app.post("/api/trip/plan-and-book")
-async def plan_and_book_trip(request: TripPlanRequest):
-    try:
-        # 1) Destination details
+# Trip planning
+async def build_trip_plan(request: TripPlanRequest, progress=None) -> Dict[str, Any]:
+    """Run the full trip plan, reporting each finished stage to the optional progress callback"""
+    async def report(stage: str, data: Any = None):
+        if progress:
+            await progress(stage, jsonable_encoder(data) if data is not None else None, total_steps)
+
+    # 1) Destination details
+    with timed("geocode"):
         destination_info = await google_places_integration.geocode_location(request.destination)
 
-        # 2) Nearby places (once for entire trip)
+    start_dt = datetime.strptime(request.departure_date, "%Y-%m-%d")
+    end_dt = datetime.strptime(request.return_date or request.departure_date, "%Y-%m-%d")
+    trip_days = (end_dt - start_dt).days + 1
+    # destination + places + one step per day + flights + hotels
+    total_steps = trip_days + 4
+    await report("destination_info", destination_info)
+
+    # 2) Nearby places (once for entire trip)
+    with timed("places"):
         places = await google_places_integration.get_nearby_places(
             latitude=destination_info.coordinates['lat'],
             longitude=destination_info.coordinates['lng'],
             radius=5000
         )
+    await report("places", places)
 
-        # 3) Create day-by-day itineraries with OpenAI
-        start_dt = datetime.strptime(request.departure_date, "%Y-%m-%d")
-        end_dt = datetime.strptime(request.return_date or request.departure_date, "%Y-%m-%d")
-        trip_days = (end_dt - start_dt).days + 1
-
-        itineraries = []
-        for day_offset in range(trip_days):
-            current_date = start_dt + timedelta(days=day_offset)
-            try:
+    # 3) Create day-by-day itineraries with OpenAI
+    itineraries = []
+    for day_offset in range(trip_days):
+        current_date = start_dt + timedelta(days=day_offset)
+        try:
+            with timed(f"openai-day{day_offset + 1}"):
                 day_itinerary = await openai_integration.generate_itinerary(
                     location=request.destination,
                     mood=request.preferences.get("mood", "adventurous"),
                     budget=request.preferences.get("budget", "medium"),
                     duration_hours=12  # assume 12hr of activities per day
                 )
-            except Exception as e:
-                logger.warning(f"OpenAI itinerary generation failed for day {day_offset+1}: {e}")
-                day_itinerary = None
-
-            itineraries.append({
-                "day": day_offset + 1,
-                "date": current_date.strftime("%Y-%m-%d"),
-                "itinerary": day_itinerary
-            })
-
-        # 4) Flights – origin required
-        flights = []
-        origin = request.preferences.get("origin")
-        if origin:
-            try:
-                flight_request = FlightSearchRequest(
-                    origin=origin,
-                    destination=request.destination,
-                    departure_date=request.departure_date,
-                    return_date=request.return_date,
-                    adults=request.travelers.get("adults", 1)
-                )
-                flights = await amadeus_integration.search_flights(flight_request)
-            except Exception as e:
-                logger.warning(f"Flight search failed in trip planning: {e}")
+        except Exception as e:
+            logger.warning(f"OpenAI itinerary generation failed for day {day_offset+1}: {e}")
+            day_itinerary = None
 
-        # 5) Hotels (optional)
-        hotels = []
+        itineraries.append({
+            "day": day_offset + 1,
+            "date": current_date.strftime("%Y-%m-%d"),
+            "itinerary": day_itinerary
+        })
+        await report("itineraries", itineraries)
+
+    # 4) Flights – origin required
+    flights = []
+    origin = request.preferences.get("origin")
+    if origin:
         try:
-            hotel_request = HotelSearchRequest(
-                location=request.destination,
-                check_in=request.departure_date,
-                check_out=request.return_date,
-                guests=request.travelers.get("adults", 1)
+            flight_request = FlightSearchRequest(
+                origin=origin,
+                destination=request.destination,
+                departure_date=request.departure_date,
+                return_date=request.return_date,
+                adults=request.travelers.get("adults", 1)
             )
-            hotels = await amadeus_integration.search_hotels(hotel_request)
+            with timed("flights"):
+                flights = await amadeus_integration.search_flights(flight_request)
         except Exception as e:
-            logger.warning(f"Hotel search failed in trip planning: {e}")
+            logger.warning(f"Flight search failed in trip planning: {e}")
+    await report("flights", flights)
 
-        return {
-            "success": True,
-            "itineraries": itineraries,
-            # keep original key for backward-compat
-            "itinerary": itineraries[0]["itinerary"] if itineraries else None,
-            "places": places,
-            "flights": flights,
-            "hotels": hotels,
-            "destination_info": destination_info,
-            "summary": {
-                "total_cost": f"${request.budget:.0f}",
-                "duration": f"{trip_days} day{'s' if trip_days>1 else ''}",
-                "activities_count": sum(len(d['itinerary'].activities) for d in itineraries if d.get('itinerary') and hasattr(d['itinerary'], 'activities'))
-            }
+    # 5) Hotels (optional)
+    hotels = []
+    try:
+        hotel_request = HotelSearchRequest(
+            location=request.destination,
+            check_in=request.departure_date,
+            check_out=request.return_date,
+            guests=request.travelers.get("adults", 1)
+        )
+        with timed("hotels"):
+            hotels = await amadeus_integration.search_hotels(hotel_request)
+    except Exception as e:
+        logger.warning(f"Hotel search failed in trip planning: {e}")
+    await report("hotels", hotels)
+
+    return {
+        "success": True,
+        "itineraries": itineraries,
+        # keep original key for backward-compat
+        "itinerary": itineraries[0]["itinerary"] if itineraries else None,
+        "places": places,
+        "flights": flights,
+        "hotels": hotels,
+        "destination_info": destination_info,
+        "summary": {
+            "total_cost": f"${request.budget:.0f}",
+            "duration": f"{trip_days} day{'s' if trip_days>1 else ''}",
+            "activities_count": sum(len(d['itinerary'].activities) for d in itineraries if d.get('itinerary') and hasattr(d['itinerary'], 'activities'))
         }
-        
+    }
+
+async def save_trip_plan(request: TripPlanRequest, plan: Dict[str, Any]) -> Optional[str]:
+    """Persist a finished plan; storage problems never fail the planning request"""
+    try:
+        return await trip_store.save_trip(
+            request.dict(exclude={"user_id"}),
+            jsonable_encoder(plan),
+            user_id=request.user_id
+        )
+    except Exception as e:
+        logger.warning(f"Failed to persist trip plan for {request.destination}: {e}")
+        return None
+
+@app.post("/api/trip/plan-and-book", dependencies=[Depends(require_integrations("google_places", "openai"))])
+async def plan_and_book_trip(
+    request: TripPlanRequest,
+    raw_request: Request,
+    response: Response,
+    x_request_timeout_ms: Optional[int] = Header(None),
+    timings: bool = False,
+):
+    """Plan a trip synchronously; `?timings=true` adds the per-stage breakdown from the Server-Timing header"""
+    try:
+        with server_timing() as timing:
+            async with deadline_for(raw_request, x_request_timeout_ms, TRIP_PLAN_DEADLINE_SECONDS):
+                result = await build_trip_plan(request)
+        response.headers[SERVER_TIMING_HEADER] = timing.header()
+        if timings:
+            result["timings"] = timing.as_dict()
+        result["trip_id"] = await save_trip_plan(request, result)
+        await record_event("trip_plan", {"mode": "sync", "destination": request.destination, "user_id": request.user_id})
+        return result
+    except TimeoutError:
+        raise with_server_timing(HTTPException(status_code=504, detail="Trip planning did not finish within the request deadline; use /api/trip/plan-and-book/jobs for long trips"), timing)
+    except CallRejected as e:
+        raise with_server_timing(provider_rejected(e), timing)
     except Exception as e:
         logger.error(f"Trip planning error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Trip planning failed: {str(e)}")
 
+# Background trip planning jobs
+async def run_trip_plan_job(payload: Dict[str, Any], progress) -> Dict[str, Any]:
+    """Job runner: rebuild the request and return a Mongo-storable plan"""
+    request = TripPlanRequest(**payload)
+    # Label the run's OpenAI usage by job type, not "none"
+    with route_scope("jobs:trip_plan_and_book"):
+        result = jsonable_encoder(await build_trip_plan(request, progress))
+        result["trip_id"] = await save_trip_plan(request, result)
+    return result
+
+job_manager = JobManager(
+    db.plan_jobs,
+    run_trip_plan_job,
+    concurrency=int(os.getenv("PLAN_JOB_CONCURRENCY", "4")),
+    max_pending=int(os.getenv("PLAN_JOB_MAX_PENDING", "100")),
+    dedupe_window_seconds=int(os.getenv("PLAN_JOB_DEDUPE_WINDOW_SECONDS", "600")),
+    lease_seconds=int(os.getenv("PLAN_JOB_LEASE_SECONDS", "60")),
+    max_attempts=int(os.getenv("PLAN_JOB_MAX_ATTEMPTS", "3")),
+)
+
+@app.post("/api/trip/plan-and-book/jobs", status_code=202, dependencies=[Depends(require_integrations("google_places", "openai"))])
+async def submit_trip_plan_job(request: TripPlanRequest):
+    """Queue a trip plan and return a job id immediately"""
+    try:
+        job, created = await job_manager.submit(request.dict())
+        await record_event("trip_plan", {
+            "mode": "job",
+            "destination": request.destination,
+            "user_id": request.user_id,
+            "deduplicated": not created
+        })
+        return {
+            "success": True,
+            "job_id": job["id"],
+            "status": job["status"],
+            "deduplicated": not created
+        }
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Trip plan job submission error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Trip plan job submission failed: {str(e)}")
+
+@app.get("/api/trip/jobs/{job_id}")
+async def get_trip_plan_job(job_id: str):
+    """Poll a trip plan job for progress, partial results and the final plan"""
+    job = await job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.pop("active_hash", None)
+    return {"success": True, "job": job}
+
+@app.get("/api/trip/jobs/{job_id}/events")
+async def stream_trip_plan_job(job_id: str):
+    """Subscribe to a trip plan job as a server-sent event stream"""
+    if not await job_manager.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        async for job in job_manager.watch(job_id):
+            job.pop("active_hash", None)
+            yield f"event: {job['status']}\ndata: {json.dumps(jsonable_encoder(job))}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+# Saved trips and itineraries
+@app.get("/api/trips")
+async def list_trips(
+    user_id: Optional[str] = None,
+    destination: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100)
+):
+    """List saved trips by user, destination and/or departure date range"""
+    try:
+        trips = await trip_store.list_trips(
+            user_id=user_id,
+            destination=destination,
+            from_date=from_date,
+            to_date=to_date,
+            limit=limit
+        )
+        return {"success": True, "trips": trips, "count": len(trips)}
+    except Exception as e:
+        logger.error(f"Trip listing error: {e}")
+        raise HTTPException(status_code=500, detail=f"Trip listing failed: {str(e)}")
+
+@app.get("/api/trips/{trip_id}")
+async def get_trip(trip_id: str):
+    """Reload a saved trip plan without regenerating it"""
+    trip = await trip_store.get_trip(trip_id)
+    if not trip:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    return {"success": True, "trip": trip}
+
+@app.get("/api/itineraries")
+async def list_itineraries(
+    user_id: Optional[str] = None,
+    location: Optional[str] = None,
+    trip_id: Optional[str] = None,
+    date: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100)
+):
+    """List saved itineraries by user, location, trip and/or date"""
+    try:
+        itineraries = await trip_store.list_itineraries(
+            user_id=user_id,
+            location=location,
+            trip_id=trip_id,
+            date=date,
+            limit=limit
+        )
+        return {"success": True, "itineraries": itineraries, "count": len(itineraries)}
+    except Exception as e:
+        logger.error(f"Itinerary listing error: {e}")
+        raise HTTPException(status_code=500, detail=f"Itinerary listing failed: {str(e)}")
+
+@app.get("/api/itineraries/{itinerary_id}")
+async def get_saved_itinerary(itinerary_id: str):
+    """Reload a saved itinerary without calling OpenAI"""
+    itinerary = await trip_store.get_itinerary(itinerary_id)
+    if not itinerary:
+        raise HTTPException(status_code=404, detail="Itinerary not found")
+    return {"success": True, "itinerary": itinerary}
+
+# Trip mode bookings
+@app.post("/api/bookings")
+async def create_booking(request: TripBookingRequest, idempotency_key: Optional[str] = Header(None)):
+    """
+    Create a flight or hotel booking. Retrying with the same Idempotency-Key
+    header (or idempotency_key field) returns the original booking.
+    Bookings are only recorded, so no Amadeus credentials are needed.
+    """
+    if request.trip_type not in BOOKING_TYPES:
+        raise HTTPException(status_code=400, detail="trip_type must be 'flight' or 'hotel'")
+    if idempotency_key:
+        request.idempotency_key = idempotency_key
+    try:
+        booking = await create_trip_booking(request)
+        return {"success": True, "booking": booking}
+    except Exception as e:
+        logger.error(f"Booking error: {e}")
+        raise HTTPException(status_code=500, detail=f"Booking failed: {str(e)}")
+
+@app.get("/api/bookings")
+async def list_bookings(
+    user_id: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100)
+):
+    """List bookings by user and/or status"""
+    try:
+        bookings = await booking_store.list(user_id=user_id, status=status, limit=limit)
+        return {"success": True, "bookings": bookings, "count": len(bookings)}
+    except Exception as e:
+        logger.error(f"Booking listing error: {e}")
+        raise HTTPException(status_code=500, detail=f"Booking listing failed: {str(e)}")
+
+@app.get("/api/bookings/{booking_id}")
+async def get_booking(booking_id: str):
+    booking = await booking_store.get(booking_id)
+    if not booking:
+        raise HTTPException(status_code=404, detail="Booking not found")
+    return {"success": True, "booking": booking}
+
 # Helper functions
 def calculate_sustainability_score(flight):
     """Calculate sustainability score based on flight characteristics"""
@@ -638,6 +1183,128 @@ def calculate_trip_carbon_impact(flights):
         "offset_cost": "$25"
     }
 
+# Debug endpoints
+_import_report: Optional[Dict[str, Any]] = None
+
+@app.get("/api/debug/startup", dependencies=[Depends(require_admin)])
+async def startup_report(refresh: bool = False):
+    """
+    Startup timings for this process, plus a `python -X importtime` profile of
+    a cold `import server` (run once in a subprocess and cached).
+    """
+    global _import_report
+    if _import_report is None or refresh:
+        _import_report = await asyncio.to_thread(measure_import, "server")
+    return {"success": True, "process": startup_profile.report(), "cold_import": _import_report}
+
+@app.get("/api/debug/rate-limits", dependencies=[Depends(require_admin)])
+async def rate_limit_report():
+    """Outbound rate limiter state per provider: tokens, queue time, shed and upstream 429 counts"""
+    return {"success": True, "providers": rate_limiter_stats()}
+
+@app.get("/api/debug/circuits", dependencies=[Depends(require_admin)])
+async def circuit_report():
+    """Circuit breaker state per integration"""
+    return {"success": True, "circuits": circuit_stats()}
+
+@app.get("/api/debug/hedging", dependencies=[Depends(require_admin)])
+async def hedging_report():
+    """Hedged request counters and current hedge delay per operation"""
+    return {"success": True, "operations": hedge_stats()}
+
+@app.get("/api/debug/concurrency", dependencies=[Depends(require_admin)])
+async def concurrency_report():
+    """Current adaptive in-flight limit, usage and latency signals per provider"""
+    return {"success": True, "providers": concurrency_stats()}
+
+@app.get("/api/debug/loop-lag", dependencies=[Depends(require_admin)])
+async def loop_lag_report():
+    """Event loop lag and the most recent stalls, with the blocking stack, route and integration"""
+    return {"success": True, "loop": loop_monitor.report()}
+
+@app.get("/api/debug/write-buffers", dependencies=[Depends(require_admin)])
+async def write_buffer_report():
+    """Pending depth and written/failed/rejected document counts per write buffer"""
+    return {"success": True, "buffers": write_buffer_stats()}
+
+@app.get("/api/debug/caches", dependencies=[Depends(require_admin)])
+async def cache_list():
+    """Entries, hit ratio, evictions and invalidations per cache namespace"""
+    return {"success": True, "caches": cache_stats()}
+
+@app.get("/api/debug/caches/{namespace}", dependencies=[Depends(require_admin)])
+async def cache_detail(namespace: str, keys: Optional[str] = None, limit: int = Query(100, ge=1, le=1000)):
+    """
+    One namespace with its memory footprint, entry age distribution and L2
+    size. `keys` lists this worker's L1 keys starting with that prefix.
+    """
+    if get_cache_namespace(namespace) is None:
+        raise HTTPException(status_code=404, detail="Cache namespace not found")
+    return {"success": True, "namespace": namespace, "cache": await cache_report(namespace, keys, limit)}
+
+@app.delete("/api/debug/caches/{namespace}", dependencies=[Depends(require_admin)])
+async def cache_invalidate(namespace: str, prefix: str = Query(..., description='Key prefix, e.g. "paris" or "search:museum"; "" clears the namespace')):
+    """
+    Drop keys starting with prefix from the shared L2 and this worker's L1.
+    Other workers keep their L1 copies until those expire.
+    """
+    cache = get_cache_namespace(namespace)
+    if cache is None:
+        raise HTTPException(status_code=404, detail="Cache namespace not found")
+    removed = await cache.invalidate_prefix(prefix)
+    return {"success": True, "namespace": namespace, "prefix": prefix, "removed": removed}
+
+@app.get("/api/debug/llm-usage", dependencies=[Depends(require_admin)])
+async def llm_usage_report():
+    """LLM calls, tokens, estimated cost and max_tokens utilisation per route and model"""
+    return {"success": True, "routes": llm_usage_stats()}
+
+@app.get("/api/debug/tracing", dependencies=[Depends(require_admin)])
+async def tracing_report():
+    """Span exporter mode, sample rate and exported/dropped span counts"""
+    return {"success": True, "tracing": tracer_stats()}
+
+@app.get("/api/debug/profiles", dependencies=[Depends(require_admin)])
+async def profile_list():
+    """Stored request profiles, newest first (see core/profiling.py)"""
+    return {"success": True, "profiles": profile_store.list()}
+
+@app.get("/api/debug/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def profile_download(profile_id: str, format: Optional[str] = None):
+    """
+    One stored profile. Sampled profiles are folded stacks (format=folded);
+    cProfile ones are pstats data (format=pstats) or a text summary (format=text).
+    """
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    format = format or ("folded" if profile["mode"] == "sample" else "pstats")
+    if format == "folded" and profile["mode"] == "sample":
+        return PlainTextResponse(folded(profile))
+    if format == "pstats" and profile["mode"] == "cprofile":
+        return Response(
+            pstats_dump(profile),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'},
+        )
+    if format == "text" and profile["mode"] == "cprofile":
+        return PlainTextResponse(pstats_text(profile))
+    raise HTTPException(status_code=400, detail=f"Format {format} is not available for a {profile['mode']} profile")
+
+# Prometheus scrape target. nginx only proxies /api, so this is reachable on
+# the backend port from inside the deployment, not from the public site.
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+startup_profile.record("import:server", time.perf_counter() - _import_started)
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1:
+        # uvicorn needs an import string to spawn workers; in production use
+        # gunicorn.conf.py, which preloads the app and forks copy-on-write
+        uvicorn.run("server:app", host="0.0.0.0", port=8001, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -1485,15 +1485,120 @@ def test_amadeus_flight_search():
     
     return all_passed
 
+# Scenarios replayed by the load mode (request builders live in benchmarks/scenarios.py)
+LOAD_SCENARIOS = [
+    "weather_current",
+    "weather_forecast",
+    "places_search",
+    "places_nearby",
+    "flights_search",
+    "flights_search_smart",
+    "hotels_search",
+    "here_now_plan",
+    "trip_plan_and_book",
+]
+
+def print_load_row(name: str, label: str, summary: Dict[str, Any]):
+    """Print one endpoint/step line of the load report"""
+    print(
+        f"{name:<22} {label:<10} {summary['throughput_rps']:>8.1f} rps  "
+        f"p50 {summary['p50_ms'] or 0:>8.1f}ms  p90 {summary['p90_ms'] or 0:>8.1f}ms  "
+        f"p99 {summary['p99_ms'] or 0:>8.1f}ms  errors {summary['error_rate']:>6.1%}"
+        + (f"  dropped {summary['dropped']}" if summary.get("dropped") else "")
+        + ("  SATURATED" if summary.get("saturated") else "")
+    )
+
+def run_load_test(args) -> Dict[str, Any]:
+    """
+    Replay the API scenarios concurrently with an async client
+
+    --concurrency N keeps N requests in flight (closed loop); --rate R starts
+    R requests per second (open loop); --ramp R1,R2,... steps the open loop
+    up until throughput falls behind, errors pass --max-error-rate or p99
+    passes --p99-slo-ms, and reports that saturation point per endpoint.
+    """
+    import asyncio
+    import httpx
+    from benchmarks.load import closed_loop, open_loop, ramp
+    from benchmarks.scenarios import scenarios
+
+    selected = [s for s in scenarios(cold=args.cold) if s.name in args.endpoints]
+    if args.ramp:
+        mode = f"ramp {args.ramp} rps"
+    elif args.rate:
+        mode = f"{args.rate:g} rps"
+    else:
+        mode = f"concurrency {args.concurrency}"
+    print("\n" + "="*80)
+    print(f"LOAD TEST: {BACKEND_URL} - {mode}, {args.duration:g}s per step")
+    print("="*80)
+
+    async def drive() -> Dict[str, Any]:
+        report: Dict[str, Any] = {}
+        limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+        async with httpx.AsyncClient(base_url=BACKEND_URL, timeout=args.request_timeout, limits=limits) as client:
+            for scenario in selected:
+                if args.ramp:
+                    rates = [float(rate) for rate in args.ramp.split(",")]
+                    report[scenario.name] = await ramp(
+                        client, scenario, rates, args.duration, args.warmup,
+                        max_error_rate=args.max_error_rate, p99_slo_ms=args.p99_slo_ms,
+                        max_in_flight=args.max_in_flight,
+                        on_step=lambda step, name=scenario.name: print_load_row(name, f"@{step['offered_rps']:g}", step),
+                    )
+                    saturated_at = report[scenario.name]["saturated_at_rps"]
+                    sustained = report[scenario.name]["max_sustained_rps"]
+                    if saturated_at is None:
+                        print(f"  ✅ {scenario.name}: not saturated up to {rates[-1]:g} rps")
+                    else:
+                        last = f"{sustained:.1f} rps" if sustained is not None else "none"
+                        print(f"  ❌ {scenario.name}: saturated at {saturated_at:g} rps (last sustained: {last})")
+                elif args.rate:
+                    report[scenario.name] = await open_loop(client, scenario, args.rate, args.duration, args.warmup, args.max_in_flight)
+                    print_load_row(scenario.name, f"@{args.rate:g}", report[scenario.name])
+                else:
+                    report[scenario.name] = await closed_loop(client, scenario, args.concurrency, args.duration, args.warmup)
+                    print_load_row(scenario.name, f"c={args.concurrency}", report[scenario.name])
+        return report
+
+    report = asyncio.run(drive())
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"backend": BACKEND_URL, "mode": mode, "duration": args.duration, "endpoints": report}, f, indent=2)
+        print(f"\nLoad test results written to {args.output}")
+    return report
+
 if __name__ == "__main__":
-    # Test the Amadeus flight search functionality with the new valid API credentials
-    test_amadeus_flight_search()
-    
-    # Uncomment to run other tests
-    # run_all_airport_code_resolution_tests()
-    # test_tampa_to_orlando_resolution()
-    # test_airport_code_resolution_direct()
-    # test_airport_code_resolution()
-    # run_place_details_test()
-    # run_review_tests()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="DRIFT backend API tests")
+    parser.add_argument("--load", action="store_true", help="run the concurrent load mode instead of the functional tests")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests kept in flight (closed loop)")
+    parser.add_argument("--rate", type=float, help="requests started per second (open loop)")
+    parser.add_argument("--ramp", help="comma-separated open-loop rates to step through, e.g. 1,2,5,10,20")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds per endpoint and step")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds before each measurement")
+    parser.add_argument("--endpoints", type=lambda v: v.split(","), default=LOAD_SCENARIOS,
+                        help=f"scenario names (default: {','.join(LOAD_SCENARIOS)})")
+    parser.add_argument("--cold", action="store_true", help="use a distinct input per request so caches miss")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="ramp: error rate that counts as saturated")
+    parser.add_argument("--p99-slo-ms", type=float, help="ramp: p99 latency that counts as saturated")
+    parser.add_argument("--max-in-flight", type=int, default=500, help="open loop: requests beyond this are dropped")
+    parser.add_argument("--request-timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="write the load report as JSON")
+    args = parser.parse_args()
+
+    if args.load:
+        run_load_test(args)
+    else:
+        # Test the Amadeus flight search functionality with the new valid API credentials
+        test_amadeus_flight_search()
+
+        # Uncomment to run other tests
+        # run_all_airport_code_resolution_tests()
+        # test_tampa_to_orlando_resolution()
+        # test_airport_code_resolution_direct()
+        # test_airport_code_resolution()
+        # run_place_details_test()
+        # run_review_tests()
     # main()
\ No newline at end of file
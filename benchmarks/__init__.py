@@ -0,0 +1 @@
+"""Offline benchmarks for the backend API against local provider stubs (see __main__)."""
@@ -0,0 +1,269 @@
+"""
+Offline backend benchmark.
+
+    python -m benchmarks run [--levels 1,8,32] [--duration 10] [--profile fast]
+    python -m benchmarks run --record traffic.jsonl.gz   # real providers, archived
+    python -m benchmarks run --replay traffic.jsonl.gz   # archived responses and latencies
+    python -m benchmarks stubs            # stubs only; prints the backend env
+    python -m benchmarks record|replay --archive FILE    # proxies only (see replay.py)
+    python -m benchmarks compare OLD.json NEW.json
+    python -m benchmarks collector        # OTLP/HTTP trace collector stand-in
+    python -m benchmarks traces FILE      # waterfall of collected traces
+
+`run` starts the provider stubs, starts the backend (uvicorn, from backend/)
+pointed at them, drives every scenario at each concurrency level and writes
+the results to benchmarks/results/<timestamp>.json. The backend still needs
+MongoDB (MONGO_URL, default localhost; DB_NAME defaults to drift_benchmark).
+Use --target to benchmark a backend that is already running with the stub
+environment instead of starting one.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+from aiohttp import web
+
+from benchmarks.collector import collector_app, print_traces
+from benchmarks.load import closed_loop
+from benchmarks.replay import ReplayServers
+from benchmarks.scenarios import scenarios
+from benchmarks.stubs import PROFILES, PROVIDERS, StubServers
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, "backend")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# Provider quotas are not what we are measuring; these providers' limiters are switched off
+RATE_LIMITED_PROVIDERS = ("amadeus", "google_places", "foursquare", "eventbrite", "weather")
+
+
+def load_profile(name_or_path: str) -> Dict[str, Dict[str, Any]]:
+    if name_or_path in PROFILES:
+        return PROFILES[name_or_path]
+    with open(name_or_path) as f:
+        overrides = json.load(f)
+    # A profile file only needs the providers it changes
+    return {name: {**PROFILES["default"][name], **overrides.get(name, {})} for name in PROVIDERS}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def start_backend(stubs: StubServers, port: int, workers: int, keep_rate_limits: bool) -> subprocess.Popen:
+    env = {**os.environ, "DB_NAME": os.getenv("DB_NAME", "drift_benchmark"), **stubs.backend_env()}
+    if not keep_rate_limits:
+        env.update({f"RATE_LIMIT_{provider.upper()}_RPS": "0" for provider in RATE_LIMITED_PROVIDERS})
+    command = [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+    if workers > 1:
+        command += ["--workers", str(workers)]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+
+
+async def wait_ready(base_url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/api/health/ready")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"backend at {base_url} did not become ready within {timeout:.0f}s")
+
+
+def provider_servers(args):
+    """Stubs, or record/replay proxies when --record/--replay names an archive"""
+    if getattr(args, "record", None):
+        return ReplayServers("record", args.record, base_port=args.stub_port)
+    if getattr(args, "replay", None):
+        return ReplayServers("replay", args.replay, base_port=args.stub_port, speed=args.replay_speed, strict=args.strict)
+    return StubServers(load_profile(args.profile), base_port=args.stub_port)
+
+
+async def run(args) -> Dict[str, Any]:
+    stubs = provider_servers(args)
+    await stubs.start()
+    backend = None
+    base_url = args.target
+    try:
+        if base_url is None:
+            # Real providers behind the recording proxies still enforce their quotas
+            backend = start_backend(stubs, args.port, args.workers, args.keep_rate_limits or bool(args.record))
+            base_url = f"http://127.0.0.1:{args.port}"
+        await wait_ready(base_url)
+
+        selected = [s for s in scenarios(cold=args.cold) if not args.routes or s.name in args.routes]
+        levels = [int(level) for level in args.levels.split(",")]
+        limits = httpx.Limits(max_connections=max(levels) * 2, max_keepalive_connections=max(levels) * 2)
+        routes: Dict[str, Any] = {}
+        async with httpx.AsyncClient(base_url=base_url, timeout=args.request_timeout, limits=limits) as client:
+            for scenario in selected:
+                routes[scenario.name] = {"method": scenario.method, "path": scenario.path, "levels": {}}
+                for level in levels:
+                    summary = await closed_loop(client, scenario, level, args.duration, args.warmup)
+                    routes[scenario.name]["levels"][str(level)] = summary
+                    print(
+                        f"{scenario.name:<22} c={level:<4} {summary['throughput_rps']:>9.1f} rps  "
+                        f"p50 {summary['p50_ms'] or 0:>8.1f}ms  p99 {summary['p99_ms'] or 0:>8.1f}ms  "
+                        f"errors {summary['error_rate']:.1%}",
+                        flush=True,
+                    )
+    finally:
+        if backend is not None:
+            backend.terminate()
+            try:
+                backend.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                backend.kill()
+        await stubs.stop()
+
+    if isinstance(stubs, StubServers):
+        source = {"name": args.profile, "providers": load_profile(args.profile)}
+    else:
+        source = {"name": stubs.mode, "archive": stubs.archive_path}
+    return {
+        "started_at": args.started_at,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "target": args.target or "local",
+        "profile": source,
+        "cold": args.cold,
+        "duration_seconds": args.duration,
+        "warmup_seconds": args.warmup,
+        "concurrency_levels": levels,
+        "routes": routes,
+        "stub_requests": stubs.request_counts(),
+        **({"replay": stubs.stats()} if isinstance(stubs, ReplayServers) and stubs.mode == "replay" else {}),
+    }
+
+
+async def serve_stubs(args):
+    stubs = provider_servers(args)
+    await stubs.start()
+    for key, value in stubs.backend_env().items():
+        print(f"export {key}={value}")
+    print("# stubs running; Ctrl+C to stop", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await stubs.stop()
+
+
+def compare(old_path: str, new_path: str):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    def change(before, after) -> str:
+        if not before or after is None:
+            return "    n/a"
+        return f"{(after - before) / before:+7.1%}"
+
+    print(f"{'route':<22} {'c':>4}  {'rps':>9} {'Δ':>7}  {'p50 ms':>8} {'Δ':>7}  {'p99 ms':>8} {'Δ':>7}")
+    for name, route in new["routes"].items():
+        for level, summary in route["levels"].items():
+            before = old.get("routes", {}).get(name, {}).get("levels", {}).get(level)
+            if before is None:
+                continue
+            print(
+                f"{name:<22} {level:>4}  {summary['throughput_rps']:>9.1f} {change(before['throughput_rps'], summary['throughput_rps'])}  "
+                f"{summary['p50_ms'] or 0:>8.1f} {change(before['p50_ms'], summary['p50_ms'])}  "
+                f"{summary['p99_ms'] or 0:>8.1f} {change(before['p99_ms'], summary['p99_ms'])}"
+            )
+
+
+def add_archive_options(parser: argparse.ArgumentParser):
+    parser.add_argument("--record", metavar="ARCHIVE", help="forward to the real providers and archive the traffic")
+    parser.add_argument("--replay", metavar="ARCHIVE", help="answer from an archive instead of the stubs")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="divide recorded latencies by this (0 = no delay)")
+    parser.add_argument("--strict", action="store_true", help="502 for requests that were never recorded")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Offline backend benchmark against local provider stubs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="benchmark every /api scenario")
+    run_parser.add_argument("--levels", default="1,8,32", help="comma-separated concurrency levels")
+    run_parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per route and level")
+    run_parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each measurement")
+    run_parser.add_argument("--profile", default="default", help=f"stub profile ({', '.join(PROFILES)}) or a JSON file")
+    run_parser.add_argument("--cold", action="store_true", help="use a distinct input per request so caches miss")
+    run_parser.add_argument("--routes", type=lambda v: set(v.split(",")), help="only these scenario names")
+    run_parser.add_argument("--target", help="benchmark an already running backend at this URL")
+    run_parser.add_argument("--port", type=int, default=8765, help="port for the backend started by the run")
+    run_parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the backend started by the run")
+    run_parser.add_argument("--stub-port", type=int, default=9100, help="first of six consecutive stub ports")
+    run_parser.add_argument("--keep-rate-limits", action="store_true", help="leave the outbound rate limiters on")
+    run_parser.add_argument("--request-timeout", type=float, default=120.0)
+    run_parser.add_argument("--output", help="results file (default benchmarks/results/<timestamp>.json)")
+    add_archive_options(run_parser)
+
+    stubs_parser = commands.add_parser("stubs", help="run the provider stubs only")
+    stubs_parser.add_argument("--profile", default="default")
+    stubs_parser.add_argument("--stub-port", type=int, default=9100)
+
+    for mode in ("record", "replay"):
+        proxy_parser = commands.add_parser(mode, help=f"run the {mode} proxies only")
+        proxy_parser.add_argument("--archive", required=True)
+        proxy_parser.add_argument("--stub-port", type=int, default=9100)
+        proxy_parser.add_argument("--replay-speed", type=float, default=1.0)
+        proxy_parser.add_argument("--strict", action="store_true")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+
+    collector_parser = commands.add_parser("collector", help="receive OTLP/HTTP JSON traces into a file")
+    collector_parser.add_argument("--port", type=int, default=4318)
+    collector_parser.add_argument("--output", default="traces.jsonl")
+
+    traces_parser = commands.add_parser("traces", help="print the slowest collected traces as waterfalls")
+    traces_parser.add_argument("file")
+    traces_parser.add_argument("--route", help="only requests to this route template")
+    traces_parser.add_argument("--slowest", type=int, default=5)
+
+    args = parser.parse_args(argv)
+    if args.command in ("record", "replay"):
+        setattr(args, args.command, args.archive)
+        args.command = "stubs"
+    if args.command == "stubs":
+        try:
+            asyncio.run(serve_stubs(args))
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "compare":
+        compare(args.old, args.new)
+    elif args.command == "collector":
+        print(f"Collecting traces on http://127.0.0.1:{args.port}/v1/traces into {args.output}")
+        web.run_app(collector_app(args.output), host="127.0.0.1", port=args.port, print=None)
+    elif args.command == "traces":
+        print_traces(args.file, args.route, args.slowest)
+    else:
+        args.started_at = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        results = asyncio.run(run(args))
+        output = args.output or os.path.join(RESULTS_DIR, f"{args.started_at}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
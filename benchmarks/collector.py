@@ -0,0 +1,130 @@
+"""
+A stand-in OTLP/HTTP trace collector and a text waterfall for its output.
+
+    python -m benchmarks collector [--port 4318] [--output traces.jsonl]
+    python -m benchmarks traces traces.jsonl [--route /api/trip/plan-and-book] [--slowest 3]
+
+The collector accepts OTLP/JSON on POST /v1/traces (what the backend sends
+with TRACE_EXPORT=otlp) and appends each batch as one line. The backend's
+TRACE_EXPORT=file output uses the same format. `traces` rebuilds the span
+trees and prints each trace as a waterfall, marking the critical path: the
+chain of children that finished last and so held their parent open.
+"""
+
+import json
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+from aiohttp import web
+
+
+def _attribute_value(value: Dict[str, Any]) -> Any:
+    if "intValue" in value:
+        return int(value["intValue"])
+    for key in ("stringValue", "doubleValue", "boolValue"):
+        if key in value:
+            return value[key]
+    return None
+
+
+def read_spans(path: str) -> List[Dict[str, Any]]:
+    spans = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for resource in json.loads(line).get("resourceSpans", []):
+                for scope in resource.get("scopeSpans", []):
+                    for span in scope.get("spans", []):
+                        spans.append({
+                            "trace_id": span["traceId"],
+                            "span_id": span["spanId"],
+                            "parent_id": span.get("parentSpanId"),
+                            "name": span["name"],
+                            "start": int(span["startTimeUnixNano"]),
+                            "end": int(span["endTimeUnixNano"]),
+                            "error": span.get("status", {}).get("code") == 2,
+                            "attributes": {a["key"]: _attribute_value(a["value"]) for a in span.get("attributes", [])},
+                        })
+    return spans
+
+
+def traces(spans: Iterable[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    grouped: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for span in spans:
+        grouped[span["trace_id"]].append(span)
+    return grouped
+
+
+def waterfall(trace: List[Dict[str, Any]], width: int = 40) -> List[str]:
+    ids = {span["span_id"] for span in trace}
+    children: Dict[Optional[str], List[Dict[str, Any]]] = defaultdict(list)
+    for span in trace:
+        # A parent outside this trace (e.g. the caller's traceparent) makes a root
+        children[span["parent_id"] if span["parent_id"] in ids else None].append(span)
+    for siblings in children.values():
+        siblings.sort(key=lambda s: s["start"])
+
+    roots = children[None]
+    origin = min(span["start"] for span in trace)
+    total = max(max(span["end"] for span in trace) - origin, 1)
+
+    critical = set()
+    for root in roots:
+        node = root
+        while node is not None:
+            critical.add(node["span_id"])
+            kids = children.get(node["span_id"])
+            node = max(kids, key=lambda s: s["end"]) if kids else None
+
+    shown = ("provider", "cache.status", "result_count", "payload_bytes", "http.status_code", "outcome")
+    lines = []
+
+    def walk(span, depth):
+        start = (span["start"] - origin) * width // total
+        length = max((span["end"] - span["start"]) * width // total, 1)
+        bar = " " * start + "█" * length
+        marker = "*" if span["span_id"] in critical else " "
+        details = " ".join(f"{key}={span['attributes'][key]}" for key in shown if span["attributes"].get(key) is not None)
+        lines.append(
+            f"{marker} {'  ' * depth + span['name']:<42} {(span['end'] - span['start']) / 1e6:>9.1f}ms "
+            f"|{bar:<{width}}| {'ERROR ' if span['error'] else ''}{details}"
+        )
+        for child in children.get(span["span_id"], []):
+            walk(child, depth + 1)
+
+    for root in roots:
+        walk(root, 0)
+    return lines
+
+
+def print_traces(path: str, route: Optional[str] = None, slowest: int = 5):
+    grouped = traces(read_spans(path))
+
+    def root_of(trace):
+        return min(trace, key=lambda s: s["start"])
+
+    selected = [
+        trace for trace in grouped.values()
+        if route is None or root_of(trace)["attributes"].get("http.route") == route
+    ]
+    selected.sort(key=lambda t: root_of(t)["end"] - root_of(t)["start"], reverse=True)
+    print(f"{len(selected)} traces; showing the {min(slowest, len(selected))} slowest (* = critical path)")
+    for trace in selected[:slowest]:
+        print(f"\ntrace {trace[0]['trace_id']}")
+        print("\n".join(waterfall(trace)))
+
+
+def collector_app(output: str) -> web.Application:
+    async def receive(request: web.Request):
+        body = await request.json()
+        with open(output, "a") as f:
+            f.write(json.dumps(body, separators=(",", ":")) + "\n")
+        count = sum(len(s.get("spans", [])) for r in body.get("resourceSpans", []) for s in r.get("scopeSpans", []))
+        request.app["spans"] += count
+        return web.json_response({"partialSuccess": {}})
+
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app["spans"] = 0
+    app.router.add_post("/v1/traces", receive)
+    return app
@@ -0,0 +1,207 @@
+"""
+Load generation and latency summaries.
+
+Closed loop: `concurrency` workers each send a scenario's request, wait for
+the answer and send the next one, so throughput is what the backend sustains
+at that concurrency. Open loop: requests are started at a fixed rate whether
+or not earlier ones have finished, and latency is measured from when each
+request was due, so queueing in the client is not hidden. A ramp runs the
+open loop at increasing rates to find where the backend saturates.
+Latencies are kept raw and summarised as nearest-rank percentiles.
+"""
+
+import asyncio
+import math
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    # build(i) -> httpx request kwargs (params / json / headers) for the i-th request
+    build: Callable[[int], Dict[str, Any]] = lambda i: {}
+    ok_statuses: tuple = (200,)
+    tags: tuple = ()
+
+    async def send(self, client: httpx.AsyncClient, i: int) -> httpx.Response:
+        return await client.request(self.method, self.path, **self.build(i))
+
+
+def percentile(ordered: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+@dataclass
+class Recorder:
+    latencies: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    # Completed requests with an unexpected status or a transport error
+    errors: int = 0
+    # Open loop only: requests never sent because max_in_flight was reached;
+    # counted apart from errors since they have no latency sample
+    dropped: int = 0
+    started: float = 0.0
+    finished: float = 0.0
+
+    def record(self, seconds: float, status: Optional[int], ok: bool):
+        self.latencies.append(seconds)
+        self.statuses[str(status) if status is not None else "exception"] += 1
+        if not ok:
+            self.errors += 1
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        elapsed = max(self.finished - self.started, 1e-9)
+        count = len(ordered)
+
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 2) if value is not None else None
+
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "dropped": self.dropped,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "drop_rate": round(self.dropped / (count + self.dropped), 4) if self.dropped else 0.0,
+            "throughput_rps": round(count / elapsed, 2),
+            "p50_ms": ms(percentile(ordered, 50)),
+            "p90_ms": ms(percentile(ordered, 90)),
+            "p99_ms": ms(percentile(ordered, 99)),
+            "max_ms": ms(ordered[-1] if ordered else None),
+            "mean_ms": ms(sum(ordered) / count if count else None),
+            "statuses": dict(self.statuses),
+        }
+
+
+async def timed_request(
+    client: httpx.AsyncClient, scenario: Scenario, i: int, recorder: Recorder, started: Optional[float] = None
+):
+    started = time.perf_counter() if started is None else started
+    try:
+        response = await scenario.send(client, i)
+        status: Optional[int] = response.status_code
+    except httpx.HTTPError:
+        status = None
+    recorder.record(time.perf_counter() - started, status, status in scenario.ok_statuses)
+
+
+async def closed_loop(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    concurrency: int,
+    duration: float,
+    warmup: float = 0.0,
+) -> Dict[str, Any]:
+    """Drive one scenario with `concurrency` workers for `duration` seconds after `warmup`"""
+    counter = iter(range(10 ** 12))
+    recorder = Recorder()
+    measuring = Recorder()
+    loop = asyncio.get_running_loop()
+    measure_from = loop.time() + warmup
+    stop_at = measure_from + duration
+
+    async def worker():
+        while loop.time() < stop_at:
+            # Requests started during warm-up are sent but not counted
+            target = measuring if loop.time() >= measure_from else recorder
+            await timed_request(client, scenario, next(counter), target)
+
+    measuring.started = time.perf_counter() + warmup
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    measuring.finished = time.perf_counter()
+    return measuring.summary()
+
+
+async def open_loop(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    rate: float,
+    duration: float,
+    warmup: float = 0.0,
+    max_in_flight: int = 1000,
+) -> Dict[str, Any]:
+    """Start `rate` requests per second for `duration` seconds after `warmup`"""
+    interval = 1.0 / rate
+    recorder = Recorder()
+    measuring = Recorder()
+    tasks = set()
+    first = time.perf_counter()
+    measure_from = first + warmup
+    total = int((warmup + duration) * rate)
+
+    for i in range(total):
+        due = first + i * interval
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        target = measuring if due >= measure_from else recorder
+        if len(tasks) >= max_in_flight:
+            target.dropped += 1
+            continue
+        task = asyncio.create_task(timed_request(client, scenario, i, target, started=due))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    measuring.started = measure_from
+    measuring.finished = max(time.perf_counter(), measure_from + duration)
+    summary = measuring.summary()
+    summary["offered_rps"] = rate
+    return summary
+
+
+def is_saturated(step: Dict[str, Any], max_error_rate: float, p99_slo_ms: Optional[float]) -> bool:
+    """
+    A step is saturated when requests had to be dropped, throughput falls
+    behind the offered rate, errors climb or p99 breaks the SLO
+    """
+    if step["dropped"]:
+        return True
+    if step["throughput_rps"] < step["offered_rps"] * 0.9:
+        return True
+    if step["error_rate"] > max_error_rate:
+        return True
+    return p99_slo_ms is not None and step["p99_ms"] is not None and step["p99_ms"] > p99_slo_ms
+
+
+async def ramp(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    rates: List[float],
+    duration: float,
+    warmup: float = 0.0,
+    max_error_rate: float = 0.01,
+    p99_slo_ms: Optional[float] = None,
+    max_in_flight: int = 1000,
+    on_step: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Run the open loop at each rate in turn, stopping at the first saturated step"""
+    steps: List[Dict[str, Any]] = []
+    saturated_at = None
+    for rate in rates:
+        step = await open_loop(client, scenario, rate, duration, warmup, max_in_flight)
+        step["saturated"] = is_saturated(step, max_error_rate, p99_slo_ms)
+        steps.append(step)
+        if on_step:
+            on_step(step)
+        if step["saturated"]:
+            saturated_at = rate
+            break
+    sustained = [step for step in steps if not step["saturated"]]
+    return {
+        "steps": steps,
+        "saturated_at_rps": saturated_at,
+        "max_sustained_rps": sustained[-1]["throughput_rps"] if sustained else None,
+    }
@@ -0,0 +1,283 @@
+"""
+Record and replay real provider traffic.
+
+Each provider gets a local HTTP proxy, wired in through the same base-URL
+overrides as the stubs. In record mode the proxy forwards every request to
+the real provider and appends the exchange to an archive. In replay mode it
+answers from the archive after sleeping for the recorded upstream latency.
+The SDKs still parse real payloads (Amadeus, Google, Open-Meteo, ...), so
+our own parsing, enrichment and serialization cost is measured repeatably,
+offline and for free.
+
+    python -m benchmarks record --archive traffic.jsonl.gz   # backend uses real keys
+    python -m benchmarks run --replay traffic.jsonl.gz
+
+The archive is gzipped JSON lines. Response bodies are stored once per
+distinct content ("body" records) and referenced from "exchange" records.
+Requests are matched on method, path, query and body. Credentials (Google
+`key`, Amadeus client id/secret, ...) are left out of the match and never
+written; request headers are not stored. When a key was recorded several
+times, the recordings are served in turn. A request that was never recorded
+falls back to a recording of the same method and path, unless strict=True,
+in which case it gets a 502.
+
+Amadeus: the flight/hotel integration and trip mode share AMADEUS_BASE_URL,
+so one recording session sees one Amadeus host (test by default).
+"""
+
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+import aiohttp
+from aiohttp import web
+
+from benchmarks.stubs import PROVIDERS, STUB_KEYS, base_url_env
+
+UPSTREAMS = {
+    "google": "https://maps.googleapis.com",
+    "amadeus": "https://test.api.amadeus.com",
+    "openai": "https://api.openai.com",
+    "open_meteo": "https://api.open-meteo.com",
+    "foursquare": "https://api.foursquare.com",
+    "eventbrite": "https://www.eventbriteapi.com",
+}
+
+# Never archived and not part of the match
+SECRET_PARAMS = {"key", "client", "signature", "client_id", "client_secret", "api_key", "apikey", "token"}
+# Hop-by-hop or rewritten by the proxy
+_SKIP_REQUEST_HEADERS = {"host", "content-length", "accept-encoding", "connection", "transfer-encoding"}
+_KEEP_RESPONSE_HEADERS = {"content-type", "retry-after", "cache-control"}
+
+
+def _canonical_query(query) -> List[Tuple[str, str]]:
+    return sorted((k, v) for k, v in query if k not in SECRET_PARAMS)
+
+
+def _body_digest(body: bytes, content_type: str) -> Optional[str]:
+    if not body:
+        return None
+    if content_type.startswith("application/x-www-form-urlencoded"):
+        body = urlencode(_canonical_query(parse_qsl(body.decode()))).encode()
+    elif content_type.startswith("application/json"):
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode()
+        except ValueError:
+            pass
+    return hashlib.sha1(body).hexdigest()
+
+
+def match_key(provider: str, method: str, path: str, query, body: bytes, content_type: str) -> str:
+    return json.dumps([provider, method, path, _canonical_query(query), _body_digest(body, content_type)])
+
+
+def _route_key(provider: str, method: str, path: str) -> str:
+    return json.dumps([provider, method, path])
+
+
+class Archive:
+    """Exchanges in memory; body texts deduplicated by digest"""
+
+    def __init__(self):
+        self.bodies: Dict[str, bytes] = {}
+        self.exchanges: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.by_route: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._unsaved: List[Dict[str, Any]] = []
+        self._saved_bodies = set()
+
+    def add(self, exchange: Dict[str, Any], body: bytes):
+        digest = hashlib.sha1(body).hexdigest()
+        self.bodies.setdefault(digest, body)
+        exchange["body"] = digest
+        self.exchanges[exchange["key"]].append(exchange)
+        self.by_route[_route_key(exchange["provider"], exchange["method"], exchange["path"])].append(exchange)
+        self._unsaved.append(exchange)
+
+    def save(self, path: str):
+        """Append unsaved exchanges (and bodies not yet written) as a new gzip member"""
+        if not self._unsaved:
+            return
+        with gzip.open(path, "at") as f:
+            for exchange in self._unsaved:
+                digest = exchange["body"]
+                if digest not in self._saved_bodies:
+                    data = self.bodies[digest]
+                    try:
+                        record = {"type": "body", "id": digest, "text": data.decode()}
+                    except UnicodeDecodeError:
+                        record = {"type": "body", "id": digest, "base64": base64.b64encode(data).decode()}
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                    self._saved_bodies.add(digest)
+                f.write(json.dumps({"type": "exchange", **exchange}, separators=(",", ":")) + "\n")
+        self._unsaved.clear()
+
+    @classmethod
+    def load(cls, path: str) -> "Archive":
+        archive = cls()
+        with gzip.open(path, "rt") as f:
+            for line in f:
+                record = json.loads(line)
+                kind = record.pop("type")
+                if kind == "body":
+                    data = record["text"].encode() if "text" in record else base64.b64decode(record["base64"])
+                    archive.bodies[record["id"]] = data
+                    archive._saved_bodies.add(record["id"])
+                else:
+                    archive.exchanges[record["key"]].append(record)
+                    archive.by_route[_route_key(record["provider"], record["method"], record["path"])].append(record)
+        return archive
+
+    def count(self) -> int:
+        return sum(len(recorded) for recorded in self.exchanges.values())
+
+
+class ProviderProxy:
+    def __init__(self, name: str, mode: str, archive: Archive, upstream: str, speed: float = 1.0, strict: bool = False):
+        self.name = name
+        self.mode = mode
+        self.archive = archive
+        self.upstream = upstream.rstrip("/")
+        self.speed = speed
+        self.strict = strict
+        self.requests = 0
+        self.misses = 0
+        self.approximate = 0
+        self._turn: Dict[str, int] = defaultdict(int)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        body = await request.read()
+        key = match_key(self.name, request.method, request.path, request.query.items(), body, request.content_type)
+        if self.mode == "record":
+            return await self._forward(request, body, key)
+        return await self._replay(request, key)
+
+    async def _forward(self, request: web.Request, body: bytes, key: str) -> web.Response:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120))
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in _SKIP_REQUEST_HEADERS}
+        started = time.perf_counter()
+        async with self._session.request(
+            request.method, self.upstream + request.path, params=list(request.query.items()), data=body or None, headers=headers
+        ) as upstream:
+            data = await upstream.read()
+            latency_ms = (time.perf_counter() - started) * 1000
+            response_headers = {k: v for k, v in upstream.headers.items() if k.lower() in _KEEP_RESPONSE_HEADERS}
+            status = upstream.status
+        self.archive.add({
+            "key": key,
+            "provider": self.name,
+            "method": request.method,
+            "path": request.path,
+            "status": status,
+            "headers": response_headers,
+            "latency_ms": round(latency_ms, 1),
+        }, data)
+        return web.Response(status=status, body=data, headers=response_headers)
+
+    async def _replay(self, request: web.Request, key: str) -> web.Response:
+        recorded = self.archive.exchanges.get(key)
+        if not recorded:
+            self.misses += 1
+            recorded = None if self.strict else self.archive.by_route.get(_route_key(self.name, request.method, request.path))
+            if not recorded:
+                return web.Response(status=502, text=f"No recording for {request.method} {request.path_qs}")
+            self.approximate += 1
+        # Recordings of the same request are served in turn
+        turn = self._turn[key]
+        self._turn[key] = turn + 1
+        exchange = recorded[turn % len(recorded)]
+        if self.speed > 0:
+            await asyncio.sleep(exchange["latency_ms"] / 1000 / self.speed)
+        return web.Response(status=exchange["status"], body=self.archive.bodies[exchange["body"]], headers=exchange["headers"])
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_route("*", "/{tail:.*}", self.handle)
+        return app
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+
+class ReplayServers:
+    """One proxy per provider on consecutive ports; same interface as StubServers"""
+
+    def __init__(
+        self,
+        mode: str,
+        archive_path: str,
+        host: str = "127.0.0.1",
+        base_port: int = 9100,
+        speed: float = 1.0,
+        strict: bool = False,
+        upstreams: Optional[Dict[str, str]] = None,
+        save_every: float = 5.0,
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"mode must be record or replay, not {mode}")
+        self.mode = mode
+        self.archive_path = archive_path
+        self.host = host
+        self.save_every = save_every
+        if mode == "replay":
+            self.archive = Archive.load(archive_path)
+        else:
+            self.archive = Archive.load(archive_path) if os.path.exists(archive_path) else Archive()
+        upstreams = {**UPSTREAMS, **(upstreams or {})}
+        self.proxies = {name: ProviderProxy(name, mode, self.archive, upstreams[name], speed, strict) for name in PROVIDERS}
+        self.ports = {name: base_port + i for i, name in enumerate(PROVIDERS)}
+        self._runners: List[web.AppRunner] = []
+        self._saver: Optional[asyncio.Task] = None
+
+    async def start(self):
+        for name, proxy in self.proxies.items():
+            runner = web.AppRunner(proxy.app(), access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, self.host, self.ports[name]).start()
+            self._runners.append(runner)
+        if self.mode == "record":
+            self._saver = asyncio.create_task(self._save_periodically())
+
+    async def _save_periodically(self):
+        while True:
+            await asyncio.sleep(self.save_every)
+            self.archive.save(self.archive_path)
+
+    async def stop(self):
+        if self._saver is not None:
+            self._saver.cancel()
+            self._saver = None
+        for runner in self._runners:
+            await runner.cleanup()
+        self._runners.clear()
+        for proxy in self.proxies.values():
+            await proxy.close()
+        if self.mode == "record":
+            self.archive.save(self.archive_path)
+
+    def url(self, name: str) -> str:
+        return f"http://{self.host}:{self.ports[name]}"
+
+    def backend_env(self) -> Dict[str, str]:
+        """Base URLs for the proxies; when replaying, placeholder keys as well (recording uses the real ones)"""
+        env = base_url_env(self.url)
+        return {**STUB_KEYS, **env} if self.mode == "replay" else env
+
+    def request_counts(self) -> Dict[str, int]:
+        return {name: proxy.requests for name, proxy in self.proxies.items()}
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {"requests": proxy.requests, "misses": proxy.misses, "approximate": proxy.approximate}
+            for name, proxy in self.proxies.items()
+        }
@@ -0,0 +1,94 @@
+"""
+One benchmark scenario per /api route that can be driven on its own.
+
+Request inputs rotate through a small pool of cities and coordinates, so a
+warm run mostly exercises the caches. With cold=True every request uses a
+distinct input and reaches the (stub) provider.
+
+Not covered: routes keyed by ids that other calls create (jobs, trips,
+itineraries and bookings by id), the job SSE stream, job submission (it
+queues background work and starts shedding once the queue is full),
+booking creation, and the admin-only debug endpoints.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Callable, List
+
+from benchmarks.load import Scenario
+
+CITIES = ["Paris", "London", "Tokyo", "New York", "Rome", "Barcelona", "Berlin", "Lisbon"]
+AIRPORTS = ["JFK", "LHR", "CDG", "NRT", "FCO", "BCN", "BER", "LIS"]
+
+
+def scenarios(cold: bool = False) -> List[Scenario]:
+    def key(i: int) -> int:
+        return i if cold else i % len(CITIES)
+
+    def city(i: int) -> str:
+        k = key(i)
+        return CITIES[k % len(CITIES)] + (f" {k}" if cold else "")
+
+    def coords(i: int):
+        k = key(i)
+        return 40 + k * 0.01, -3 - k * 0.01
+
+    def airport(i: int) -> str:
+        return AIRPORTS[key(i) % len(AIRPORTS)]
+
+    departure = (date.today() + timedelta(days=60)).isoformat()
+    returning = (date.today() + timedelta(days=63)).isoformat()
+
+    def post(payload: Callable[[int], dict]):
+        return lambda i: {"json": payload(i)}
+
+    def get(params: Callable[[int], dict]):
+        return lambda i: {"params": params(i)}
+
+    return [
+        Scenario("status", "GET", "/api/status", tags=("local",)),
+        Scenario("health_live", "GET", "/api/health/live", tags=("local",)),
+        Scenario("health_ready", "GET", "/api/health/ready", tags=("local",)),
+        Scenario("status_create", "POST", "/api/status", post(lambda i: {
+            "id": f"bench-{i}", "status": "ok", "timestamp": datetime.utcnow().isoformat(), "message": "benchmark",
+        }), tags=("local",)),
+        Scenario("weather_current", "GET", "/api/weather/current", get(lambda i: dict(zip(("lat", "lon"), coords(i))))),
+        Scenario("weather_forecast", "GET", "/api/weather/forecast", get(lambda i: {**dict(zip(("lat", "lon"), coords(i))), "days": 5})),
+        Scenario("ai_itinerary", "POST", "/api/ai/generate-itinerary", post(lambda i: {
+            "location": city(i), "mood": "adventurous", "budget": "medium", "duration_hours": 4,
+        })),
+        Scenario("ai_journal_recap", "POST", "/api/ai/generate-journal-recap", post(lambda i: {
+            "activities": ["Museum visit", "Dinner by the river"], "location": city(i), "date": departure,
+        })),
+        Scenario("places_search", "POST", "/api/places/search", post(lambda i: {"query": "coffee", "location": city(i)})),
+        Scenario("places_details", "GET", "/api/places/details", get(lambda i: {"place_id": f"bench-place-{key(i)}"})),
+        Scenario("places_nearby", "POST", "/api/places/nearby", post(lambda i: dict(zip(("latitude", "longitude"), coords(i))))),
+        Scenario("places_geocode", "POST", "/api/places/geocode", post(lambda i: {"address": city(i)})),
+        Scenario("locations_airports", "GET", "/api/locations/airports", get(lambda i: {"keyword": city(i)})),
+        Scenario("locations_cities", "GET", "/api/locations/cities", get(lambda i: {"keyword": city(i)})),
+        Scenario("amadeus_airports", "GET", "/api/amadeus/search-airports", get(lambda i: {"keyword": city(i)})),
+        Scenario("amadeus_cities", "GET", "/api/amadeus/search-cities", get(lambda i: {"keyword": city(i)})),
+        Scenario("flights_search", "POST", "/api/flights/search", post(lambda i: {
+            "origin": airport(i), "destination": airport(i + 1), "departure_date": departure, "return_date": returning, "adults": 1,
+        })),
+        Scenario("flights_search_smart", "POST", "/api/flights/search-smart", post(lambda i: {
+            "origin": airport(i), "destination": airport(i + 1), "departureDate": departure, "returnDate": returning,
+            "adults": 1, "budget_context": {"total": 2500},
+            "smart_features": {"budgetIntelligence": True, "sustainabilityMode": True, "moodBasedSuggestions": True},
+        })),
+        Scenario("flights_flexible", "POST", "/api/flights/flexible-search", post(lambda i: {
+            "origin": airport(i), "destination": airport(i + 1), "departure_date": departure, "adults": 1,
+        })),
+        Scenario("hotels_search", "POST", "/api/hotels/search", post(lambda i: {
+            "location": airport(i), "check_in": departure, "check_out": returning, "guests": 2,
+        })),
+        Scenario("here_now_plan", "POST", "/api/here-now/plan", post(lambda i: {
+            "location": city(i), "mood": "relaxed", "budget": "$$", "duration_hours": 4,
+        }), tags=("composite",)),
+        Scenario("trip_plan_and_book", "POST", "/api/trip/plan-and-book", post(lambda i: {
+            "destination": city(i), "departure_date": departure, "return_date": returning, "budget": 2500,
+            "travelers": {"adults": 2}, "preferences": {"mood": "adventurous", "budget": "medium", "origin": airport(i + 1)},
+        }), tags=("composite",)),
+        Scenario("trips_list", "GET", "/api/trips", get(lambda i: {"limit": 20}), tags=("local",)),
+        Scenario("itineraries_list", "GET", "/api/itineraries", get(lambda i: {"limit": 20}), tags=("local",)),
+        Scenario("bookings_list", "GET", "/api/bookings", get(lambda i: {"limit": 20}), tags=("local",)),
+    ]
@@ -0,0 +1,360 @@
+"""
+Local stand-ins for every upstream provider.
+
+Each provider gets its own aiohttp server answering the endpoints the
+integrations actually call, with response shapes the integrations parse.
+Latency is drawn per request from a configurable distribution and payload
+size is set by the number of items per response plus optional padding.
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from aiohttp import web
+
+# median/p99 in milliseconds; results/items = records per response;
+# pad_bytes = extra text per record to grow payloads
+PROFILES: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "default": {
+        "google": {"latency": {"median_ms": 80, "p99_ms": 400}, "results": 20, "pad_bytes": 0},
+        "amadeus": {"latency": {"median_ms": 300, "p99_ms": 1500}, "results": 10, "pad_bytes": 0},
+        "openai": {"latency": {"median_ms": 2500, "p99_ms": 8000}, "results": 5, "pad_bytes": 0},
+        "open_meteo": {"latency": {"median_ms": 60, "p99_ms": 250}, "results": 168, "pad_bytes": 0},
+        "foursquare": {"latency": {"median_ms": 120, "p99_ms": 600}, "results": 10, "pad_bytes": 0},
+        "eventbrite": {"latency": {"median_ms": 200, "p99_ms": 900}, "results": 10, "pad_bytes": 0},
+    },
+    # Near-zero upstream time, to measure our own overhead
+    "fast": {
+        name: {"latency": {"median_ms": 2, "p99_ms": 5}, "results": results, "pad_bytes": 0}
+        for name, results in (
+            ("google", 20), ("amadeus", 10), ("openai", 5), ("open_meteo", 168), ("foursquare", 10), ("eventbrite", 10)
+        )
+    },
+}
+
+PROVIDERS = ("google", "amadeus", "openai", "open_meteo", "foursquare", "eventbrite")
+
+
+class Latency:
+    """Log-normal latency fitted to a median and p99 (fixed when they are equal)"""
+
+    def __init__(self, median_ms: float, p99_ms: Optional[float] = None):
+        self.median = median_ms / 1000
+        p99 = (p99_ms if p99_ms is not None else median_ms) / 1000
+        # z(0.99) = 2.326
+        self.sigma = math.log(p99 / self.median) / 2.326 if p99 > self.median > 0 else 0.0
+
+    def sample(self) -> float:
+        if self.sigma == 0:
+            return self.median
+        return random.lognormvariate(math.log(self.median), self.sigma)
+
+
+def _pad(config: Dict[str, Any]) -> str:
+    return "x" * int(config.get("pad_bytes", 0))
+
+
+class ProviderStub:
+    """Base for one provider: latency injection and request counting"""
+
+    name = ""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.latency = Latency(**config.get("latency", {"median_ms": 50}))
+        self.results = int(config.get("results", 10))
+        self.requests = 0
+
+    def routes(self) -> List[web.RouteDef]:
+        raise NotImplementedError
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler):
+        self.requests += 1
+        await asyncio.sleep(self.latency.sample())
+        return await handler(request)
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.middleware])
+        app.add_routes(self.routes())
+        return app
+
+
+class GoogleStub(ProviderStub):
+    name = "google"
+
+    def _place(self, i: int, lat: float, lng: float) -> Dict[str, Any]:
+        return {
+            "place_id": f"stub-place-{i}",
+            "name": f"Stub Place {i}",
+            "rating": round(3.5 + (i % 15) / 10, 1),
+            "price_level": i % 4,
+            "types": ["tourist_attraction", "point_of_interest"],
+            "vicinity": f"{i} Stub Street",
+            "formatted_address": f"{i} Stub Street, Stub City",
+            "geometry": {"location": {"lat": lat + i * 1e-4, "lng": lng + i * 1e-4}},
+            "user_ratings_total": 100 + i,
+            "photos": [{"photo_reference": f"stub-photo-{i}", "width": 400, "height": 300, "html_attributions": []}],
+            "description": _pad(self.config),
+        }
+
+    @staticmethod
+    def _location(request: web.Request):
+        lat, _, lng = request.query.get("location", "48.8566,2.3522").partition(",")
+        return float(lat), float(lng or 0)
+
+    async def geocode(self, request: web.Request):
+        address = request.query.get("address", "")
+        # Stable per address, so distinct addresses land on distinct cache keys
+        seed = sum(map(ord, address)) % 1000
+        return web.json_response({"status": "OK", "results": [{
+            "formatted_address": f"{address}, Stub Country",
+            "geometry": {"location": {"lat": 40 + seed / 100, "lng": -3 + seed / 100}},
+            "place_id": f"stub-geo-{seed}",
+            "types": ["locality", "political"],
+        }]})
+
+    async def search(self, request: web.Request):
+        lat, lng = self._location(request)
+        return web.json_response({"status": "OK", "results": [self._place(i, lat, lng) for i in range(self.results)]})
+
+    async def details(self, request: web.Request):
+        place = self._place(0, 48.8566, 2.3522)
+        place.update(place_id=request.query.get("place_id", "stub"), website="https://example.com", formatted_phone_number="+1 555 0100")
+        return web.json_response({"status": "OK", "result": place})
+
+    def routes(self):
+        return [
+            web.get("/maps/api/geocode/json", self.geocode),
+            web.get("/maps/api/place/nearbysearch/json", self.search),
+            web.get("/maps/api/place/textsearch/json", self.search),
+            web.get("/maps/api/place/details/json", self.details),
+        ]
+
+
+def _amadeus_json(payload: Any) -> web.Response:
+    # The SDK only parses bodies whose Content-Type is exactly its JSON type (no charset)
+    return web.Response(body=json.dumps(payload).encode(), content_type="application/vnd.amadeus+json")
+
+
+class AmadeusStub(ProviderStub):
+    name = "amadeus"
+
+    def _offer(self, i: int, origin: str, destination: str, departure: str) -> Dict[str, Any]:
+        segment = {
+            "departure": {"iataCode": origin, "at": f"{departure}T08:00:00"},
+            "arrival": {"iataCode": destination, "at": f"{departure}T15:00:00"},
+            "carrierCode": "ST", "number": str(100 + i), "aircraft": {"code": "320"},
+            "duration": "PT7H", "id": str(i), "numberOfStops": 0,
+        }
+        total = f"{300 + i * 25}.00"
+        return {
+            "type": "flight-offer", "id": str(i + 1), "source": "GDS",
+            "itineraries": [{"duration": "PT7H", "segments": [segment]}],
+            "price": {"currency": "USD", "total": total, "base": total, "grandTotal": total},
+            "travelerPricings": [{"travelerId": "1", "travelerType": "ADULT", "price": {"currency": "USD", "total": total}}],
+            "validatingAirlineCodes": ["ST"],
+            "description": _pad(self.config),
+        }
+
+    async def token(self, request: web.Request):
+        return _amadeus_json({"type": "amadeusOAuth2Token", "access_token": "stub-token", "token_type": "Bearer", "expires_in": 1799, "state": "approved"})
+
+    async def flight_offers(self, request: web.Request):
+        q = request.query
+        data = [self._offer(i, q.get("originLocationCode", "JFK"), q.get("destinationLocationCode", "LHR"), q.get("departureDate", "2030-01-01")) for i in range(self.results)]
+        return _amadeus_json({"meta": {"count": len(data)}, "data": data})
+
+    async def flight_dates(self, request: web.Request):
+        q = request.query
+        start = date.fromisoformat(q.get("departureDate", "2030-01-01")[:10])
+        data = [{
+            "type": "flight-date", "origin": q.get("origin"), "destination": q.get("destination"),
+            "departureDate": (start + timedelta(days=i)).isoformat(),
+            "returnDate": (start + timedelta(days=i + 7)).isoformat(),
+            "price": {"total": f"{280 + i * 10}.00"},
+        } for i in range(self.results)]
+        return _amadeus_json({"data": data})
+
+    async def hotel_offers(self, request: web.Request):
+        data = [{
+            "type": "hotel-offers",
+            "hotel": {"hotelId": f"STUB{i:04d}", "name": f"Stub Hotel {i}", "rating": 3 + i % 3, "address": {"cityName": "STUB"}, "amenities": ["WIFI"]},
+            "offers": [{"id": f"offer-{i}", "price": {"currency": "USD", "total": f"{120 + i * 15}.00"}}],
+        } for i in range(self.results)]
+        return _amadeus_json({"data": data})
+
+    async def locations(self, request: web.Request):
+        keyword = request.query.get("keyword", "STU").upper()
+        sub_type = request.query.get("subType", "AIRPORT")
+        data = [{
+            "type": "location", "subType": sub_type, "name": f"{keyword} {sub_type.title()} {i}",
+            "iataCode": (keyword[:2] + chr(65 + i % 26)) if len(keyword) >= 2 else "STU",
+            "address": {"cityName": keyword, "countryCode": "ST"},
+            "geoCode": {"latitude": 48.85, "longitude": 2.35},
+        } for i in range(min(self.results, 5))]
+        return _amadeus_json({"meta": {"count": len(data)}, "data": data})
+
+    async def pricing(self, request: web.Request):
+        return _amadeus_json({"data": {"type": "flight-offers-pricing", "flightOffers": [self._offer(0, "JFK", "LHR", "2030-01-01")]}})
+
+    def routes(self):
+        return [
+            web.post("/v1/security/oauth2/token", self.token),
+            web.get("/v2/shopping/flight-offers", self.flight_offers),
+            web.get("/v1/shopping/flight-dates", self.flight_dates),
+            web.get("/v3/shopping/hotel-offers", self.hotel_offers),
+            web.get("/v1/reference-data/locations", self.locations),
+            web.post("/v1/shopping/flight-offers/pricing", self.pricing),
+        ]
+
+
+class OpenAIStub(ProviderStub):
+    name = "openai"
+
+    async def completions(self, request: web.Request):
+        body = await request.json()
+        prompt_chars = sum(len(m.get("content", "")) for m in body.get("messages", []))
+        # One body that parses as an itinerary and as a journal recap
+        content = json.dumps({
+            "activities": [{
+                "title": f"Stub Activity {i}", "description": "A stubbed activity. " + _pad(self.config),
+                "location": "Stub City", "duration_minutes": 90, "estimated_cost": "$$", "category": "exploration",
+            } for i in range(self.results)],
+            "narrative_summary": "A stubbed day out.",
+            "total_estimated_cost": "$$",
+            "title": "Stub Journal", "content": "A stubbed journal entry.", "highlights": ["Stub highlight"],
+            "mood_score": 8, "shareable_text": "Stubbed!",
+        })
+        completion_tokens = len(content) // 4
+        prompt_tokens = prompt_chars // 4
+        return web.json_response({
+            "id": f"chatcmpl-stub-{self.requests}", "object": "chat.completion", "created": int(time.time()),
+            "model": body.get("model", "gpt-4"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+    def routes(self):
+        return [web.post("/v1/chat/completions", self.completions)]
+
+
+class OpenMeteoStub(ProviderStub):
+    name = "open_meteo"
+
+    async def forecast(self, request: web.Request):
+        q = request.query
+        start = date.today()
+        hours = [f"{(start + timedelta(days=h // 24)).isoformat()}T{h % 24:02d}:00" for h in range(self.results)]
+        payload: Dict[str, Any] = {"latitude": float(q.get("latitude", 0)), "longitude": float(q.get("longitude", 0)), "timezone": "GMT"}
+        if q.get("current_weather"):
+            payload["current_weather"] = {"time": hours[0], "temperature": 21.5, "windspeed": 9.0, "winddirection": 200, "weathercode": 1}
+            payload["hourly"] = {
+                "time": hours,
+                **{key: [50 + h % 10 for h in range(len(hours))] for key in q.get("hourly", "").split(",") if key},
+            }
+        if q.get("daily"):
+            days = int(q.get("forecast_days", 7))
+            payload["daily"] = {
+                "time": [(start + timedelta(days=d)).isoformat() for d in range(days)],
+                **{key: [10 + d for d in range(days)] for key in q.get("daily", "").split(",") if key},
+            }
+        return web.json_response(payload)
+
+    def routes(self):
+        return [web.get("/v1/forecast", self.forecast)]
+
+
+class FoursquareStub(ProviderStub):
+    name = "foursquare"
+
+    async def search(self, request: web.Request):
+        return web.json_response({"results": [{
+            "fsq_id": f"stub-fsq-{i}", "name": f"Stub Restaurant {i}",
+            "location": {"formatted_address": f"{i} Stub Avenue"},
+            "categories": [{"id": 13065, "name": "Restaurant"}], "rating": 8.0, "price": 2,
+            "description": _pad(self.config),
+        } for i in range(self.results)]})
+
+    async def photos(self, request: web.Request):
+        return web.json_response([{"id": "stub-photo", "prefix": "https://example.com/photos/", "suffix": "/stub.jpg", "width": 800, "height": 600}])
+
+    def routes(self):
+        return [web.get("/v3/places/search", self.search), web.get("/v3/places/{fsq_id}/photos", self.photos)]
+
+
+class EventbriteStub(ProviderStub):
+    name = "eventbrite"
+
+    async def search(self, request: web.Request):
+        return web.json_response({"events": [{
+            "id": f"stub-event-{i}", "name": {"text": f"Stub Event {i}"},
+            "start": {"local": "2030-01-01T19:00:00"}, "venue": {"name": "Stub Hall"},
+            "description": {"text": _pad(self.config)},
+        } for i in range(self.results)]})
+
+    def routes(self):
+        return [web.get("/v3/events/search/", self.search)]
+
+
+STUBS = {stub.name: stub for stub in (GoogleStub, AmadeusStub, OpenAIStub, OpenMeteoStub, FoursquareStub, EventbriteStub)}
+
+
+# Keys the integrations require to start; the stubs accept anything
+STUB_KEYS = {
+    "GOOGLE_MAPS_API_KEY": "AIzaStubKeyForBenchmarks",
+    "AMADEUS_API_KEY": "stub", "AMADEUS_API_SECRET": "stub",
+    "AMADEUS_CLIENT_ID": "stub", "AMADEUS_CLIENT_SECRET": "stub",
+    "OPENAI_API_KEY": "sk-stub",
+    "FOURSQUARE_API_KEY": "stub",
+    "EVENTBRITE_API_KEY": "stub",
+}
+
+
+def base_url_env(url: Callable[[str], str]) -> Dict[str, str]:
+    """Base-URL overrides sending each integration to url(provider)"""
+    return {
+        "GOOGLE_MAPS_BASE_URL": url("google"),
+        "AMADEUS_BASE_URL": url("amadeus"),
+        "OPENAI_BASE_URL": url("openai") + "/v1",
+        "OPEN_METEO_BASE_URL": url("open_meteo") + "/v1",
+        "FOURSQUARE_API_BASE": url("foursquare") + "/v3",
+        "EVENTBRITE_API_BASE": url("eventbrite") + "/v3",
+    }
+
+
+class StubServers:
+    """Run every provider stub on consecutive ports starting at base_port"""
+
+    def __init__(self, profile: Dict[str, Dict[str, Any]], host: str = "127.0.0.1", base_port: int = 9100):
+        self.host = host
+        self.stubs = {name: STUBS[name](profile[name]) for name in PROVIDERS}
+        self.ports = {name: base_port + i for i, name in enumerate(PROVIDERS)}
+        self._runners: List[web.AppRunner] = []
+
+    async def start(self):
+        for name, stub in self.stubs.items():
+            runner = web.AppRunner(stub.app(), access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, self.host, self.ports[name]).start()
+            self._runners.append(runner)
+
+    async def stop(self):
+        for runner in self._runners:
+            await runner.cleanup()
+        self._runners.clear()
+
+    def url(self, name: str) -> str:
+        return f"http://{self.host}:{self.ports[name]}"
+
+    def backend_env(self) -> Dict[str, str]:
+        """Environment that points the backend's integrations at these stubs"""
+        return {**STUB_KEYS, **base_url_env(self.url)}
+
+    def request_counts(self) -> Dict[str, int]:
+        return {name: stub.requests for name, stub in self.stubs.items()}
@@ -5,17 +5,32 @@ set -e
 cd /backend || { echo "Backend directory not found"; exit 1; }
 
 echo "Starting FastAPI backend"
-# Start Uvicorn with proper host binding
-uvicorn server:app --host 0.0.0.0 --port 8001 &
+# Gunicorn preloads the app and forks WEB_CONCURRENCY uvicorn workers
+# (defaults to one per CPU, see gunicorn.conf.py)
+gunicorn -c gunicorn.conf.py server:app &
 BACKEND_PID=$!
 
-echo "Waiting for backend to start..."
-sleep 30
-
-if ! kill -0 $BACKEND_PID 2>/dev/null; then
-    echo "Backend failed to start at initialization, exiting"
-    exit 1
-fi
+# Wait for the readiness endpoint instead of a fixed sleep: it turns green
+# once the app lifespan has connected Mongo, opened pools and warmed caches
+READY_URL="${READY_URL:-http://127.0.0.1:8001/api/health/ready}"
+READY_TIMEOUT="${READY_TIMEOUT:-120}"
+
+echo "Waiting for backend to become ready..."
+WAITED=0
+until wget -q -O /dev/null "$READY_URL" 2>/dev/null; do
+    if ! kill -0 $BACKEND_PID 2>/dev/null; then
+        echo "Backend failed to start at initialization, exiting"
+        exit 1
+    fi
+    if [ "$WAITED" -ge "$((READY_TIMEOUT * 2))" ]; then
+        echo "Backend not ready after ${READY_TIMEOUT}s, exiting"
+        kill $BACKEND_PID
+        exit 1
+    fi
+    sleep 0.5
+    WAITED=$((WAITED + 1))
+done
+echo "Backend ready after ~$((WAITED / 2))s"
 
 # Start Nginx
 nginx -g 'daemon off;' &
@@ -0,0 +1,54 @@
+"""
+POST /api/bookings validation, idempotent replay and storage, against an
+in-memory Mongo and without Amadeus credentials.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("fastapi")
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from core.booking_store import BookingStore  # noqa: E402
+from external_integrations import trip_mode_integration  # noqa: E402
+
+
+@pytest.fixture
+def bookings(monkeypatch):
+    import server
+
+    monkeypatch.delenv("AMADEUS_PRODUCTION_CLIENT_ID", raising=False)
+    monkeypatch.delenv("AMADEUS_CLIENT_ID", raising=False)
+    db = mongomock_motor.AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(trip_mode_integration, "_booking_store", BookingStore(db))
+    return TestClient(server.app), db.bookings
+
+
+BOOKING = {"trip_type": "flight", "flight_id": "FL-1", "guest_details": {"name": "Ada"}, "total_price": 420.0}
+
+
+def test_invalid_payload_is_a_422(bookings):
+    client, _ = bookings
+    response = client.post("/api/bookings", json={"trip_type": "flight", "total_price": "lots"})
+    assert response.status_code == 422
+    assert client.post("/api/bookings", json={**BOOKING, "trip_type": "cruise"}).status_code == 400
+
+
+def test_booking_is_stored_with_utc_datetime_and_replayed_by_key(bookings):
+    client, collection = bookings
+    first = client.post("/api/bookings", json=BOOKING, headers={"Idempotency-Key": "k1"})
+    assert first.status_code == 200, first.text
+    booking = first.json()["booking"]
+    assert booking["booking_id"].startswith("DRIFT-FL-") and booking["flight_id"] == "FL-1"
+
+    again = client.post("/api/bookings", json=BOOKING, headers={"Idempotency-Key": "k1"})
+    assert again.json()["booking"]["booking_id"] == booking["booking_id"]
+
+    stored = asyncio.run(collection.find_one({"booking_id": booking["booking_id"]}))
+    assert isinstance(stored["created_at"], datetime)
+    assert stored["idempotency_key"] == "k1"
+    assert asyncio.run(collection.count_documents({})) == 1
@@ -0,0 +1,139 @@
+"""
+TieredCache single-flight loading and stale fallback, with the L1 only.
+"""
+
+import asyncio
+
+import pytest
+
+from core import cache
+from core.cache import TieredCache
+from core.errors import CallRejected
+
+
+@pytest.fixture(autouse=True)
+def no_shared_backend(monkeypatch):
+    monkeypatch.setattr(cache, "_shared_backend", None)
+
+
+def test_concurrent_misses_share_one_load():
+    async def main():
+        tiered = TieredCache("test", ttl_seconds=60)
+        calls = 0
+        release = asyncio.Event()
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"city": "Paris"}
+
+        waiters = [asyncio.create_task(tiered.get_or_load("paris", load)) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        release.set()
+        results = await asyncio.gather(*waiters)
+        assert calls == 1
+        assert all(result == {"city": "Paris"} for result in results)
+        assert await tiered.get_or_load("paris", load) == {"city": "Paris"}
+        assert calls == 1
+
+    asyncio.run(main())
+
+
+def test_failed_load_reaches_every_waiter_and_is_not_cached():
+    async def main():
+        tiered = TieredCache("test", ttl_seconds=60)
+
+        async def load():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("provider down")
+
+        results = await asyncio.gather(*(tiered.get_or_load("paris", load) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert tiered._inflight == {}
+        assert await tiered.get("paris") is None
+
+    asyncio.run(main())
+
+
+def test_should_cache_skips_empty_results():
+    async def main():
+        tiered = TieredCache("test", ttl_seconds=60)
+        assert await tiered.get_or_load("nowhere", lambda: asyncio.sleep(0, []), should_cache=bool) == []
+        assert await tiered.get("nowhere") is None
+
+    asyncio.run(main())
+
+
+def test_rejected_call_serves_stale_value():
+    async def main():
+        tiered = TieredCache("test", ttl_seconds=0.01)
+        await tiered.set("paris", {"temp": 20})
+        await asyncio.sleep(0.02)
+
+        async def rejected():
+            raise CallRejected("weather", "circuit open", 5.0)
+
+        assert await tiered.get_or_load("paris", rejected) == {"temp": 20}
+        assert tiered.stale_hits == 1
+
+        # Nothing stale to fall back on: the rejection propagates
+        with pytest.raises(CallRejected):
+            await tiered.get_or_load("lyon", rejected)
+
+    asyncio.run(main())
+
+
+def test_provider_failure_does_not_serve_stale():
+    async def main():
+        tiered = TieredCache("test", ttl_seconds=0.01)
+        await tiered.set("paris", {"temp": 20})
+        await asyncio.sleep(0.02)
+
+        async def broken():
+            raise RuntimeError("HTTP 500")
+
+        with pytest.raises(RuntimeError):
+            await tiered.get_or_load("paris", broken)
+
+    asyncio.run(main())
+
+
+def test_invalidate_prefix_treats_regex_metacharacters_literally(monkeypatch):
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    backend = cache.MongoCacheBackend(mongomock_motor.AsyncMongoMockClient()["test"])
+    monkeypatch.setattr(cache, "_shared_backend", backend)
+
+    async def main():
+        tiered = TieredCache("places_test", ttl_seconds=60)
+        monkeypatch.setitem(cache._caches, "places_test", tiered)
+        keys = [
+            "search:st. louis (mo)",
+            "search:st. louis (mo):museum",
+            "search:stx louis (mo)",
+            "search:st. louis mo",
+            "search:a+b*c?",
+            "search:a+b*c?:1",
+            "search:aab*c?",
+            "nearby:38.6,-90.2",
+        ]
+        for key in keys:
+            await tiered.set(key, {"key": key})
+
+        # "." "(" ")" must not match any character or group
+        assert await tiered.invalidate_prefix("search:st. louis (mo)") == {"l1": 2, "l2": 2}
+        assert await tiered.invalidate_prefix("search:a+b*c?") == {"l1": 2, "l2": 2}
+        left = ["search:stx louis (mo)", "search:st. louis mo", "search:aab*c?", "nearby:38.6,-90.2"]
+        assert sorted(tiered.l1.keys()) == sorted(left)
+        assert sorted([doc["_id"] async for doc in backend._collection("places_test").find({}, {"_id": 1})]) == sorted(left)
+        assert tiered.invalidations == 8
+
+        report = await cache.cache_report("places_test", keys_prefix="search:")
+        assert report["entries"] == 4 and report["l2_entries"] == 4
+        assert sorted(report["keys"]) == ["search:aab*c?", "search:st. louis mo", "search:stx louis (mo)"]
+
+        # An empty prefix clears the namespace
+        assert await tiered.invalidate_prefix("") == {"l1": 4, "l2": 4}
+        assert len(tiered.l1) == 0
+
+    asyncio.run(main())
@@ -0,0 +1,223 @@
+"""
+Circuit breaker state transitions, and how a rejected provider call reaches
+API clients.
+"""
+
+import time
+
+import pytest
+
+from core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+from core.errors import CallRejected
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def fail(breaker, error=None):
+    with pytest.raises(type(error) if error else RuntimeError):
+        with breaker.guard():
+            raise error or RuntimeError("connection reset")
+
+
+def succeed(breaker):
+    with breaker.guard():
+        pass
+
+
+def test_opens_once_failure_rate_crosses_threshold_after_min_calls():
+    breaker = CircuitBreaker("test", failure_rate=0.5, min_calls=4, open_seconds=30)
+    fail(breaker)
+    fail(breaker)
+    fail(breaker)
+    # Too few calls in the window to judge the provider yet
+    assert breaker.state == CLOSED
+    succeed(breaker)
+    fail(breaker)
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpen) as rejected:
+        succeed(breaker)
+    assert 29 < rejected.value.retry_after <= 30
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_client_errors_and_local_rejections_do_not_count():
+    breaker = CircuitBreaker("test", failure_rate=0.5, min_calls=2)
+    for _ in range(5):
+        fail(breaker, CallRejected("test", "shed", 1.0))
+    assert breaker.stats()["window_calls"] == 0
+    # A 4xx is the provider answering: it counts as a healthy call
+    fail(breaker, ProviderError(404))
+    fail(breaker, ProviderError(400))
+    fail(breaker, ProviderError(503))
+    assert breaker.state == CLOSED
+    fail(breaker, ProviderError(502))
+    assert breaker.state == OPEN
+
+
+def open_breaker(**kwargs) -> CircuitBreaker:
+    breaker = CircuitBreaker("test", failure_rate=0.5, min_calls=1, **kwargs)
+    fail(breaker)
+    assert breaker.state == OPEN
+    return breaker
+
+
+def test_half_open_probe_success_closes():
+    breaker = open_breaker(open_seconds=0.05, probes=1)
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    # Only one probe at a time
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    succeed(breaker)
+
+
+def test_half_open_probe_failure_reopens():
+    breaker = open_breaker(open_seconds=0.05, probes=1)
+    time.sleep(0.06)
+    fail(breaker)
+    assert breaker.state == OPEN
+    assert breaker.stats()["times_opened"] == 2
+    with pytest.raises(CircuitOpen):
+        succeed(breaker)
+
+
+def test_cancelled_probe_gives_its_slot_back():
+    breaker = open_breaker(open_seconds=0.05, probes=1)
+    time.sleep(0.06)
+    with pytest.raises(KeyboardInterrupt):
+        with breaker.guard():
+            raise KeyboardInterrupt
+    assert breaker.state == HALF_OPEN
+    succeed(breaker)
+    assert breaker.state == CLOSED
+
+
+@pytest.fixture
+def client(monkeypatch):
+    pytest.importorskip("fastapi")
+    pytest.importorskip("motor")
+    from fastapi.testclient import TestClient
+
+    from core import cache
+    from external_integrations.weather_integration import WeatherIntegration
+    import server
+
+    async def no_pool(self):
+        pass
+
+    # No Mongo or network here: keep the caches in-process and never open
+    # an HTTP pool, since the guards reject the call before it is used
+    monkeypatch.setattr(cache, "_shared_backend", None)
+    monkeypatch.setattr(WeatherIntegration, "open", no_pool)
+    return TestClient(server.app)
+
+
+def test_open_circuit_answers_503_with_retry_after(client, monkeypatch):
+    from external_integrations import weather_integration
+
+    breaker = weather_integration.circuit_breaker
+    monkeypatch.setattr(breaker, "state", OPEN)
+    monkeypatch.setattr(breaker, "opened_at", time.monotonic())
+    monkeypatch.setattr(breaker, "open_seconds", 12.0)
+
+    response = client.get("/api/weather/current", params={"lat": 48.85, "lon": 2.35})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "12"
+    assert "circuit is open" in response.json()["detail"]
+
+
+def test_deadline_exceeded_answers_504(client, monkeypatch):
+    from core.deadline import DeadlineExceeded
+    from external_integrations import weather_integration
+
+    def expired():
+        raise DeadlineExceeded("weather")
+
+    monkeypatch.setattr(weather_integration.circuit_breaker, "before_call", expired)
+    response = client.get("/api/weather/forecast", params={"lat": 45.76, "lon": 4.84})
+    assert response.status_code == 504
+
+
+def test_weather_client_errors_carry_their_status(monkeypatch):
+    import asyncio
+
+    web = pytest.importorskip("aiohttp.web")
+    from aiohttp.test_utils import TestServer
+
+    from external_integrations import weather_integration
+
+    async def not_found(request):
+        return web.Response(status=404)
+
+    async def unavailable(request):
+        return web.Response(status=503)
+
+    app = web.Application()
+    app.router.add_get("/missing", not_found)
+    app.router.add_get("/down", unavailable)
+    breaker = CircuitBreaker("weather", failure_rate=0.5, min_calls=2)
+    monkeypatch.setattr(weather_integration, "circuit_breaker", breaker)
+
+    async def main():
+        weather = weather_integration.WeatherIntegration()
+        async with TestServer(app) as server:
+            try:
+                for _ in range(3):
+                    with pytest.raises(Exception):
+                        await weather._fetch(str(server.make_url("/missing")), {}, "test")
+                assert breaker.state == CLOSED
+                for _ in range(4):
+                    with pytest.raises(Exception):
+                        await weather._fetch(str(server.make_url("/down")), {}, "test")
+                assert breaker.state == OPEN
+            finally:
+                await weather.close()
+
+    asyncio.run(main())
+
+
+def test_deadline_hit_mid_call_counts_against_the_provider():
+    import asyncio
+
+    from core import deadline
+    from core.concurrency import AdaptiveLimiter
+    from core.deadline import DeadlineExceeded, request_deadline, run_blocking
+
+    breaker = CircuitBreaker("test", failure_rate=0.5, min_calls=2)
+    limiter = AdaptiveLimiter("test", initial=10, backoff=0.5)
+
+    async def call():
+        with breaker.guard():
+            async with limiter.slot():
+                return await run_blocking("test", time.sleep, 0.4)
+
+    async def main():
+        # Out of time before the call starts: shed locally, nothing recorded
+        deadline._deadline.set(time.monotonic() - 1)
+        with pytest.raises(DeadlineExceeded) as shed:
+            await call()
+        assert not shed.value.in_flight
+        assert breaker.stats()["window_calls"] == 0
+        assert limiter.limit == 10
+        deadline._deadline.set(None)
+
+        # Out of time while the provider is still answering: a timeout
+        for _ in range(2):
+            limiter._last_decrease = 0.0
+            with pytest.raises(DeadlineExceeded) as hung:
+                async with request_deadline(0.3):
+                    await call()
+            assert hung.value.in_flight
+        assert breaker.state == OPEN
+        assert limiter.limit == 2.5
+        assert limiter.inflight == 0
+
+    asyncio.run(main())
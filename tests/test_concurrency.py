@@ -0,0 +1,113 @@
+"""
+AdaptiveLimiter slot hand-off, timeouts and limit adjustments.
+"""
+
+import asyncio
+
+import pytest
+
+from core.concurrency import AdaptiveLimiter, ConcurrencyLimitExceeded
+from core.rate_limit import RateLimitExceeded
+
+
+def test_waiters_get_slots_in_order():
+    async def main():
+        limiter = AdaptiveLimiter("test", initial=2)
+        await limiter.acquire()
+        await limiter.acquire()
+        order = []
+
+        async def wait(name):
+            await limiter.acquire()
+            order.append(name)
+
+        waiters = [asyncio.create_task(wait(name)) for name in ("a", "b")]
+        await asyncio.sleep(0.01)
+        assert limiter.stats()["waiting"] == 2
+        limiter.release()
+        await asyncio.sleep(0.01)
+        assert order == ["a"]
+        limiter.release()
+        await asyncio.gather(*waiters)
+        assert order == ["a", "b"] and limiter.inflight == 2
+
+    asyncio.run(main())
+
+
+def test_wait_is_bounded_by_max_wait():
+    async def main():
+        limiter = AdaptiveLimiter("test", initial=1, max_wait=0.05)
+        await limiter.acquire()
+        with pytest.raises(ConcurrencyLimitExceeded):
+            await limiter.acquire()
+        assert limiter.rejected == 1 and limiter.inflight == 1 and not limiter._waiters
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_does_not_keep_a_slot():
+    async def main():
+        limiter = AdaptiveLimiter("test", initial=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release()
+        assert limiter.inflight == 0
+        await asyncio.wait_for(limiter.acquire(), 0.1)
+
+    asyncio.run(main())
+
+
+def test_limit_grows_while_latency_stays_flat_and_shrinks_when_it_rises():
+    limiter = AdaptiveLimiter("test", initial=10, max_limit=100)
+    limiter.inflight = 10
+    for _ in range(20):
+        limiter.on_success(0.1)
+    grown = limiter.limit
+    assert grown > 10
+
+    # Latency several times the no-load value: the gradient drops to 0.5
+    for _ in range(50):
+        limiter.inflight = int(limiter.limit)
+        limiter.on_success(1.0)
+    assert limiter.limit < grown
+    assert limiter.decreases > 0
+
+
+def test_idle_limit_does_not_move():
+    limiter = AdaptiveLimiter("test", initial=10)
+    for _ in range(20):
+        limiter.on_success(0.1)
+    assert limiter.limit == 10
+
+
+def test_failures_back_off_once_per_round_trip():
+    async def main():
+        limiter = AdaptiveLimiter("test", initial=10, backoff=0.5)
+        limiter.recent_latency = 60.0
+
+        class Upstream5xx(Exception):
+            status_code = 503
+
+        for _ in range(3):
+            with pytest.raises(Upstream5xx):
+                async with limiter.slot():
+                    raise Upstream5xx()
+        assert limiter.limit == 5
+        assert limiter.inflight == 0
+
+        # Local rejections say nothing about the provider; upstream 429s do
+        limiter._last_decrease = 0.0
+        with pytest.raises(ConcurrencyLimitExceeded):
+            async with limiter.slot():
+                raise ConcurrencyLimitExceeded("test", 1.0)
+        assert limiter.limit == 5
+        with pytest.raises(RateLimitExceeded):
+            async with limiter.slot():
+                raise RateLimitExceeded("test", 1.0)
+        assert limiter.limit == 2.5
+
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""
+HedgePolicy delay, budget and winner selection.
+"""
+
+import asyncio
+
+import pytest
+
+from core.hedging import HedgePolicy
+
+
+def warmed(latency: float = 0.01, **kwargs) -> HedgePolicy:
+    policy = HedgePolicy("test", enabled=True, min_samples=10, min_delay=0.01, **kwargs)
+    for _ in range(10):
+        policy.observe(latency)
+    return policy
+
+
+def attempts(*behaviours):
+    """attempt() factory: the nth call sleeps for, then returns or raises, behaviours[n]"""
+    calls = []
+
+    async def attempt():
+        delay, outcome = behaviours[len(calls)]
+        calls.append(delay)
+        await asyncio.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return attempt, calls
+
+
+def test_no_hedging_until_enough_samples():
+    async def main():
+        policy = HedgePolicy("test", enabled=True, min_samples=10)
+        attempt, calls = attempts((0.05, "primary"))
+        assert policy.delay() is None
+        assert await policy.run(attempt) == "primary"
+        assert len(calls) == 1 and policy.hedges == 0
+
+    asyncio.run(main())
+
+
+def test_slow_primary_is_hedged_and_the_hedge_wins():
+    async def main():
+        policy = warmed(budget=1.0)
+        attempt, calls = attempts((0.5, "primary"), (0.01, "hedge"))
+        assert await policy.run(attempt) == "hedge"
+        assert len(calls) == 2
+        assert policy.hedges == 1 and policy.hedge_wins == 1
+
+    asyncio.run(main())
+
+
+def test_fast_primary_is_not_hedged():
+    async def main():
+        policy = warmed(budget=1.0)
+        attempt, calls = attempts((0.0, "primary"))
+        assert await policy.run(attempt) == "primary"
+        assert len(calls) == 1 and policy.hedges == 0
+
+    asyncio.run(main())
+
+
+def test_budget_caps_hedges():
+    async def main():
+        policy = warmed(budget=0.5)
+        # First call earns half a credit: not enough to hedge
+        attempt, calls = attempts((0.05, "primary"))
+        assert await policy.run(attempt) == "primary"
+        assert policy.budget_exhausted == 1 and policy.hedges == 0
+        # The second brings it to one credit
+        attempt, calls = attempts((0.5, "primary"), (0.0, "hedge"))
+        assert await policy.run(attempt) == "hedge"
+        assert policy.hedges == 1
+
+    asyncio.run(main())
+
+
+def test_failed_attempt_falls_back_to_the_other():
+    async def main():
+        policy = warmed(budget=1.0)
+        attempt, _ = attempts((0.05, RuntimeError("primary failed")), (0.1, "hedge"))
+        assert await policy.run(attempt) == "hedge"
+
+        attempt, _ = attempts((0.05, RuntimeError("primary failed")), (0.0, RuntimeError("hedge failed")))
+        with pytest.raises(RuntimeError, match="primary failed"):
+            await policy.run(attempt)
+
+    asyncio.run(main())
+
+
+def test_delay_is_the_clamped_percentile():
+    policy = HedgePolicy("test", enabled=True, min_samples=10, percentile=0.9, min_delay=0.05, max_delay=1.0)
+    for ms in range(1, 101):
+        policy.observe(ms / 1000)
+    # p90 of 1..100ms
+    assert policy.delay() == pytest.approx(0.091)
+    slow = HedgePolicy("test", enabled=True, min_samples=1, max_delay=1.0)
+    slow.observe(5.0)
+    assert slow.delay() == 1.0
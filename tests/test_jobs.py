@@ -0,0 +1,219 @@
+"""
+JobManager de-duplication, queue limits and recovery of interrupted jobs,
+against an in-memory Mongo.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from core.jobs import JOB_COMPLETED, JOB_FAILED, JOB_PENDING, JOB_RUNNING, JobManager, JobQueueFull  # noqa: E402
+
+
+def collection():
+    return mongomock_motor.AsyncMongoMockClient()["test"]["plan_jobs"]
+
+
+async def wait_for_status(manager, job_id, status, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = await manager.get(job_id)
+        if job["status"] == status:
+            return job
+        assert asyncio.get_running_loop().time() < deadline, f"job stayed {job['status']}"
+        await asyncio.sleep(0.01)
+
+
+def test_identical_submissions_share_one_job():
+    async def main():
+        release = asyncio.Event()
+        runs = []
+
+        async def runner(payload, progress):
+            runs.append(payload)
+            await release.wait()
+            return {"ok": True}
+
+        manager = JobManager(collection(), runner)
+        await manager.start()
+        try:
+            first, created = await manager.submit({"destination": "Paris"})
+            second, created_again = await manager.submit({"destination": "Paris"})
+            assert created and not created_again
+            assert second["id"] == first["id"]
+
+            release.set()
+            await wait_for_status(manager, first["id"], JOB_COMPLETED)
+            # Recently finished jobs are still returned instead of re-running
+            third, created = await manager.submit({"destination": "Paris"})
+            assert not created and third["id"] == first["id"]
+            other, created = await manager.submit({"destination": "Lyon"})
+            assert created and other["id"] != first["id"]
+            await wait_for_status(manager, other["id"], JOB_COMPLETED)
+            assert len(runs) == 2
+        finally:
+            await manager.stop()
+
+    asyncio.run(main())
+
+
+def test_submit_rejects_and_removes_job_when_queue_fills_during_insert():
+    async def main():
+        jobs = collection()
+        manager = JobManager(jobs, lambda payload, progress: asyncio.sleep(0), max_pending=1)
+        original_insert = jobs.insert_one
+
+        async def insert_one(document):
+            # A concurrent submit takes the last queue slot during our insert
+            manager._queue.put_nowait("other")
+            return await original_insert(document)
+
+        jobs.insert_one = insert_one
+        with pytest.raises(JobQueueFull):
+            await manager.submit({"destination": "Paris"})
+        assert await jobs.count_documents({}) == 0
+        await manager.stop()
+
+    asyncio.run(main())
+
+
+def test_start_reclaims_running_jobs_with_expired_lease():
+    async def main():
+        jobs = collection()
+        now = datetime.utcnow()
+        base = {"request": {}, "progress": {}, "partial": {}, "created_at": now, "updated_at": now, "attempts": 1}
+        await jobs.insert_many([
+            {**base, "id": "orphan", "status": JOB_RUNNING, "active_hash": "a", "lease_expires_at": now - timedelta(seconds=5)},
+            {**base, "id": "alive", "status": JOB_RUNNING, "active_hash": "b", "lease_expires_at": now + timedelta(minutes=5)},
+            {**base, "id": "queued", "status": JOB_PENDING, "active_hash": "c", "attempts": 0},
+        ])
+        ran = []
+
+        async def runner(payload, progress):
+            return {"ok": True}
+
+        manager = JobManager(jobs, runner)
+        original_run = manager._run
+
+        async def run(job_id):
+            ran.append(job_id)
+            await original_run(job_id)
+
+        manager._run = run
+        await manager.start()
+        try:
+            orphan = await wait_for_status(manager, "orphan", JOB_COMPLETED)
+            await wait_for_status(manager, "queued", JOB_COMPLETED)
+            assert orphan["attempts"] == 2
+            assert "active_hash" not in orphan and "lease_token" not in orphan
+            assert sorted(ran) == ["orphan", "queued"]
+            assert (await manager.get("alive"))["status"] == JOB_RUNNING
+        finally:
+            await manager.stop()
+
+    asyncio.run(main())
+
+
+def test_job_interrupted_too_often_is_failed():
+    async def main():
+        jobs = collection()
+        now = datetime.utcnow()
+        await jobs.insert_one({
+            "id": "poison", "status": JOB_RUNNING, "active_hash": "a", "request": {}, "progress": {}, "partial": {},
+            "created_at": now, "updated_at": now, "attempts": 3, "lease_expires_at": now - timedelta(seconds=1),
+        })
+
+        async def runner(payload, progress):
+            raise AssertionError("should not run again")
+
+        manager = JobManager(jobs, runner, max_attempts=3)
+        await manager.start()
+        try:
+            job = await wait_for_status(manager, "poison", JOB_FAILED)
+            assert "active_hash" not in job
+        finally:
+            await manager.stop()
+
+    asyncio.run(main())
+
+
+def test_lease_is_renewed_while_running():
+    async def main():
+        jobs = collection()
+        release = asyncio.Event()
+
+        async def runner(payload, progress):
+            await release.wait()
+            return {}
+
+        manager = JobManager(jobs, runner, lease_seconds=0.15)
+        await manager.start()
+        try:
+            job, _ = await manager.submit({"destination": "Paris"})
+            await wait_for_status(manager, job["id"], JOB_RUNNING)
+            first = (await jobs.find_one({"id": job["id"]}))["lease_expires_at"]
+            await asyncio.sleep(0.2)
+            assert (await jobs.find_one({"id": job["id"]}))["lease_expires_at"] > first
+            release.set()
+            await wait_for_status(manager, job["id"], JOB_COMPLETED)
+        finally:
+            await manager.stop()
+
+    asyncio.run(main())
+
+
+def test_watch_releases_its_event():
+    async def main():
+        jobs = collection()
+        now = datetime.utcnow()
+        await jobs.insert_one({"id": "elsewhere", "status": JOB_RUNNING, "updated_at": now, "lease_expires_at": now + timedelta(minutes=1)})
+        manager = JobManager(jobs, lambda payload, progress: asyncio.sleep(0))
+
+        async def finish_elsewhere():
+            await asyncio.sleep(0.05)
+            await jobs.update_one({"id": "elsewhere"}, {"$set": {"status": JOB_COMPLETED, "updated_at": datetime.utcnow()}})
+
+        asyncio.create_task(finish_elsewhere())
+        snapshots = [job["status"] async for job in manager.watch("elsewhere", poll_interval=0.01)]
+        assert snapshots == [JOB_RUNNING, JOB_COMPLETED]
+        assert manager._updates == {}
+
+        # A watcher abandoned mid-stream (client disconnect) cleans up too
+        await jobs.update_one({"id": "elsewhere"}, {"$set": {"status": JOB_RUNNING}})
+        stream = manager.watch("elsewhere", poll_interval=0.01)
+        await stream.__anext__()
+        assert len(manager._updates["elsewhere"]) == 1
+        await stream.aclose()
+        assert manager._updates == {}
+
+    asyncio.run(main())
+
+
+def test_job_runs_label_llm_usage_with_their_route_scope():
+    from types import SimpleNamespace
+
+    from core.llm_usage import llm_usage_stats, record_usage
+    from core.metrics import current_route, route_scope
+
+    usage = SimpleNamespace(prompt_tokens=10, completion_tokens=5)
+
+    async def runner(payload, progress):
+        with route_scope("jobs:test"):
+            record_usage("test-model", usage, 0.1)
+        return {}
+
+    async def main():
+        manager = JobManager(collection(), runner)
+        await manager.start()
+        try:
+            job, _ = await manager.submit({"q": "usage"})
+            await wait_for_status(manager, job["id"], JOB_COMPLETED)
+        finally:
+            await manager.stop()
+
+    asyncio.run(main())
+    assert llm_usage_stats()["jobs:test"]["test-model"]["calls"] == 1
+    assert current_route() == "none"
@@ -0,0 +1,121 @@
+"""
+TokenBucket queueing, shedding, upstream 429 backoff and cancellation.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from core import rate_limit
+from core.rate_limit import RateLimitExceeded, TokenBucket, parse_retry_after
+
+
+def test_burst_is_served_immediately_then_callers_queue():
+    async def main():
+        bucket = TokenBucket("test", rate=20, burst=2)
+        started = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(4)))
+        elapsed = time.monotonic() - started
+        # Two from the burst, then one token every 50ms
+        assert 0.08 <= elapsed < 0.5
+        stats = bucket.stats()
+        assert stats["acquired"] == 4 and stats["queued"] == 2 and stats["shed"] == 0
+
+    asyncio.run(main())
+
+
+def test_shed_mode_and_max_wait_fail_fast():
+    async def main():
+        shed = TokenBucket("test", rate=1, burst=1, mode="shed")
+        await shed.acquire()
+        with pytest.raises(RateLimitExceeded) as rejected:
+            await shed.acquire()
+        assert 0 < rejected.value.retry_after <= 1
+
+        # Queue mode still sheds calls that would wait longer than max_wait
+        queued = TokenBucket("test", rate=1, burst=1, max_wait=0.1)
+        await queued.acquire()
+        with pytest.raises(RateLimitExceeded):
+            await queued.acquire()
+        assert shed.stats()["shed"] == 1 and queued.stats()["shed"] == 1
+
+    asyncio.run(main())
+
+
+def test_upstream_429_holds_the_bucket_back_for_retry_after():
+    async def main():
+        bucket = TokenBucket("test", rate=10, burst=10, mode="shed")
+        error = bucket.throttled(retry_after=2)
+        assert isinstance(error, RateLimitExceeded) and error.retry_after == 2
+        with pytest.raises(RateLimitExceeded) as rejected:
+            await bucket.acquire()
+        assert rejected.value.retry_after > 1.9
+        assert bucket.stats()["upstream_429"] == 1
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_returns_its_token():
+    async def main():
+        bucket = TokenBucket("test", rate=10, burst=1)
+        await bucket.acquire()
+        waiter = asyncio.create_task(bucket.acquire())
+        await asyncio.sleep(0.01)
+        assert bucket.stats()["waiting_now"] == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        # The next caller waits for one refill, not two
+        started = time.monotonic()
+        await bucket.acquire()
+        assert time.monotonic() - started < 0.15
+        assert bucket.stats()["waiting_now"] == 0
+
+    asyncio.run(main())
+
+
+def test_disabled_bucket_never_waits():
+    async def main():
+        bucket = TokenBucket("test", rate=0, burst=0, mode="shed")
+        for _ in range(100):
+            await bucket.acquire()
+
+    asyncio.run(main())
+
+
+def test_quota_is_split_across_workers(monkeypatch):
+    monkeypatch.setattr(rate_limit, "WORKERS", 4)
+    monkeypatch.setenv("RATE_LIMIT_SPLIT_TEST_RPS", "10")
+    monkeypatch.setenv("RATE_LIMIT_SPLIT_TEST_BURST", "2")
+    monkeypatch.setattr(rate_limit, "_buckets", {})
+    bucket = rate_limit.get_rate_limiter("split_test")
+    assert bucket.rate == 2.5
+    # Never below one token, so a worker can always make a call
+    assert bucket.burst == 1
+    assert bucket.stats()["workers_sharing_quota"] == 4
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") is None
+    assert parse_retry_after(None) is None
+
+
+def test_shed_calls_are_exported(monkeypatch):
+    import core.outbound  # noqa: F401  registers the guard collector
+    from core.metrics import render_metrics
+
+    monkeypatch.setattr(rate_limit, "_buckets", {})
+    monkeypatch.setenv("RATE_LIMIT_SHED_TEST_RPS", "1")
+    monkeypatch.setenv("RATE_LIMIT_SHED_TEST_MODE", "shed")
+    bucket = rate_limit.get_rate_limiter("shed_test")
+
+    async def main():
+        await bucket.acquire()
+        with pytest.raises(RateLimitExceeded):
+            await bucket.acquire()
+
+    asyncio.run(main())
+    assert 'rate_limit_shed_total{provider="shed_test"} 1' in render_metrics()
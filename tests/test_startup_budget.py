@@ -0,0 +1,79 @@
+"""
+Cold-start regression checks for the backend.
+
+The import budget can be tuned per machine with STARTUP_IMPORT_BUDGET_MS.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from core.startup import measure_import  # noqa: E402
+
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "2000"))
+DEFERRED_SDKS = ("openai", "googlemaps", "amadeus", "aiohttp", "requests")
+
+
+def test_cold_import_within_budget():
+    report = measure_import("server")
+    assert report["ok"], report["error"]
+    slowest = ", ".join(f"{e['module']}={e['cumulative_ms']:.0f}ms" for e in report["slowest_cumulative"][:8])
+    assert report["import_ms"] <= IMPORT_BUDGET_MS, (
+        f"import server took {report['import_ms']:.0f}ms (budget {IMPORT_BUDGET_MS:.0f}ms): {slowest}"
+    )
+
+
+def test_provider_sdks_are_not_imported_at_startup():
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, server; print(','.join(m for m in %r if m in sys.modules))" % (DEFERRED_SDKS,),
+        ],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == "", f"imported at startup: {completed.stdout.strip()}"
+
+
+def test_health_status_does_not_construct_integrations():
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "test",
+        "GOOGLE_MAPS_API_KEY": "test",
+        "AMADEUS_API_KEY": "test",
+        "AMADEUS_API_SECRET": "test",
+    }
+    env.pop("AMADEUS_CLIENT_ID", None)
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import json, sys, server; from core.lazy import integration_status; "
+            "status = integration_status(); "
+            "print(json.dumps({'status': status, 'imported': [m for m in %r if m in sys.modules]}))" % (DEFERRED_SDKS,),
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert completed.returncode == 0, completed.stderr
+    report = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert report["imported"] == [], f"imported by a status check: {report['imported']}"
+    assert report["status"]["openai"] == {"available": True, "initialized": False, "error": None}
+    assert report["status"]["trip_mode"]["available"] is False
+    assert "AMADEUS_CLIENT_ID" in report["status"]["trip_mode"]["error"]